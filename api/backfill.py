@@ -0,0 +1,225 @@
+# api/backfill.py
+
+# Carga histórica de partidos por lotes (backfill), reanudable.
+#
+# Una especificación liga × temporada × rango de fechas se expande en unidades de
+# trabajo (una petición `fixtures` a API-Football por unidad) que se ejecutan con un
+# número acotado de hilos. Cada unidad terminada se registra en la colección
+# `backfill_jobs` ({"_id": "<job>:<unidad>", "status": "done", "new": N, "changed": N, ...}),
+# de modo que al relanzar el mismo job solo se ejecutan las unidades pendientes.
+# Durante la ejecución se informa del avance, el ritmo, el tiempo estimado (ETA)
+# y los fallos.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m api.backfill --leagues 39 140 --seasons 2022 2023
+#   python -m api.backfill --leagues 39 --seasons 2023 --from 2023-08-01 --to 2024-05-31 --window-days 14
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+
+from api.fetch_matches import fetch_and_store_matches_from_api
+from db.queries import find_documents, insert_document
+
+CHECKPOINT_COLLECTION = "backfill_jobs"
+
+# Hilos por defecto: API-Football limita las peticiones por minuto, así que el
+# paralelismo útil es bajo
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 2
+
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+def expand_units(leagues, seasons, date_from=None, date_to=None, window_days=30):
+    """
+    Expande la especificación en unidades de trabajo.
+    Sin rango de fechas, cada (liga, temporada) es una unidad; con rango, el rango se
+    divide en ventanas de `window_days` días para cada (liga, temporada).
+    Retorna una lista de diccionarios {"id", "league", "season", "from", "to"}.
+    """
+    date_from, date_to = _as_date(date_from), _as_date(date_to)
+    units = []
+    for league in leagues:
+        for season in seasons:
+            if date_from is None or date_to is None:
+                units.append({"id": f"{league}:{season}", "league": league, "season": season,
+                              "from": None, "to": None})
+                continue
+            window_start = date_from
+            while window_start <= date_to:
+                window_end = min(window_start + timedelta(days=window_days - 1), date_to)
+                units.append({
+                    "id": f"{league}:{season}:{window_start.isoformat()}:{window_end.isoformat()}",
+                    "league": league, "season": season,
+                    "from": window_start.isoformat(), "to": window_end.isoformat(),
+                })
+                window_start = window_end + timedelta(days=1)
+    return units
+
+class BackfillJob:
+    """
+    Ejecuta las unidades de un backfill con un pool de `workers` hilos.
+    Cada unidad se reintenta hasta `retries` veces; las que siguen fallando se
+    informan y quedan pendientes para la próxima ejecución del mismo job.
+    """
+    def __init__(self, name, units, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES,
+                 fetch_unit=None, progress_interval=5.0):
+        self.name = name
+        self.units = units
+        self.workers = workers
+        self.retries = retries
+        self.fetch_unit = fetch_unit or self._fetch_unit
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.completed = 0
+        self.failed = []
+        self.inserted = 0  # Partidos nuevos
+        self.changed = 0
+        self.unchanged = 0
+        self._started = None
+        self._last_report = 0.0
+
+    @staticmethod
+    def _fetch_unit(unit):
+        """
+        Descarga y guarda los partidos de una unidad. Retorna el conteo
+        {"new", "changed", "unchanged"} (ver db/fixture_sync.py), o None si falló.
+        """
+        return fetch_and_store_matches_from_api(
+            league_id=unit["league"], season=unit["season"], date_from=unit["from"], date_to=unit["to"]
+        )
+
+    def _checkpoint_id(self, unit):
+        return f"{self.name}:{unit['id']}"
+
+    def done_unit_ids(self):
+        """IDs de las unidades de este job ya completadas en ejecuciones anteriores."""
+        records = find_documents({"job": self.name, "status": "done"}, CHECKPOINT_COLLECTION)
+        return {record["unit"] for record in records}
+
+    def pending_units(self):
+        done = self.done_unit_ids()
+        return [unit for unit in self.units if unit["id"] not in done]
+
+    def _run_unit(self, unit):
+        """Ejecuta una unidad con reintentos (espera exponencial). Retorna su conteo o None."""
+        for attempt in range(self.retries + 1):
+            counts = self.fetch_unit(unit)
+            if counts is not None:
+                insert_document({
+                    "_id": self._checkpoint_id(unit),
+                    "job": self.name,
+                    "unit": unit["id"],
+                    "status": "done",
+                    **counts,
+                    "attempts": attempt + 1,
+                    "finished_at": datetime.now(timezone.utc),
+                }, CHECKPOINT_COLLECTION)
+                return counts
+            if attempt < self.retries:
+                time.sleep(2 ** attempt)
+        return None
+
+    def progress(self, total):
+        """
+        Resumen del avance: completadas, fallidas, partidos nuevos ("inserted"),
+        modificados y sin cambios, ritmo (unidades/s, partidos/s) y ETA en segundos.
+        """
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        finished = self.completed + len(self.failed)
+        rate = finished / elapsed if elapsed > 0 else 0.0
+        processed = self.inserted + self.changed + self.unchanged
+        return {
+            "job": self.name,
+            "total": total,
+            "completed": self.completed,
+            "failed": len(self.failed),
+            "inserted": self.inserted,
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+            "elapsed_s": round(elapsed, 1),
+            "units_per_s": round(rate, 3),
+            "matches_per_s": round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+            "eta_s": round((total - finished) / rate, 1) if rate > 0 else None,
+        }
+
+    def _report(self, total, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        p = self.progress(total)
+        eta = f"{p['eta_s']:.0f} s" if p["eta_s"] is not None else "?"
+        print(f"[backfill {self.name}] {p['completed'] + p['failed']}/{total} unidades "
+              f"({p['failed']} fallidas), {p['inserted']} nuevos, {p['changed']} modificados, "
+              f"{p['unchanged']} sin cambios, "
+              f"{p['units_per_s']:.2f} u/s, {p['matches_per_s']:.1f} partidos/s, ETA {eta}")
+
+    def run(self):
+        """
+        Ejecuta las unidades pendientes. Retorna el resumen final (ver `progress`)
+        con la lista de unidades fallidas en "failed_units".
+        """
+        self._reset_counters()
+        pending = self.pending_units()
+        skipped = len(self.units) - len(pending)
+        if skipped:
+            print(f"[backfill {self.name}] {skipped} unidades ya completadas; se omiten.")
+
+        self._started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill") as pool:
+            futures = {pool.submit(self._run_unit, unit): unit for unit in pending}
+            for future in as_completed(futures):
+                unit = futures[future]
+                try:
+                    counts = future.result()
+                except Exception as e:
+                    print(f"[backfill {self.name}] Error en la unidad {unit['id']}: {e}")
+                    counts = None
+                with self._lock:
+                    if counts is None:
+                        self.failed.append(unit["id"])
+                    else:
+                        self.completed += 1
+                        self.inserted += counts["new"]
+                        self.changed += counts["changed"]
+                        self.unchanged += counts["unchanged"]
+                self._report(len(pending))
+
+        self._report(len(pending), force=True)
+        summary = self.progress(len(pending))
+        summary["skipped"] = skipped
+        summary["failed_units"] = list(self.failed)
+        return summary
+
+def run_backfill(leagues, seasons, date_from=None, date_to=None, window_days=30,
+                 workers=DEFAULT_WORKERS, job_name=None):
+    """Expande la especificación y ejecuta el backfill. Retorna el resumen de `BackfillJob.run`."""
+    units = expand_units(leagues, seasons, date_from, date_to, window_days)
+    job_name = job_name or f"{'-'.join(map(str, leagues))}_{'-'.join(map(str, seasons))}"
+    return BackfillJob(job_name, units, workers=workers).run()
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill histórico de partidos desde API-Football")
+    parser.add_argument("--leagues", nargs="+", type=int, required=True, help="IDs de liga de API-Football")
+    parser.add_argument("--seasons", nargs="+", type=int, required=True)
+    parser.add_argument("--from", dest="date_from", help="Inicio del rango (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="Fin del rango (YYYY-MM-DD)")
+    parser.add_argument("--window-days", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--job", help="Nombre del job (para reanudar)")
+    args = parser.parse_args()
+
+    summary = run_backfill(args.leagues, args.seasons, args.date_from, args.date_to,
+                           args.window_days, args.workers, args.job)
+    print(summary)
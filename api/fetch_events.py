@@ -0,0 +1,137 @@
+# api/fetch_events.py
+
+# Ingesta de los eventos de los partidos (goles, tarjetas, cambios, VAR).
+#
+# Los eventos llegan en la respuesta de `fixtures?ids=...` de API-Football, así que se
+# piden en lotes de 20 partidos por petición (ver `iter_fixture_batches`). Cada partido
+# se guarda en la colección `eventos` como un documento con arrays empaquetados
+# (ver models/evento_schema.py); al reimportar un partido su documento se reemplaza
+# (upsert por `fixture_id`).
+# Para analizarlos: `events_to_dataframe(find_documents(..., "eventos"))`.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m api.fetch_events --days 7
+#   python -m api.fetch_events --all --refresh
+
+from datetime import datetime, timedelta, timezone
+
+from api.fetch_matches import iter_fixture_batches
+from db.queries import (bulk_delete_documents, bulk_write_operations, find_documents, get_collection,
+                        insert_documents)
+from models.evento_schema import EVENTS_COLLECTION, event_type_code, pack_events
+
+# Partidos por ronda de descarga + escritura (cada ronda son varias peticiones de 20)
+EVENTS_BATCH_SIZE = 200
+
+def map_fixture_events(match_data):
+    """
+    Convierte los eventos de un elemento de la respuesta de `fixtures` en el documento
+    columnar de `eventos`. Los eventos se ordenan por minuto (y descuento).
+    """
+    fixture_id = match_data.get('fixture', {}).get('id')
+    home_id = match_data.get('teams', {}).get('home', {}).get('id')
+    rows = []
+    for event in match_data.get('events') or []:
+        time = event.get('time') or {}
+        rows.append((
+            max(time.get('elapsed') or 0, 0),
+            max(time.get('extra') or 0, 0),
+            event_type_code(event.get('type'), event.get('detail')),
+            1 if (event.get('team') or {}).get('id') == home_id else 0,
+            (event.get('player') or {}).get('id') or 0,
+        ))
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return pack_events(fixture_id, rows)
+
+def fetch_events_by_ids(fixture_ids):
+    """Descarga los eventos de los partidos indicados. Retorna {fixture_id: documento de `eventos`}."""
+    documents = {}
+    for batch in iter_fixture_batches(fixture_ids):
+        for match_data in batch:
+            document = map_fixture_events(match_data)
+            if document["fixture_id"] is not None:
+                documents[document["fixture_id"]] = document
+    return documents
+
+def store_events(documents, collection_name=EVENTS_COLLECTION):
+    """
+    Guarda (reemplazando los existentes) los documentos de eventos en un solo round trip:
+    con MongoDB, un bulk_write de ReplaceOne con upsert por `fixture_id` (índice único).
+    Con otros backends se insertan primero los nuevos y después se borran los anteriores,
+    así un fallo nunca deja a un partido sin eventos.
+    Retorna el número de partidos guardados, o None si hubo un error.
+    """
+    if not documents:
+        return 0
+    if get_collection(collection_name) is not None:
+        from pymongo import ReplaceOne
+
+        now = datetime.now(timezone.utc)
+        result = bulk_write_operations([
+            ReplaceOne({"fixture_id": document["fixture_id"]}, dict(document, updated_at=now), upsert=True)
+            for document in documents
+        ], collection_name)
+        return len(documents) if result is not None else None
+
+    fixture_ids = [document["fixture_id"] for document in documents]
+    previous = find_documents({"fixture_id": {"$in": fixture_ids}}, collection_name, projection={"fixture_id": 1})
+    inserted = insert_documents(documents, collection_name)
+    if len(inserted) != len(documents):
+        return None
+    if previous and bulk_delete_documents([document["_id"] for document in previous], collection_name) is None:
+        return None
+    return len(inserted)
+
+def ensure_events_index(collection_name=EVENTS_COLLECTION):
+    """Índice único por `fixture_id` (solo MongoDB)."""
+    collection = get_collection(collection_name)
+    if collection is not None:
+        try:
+            return collection.create_index("fixture_id", unique=True)
+        except Exception as e:
+            print(f"Error al crear el índice de eventos: {e}")
+    return None
+
+def ingest_events(query=None, refresh=False, batch_size=EVENTS_BATCH_SIZE):
+    """
+    Descarga y guarda los eventos de los partidos guardados que cumplen `query`.
+    Sin `refresh`, se omiten los partidos que ya tienen eventos (una consulta $in por ronda).
+    Retorna {"matches": N, "skipped": N, "fetched": N, "stored": N | None, "events": N}.
+    """
+    ensure_events_index()
+    fixture_ids = [doc.get("fixture_id") for doc in find_documents(query, projection={"fixture_id": 1})]
+    fixture_ids = [fid for fid in dict.fromkeys(fixture_ids) if fid is not None]
+    summary = {"matches": len(fixture_ids), "skipped": 0, "fetched": 0, "stored": 0, "events": 0}
+
+    for i in range(0, len(fixture_ids), batch_size):
+        batch = fixture_ids[i:i + batch_size]
+        if not refresh:
+            existing = {doc["fixture_id"] for doc in find_documents(
+                {"fixture_id": {"$in": batch}}, EVENTS_COLLECTION, projection={"fixture_id": 1})}
+            summary["skipped"] += len(existing)
+            batch = [fid for fid in batch if fid not in existing]
+        if not batch:
+            continue
+        documents = list(fetch_events_by_ids(batch).values())
+        summary["fetched"] += len(documents)
+        summary["events"] += sum(document["n"] for document in documents)
+        stored = store_events(documents)
+        if stored is None:
+            summary["stored"] = None
+            break
+        summary["stored"] += stored
+    print(f"Eventos: {summary}")
+    return summary
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingesta de eventos de partidos desde API-Football")
+    parser.add_argument("--days", type=int, default=7, help="Partidos de los últimos N días")
+    parser.add_argument("--all", action="store_true", help="Todos los partidos guardados")
+    parser.add_argument("--refresh", action="store_true", help="Vuelve a descargar los que ya tienen eventos")
+    args = parser.parse_args()
+
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=args.days)
+    ingest_events(None if args.all else {"fecha": {"$gte": since}}, refresh=args.refresh)
@@ -1,9 +1,12 @@
 import requests
 import os
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-from db.queries import insert_document, get_collection
-from models.partido_schema import ejemplo_partido # Usamos el ejemplo como base
+from datetime import datetime, timedelta, timezone
+from db.queries import get_collection, find_documents
+from db.fixture_sync import sync_matches
+from db.team_registry import canonicalize_matches
+from utils.date_tools import to_utc_datetime
+from models.partido_schema import ejemplo_partido, normalize_partido # Usamos el ejemplo como base
 
 # Carga las variables de entorno para la API Key de API-Football
 # Asegúrate de tener un archivo .env en la raíz de tu proyecto con:
@@ -13,7 +16,107 @@ load_dotenv()
 API_FOOTBALL_KEY = os.getenv("d9c8ef2a77d6cecfbe34b05f63811a03")
 API_FOOTBALL_BASE_URL = "https://dashboard.api-football.com/profile?access"
 
-def fetch_and_store_matches_from_api(date_str=None, league_id=None, season=None):
+# API-Football acepta como máximo 20 IDs por petición en `fixtures?ids=`
+MAX_IDS_PER_REQUEST = 20
+
+def _api_headers():
+    """Cabeceras de autenticación para API-Football."""
+    return {
+        'x-rapidapi-key': API_FOOTBALL_KEY,
+        'x-rapidapi-host': 'v3.football.api-sports.io'
+    }
+
+def map_fixture_to_partido(match_data):
+    """
+    Mapea un elemento de la respuesta de `fixtures` de API-Football a la estructura
+    de `partido_schema`.
+    """
+    # Aquí debes mapear la estructura de la respuesta de la API-Football
+    # a tu `partido_schema`. Esto es crucial y específico de la API.
+    # El siguiente es un ejemplo simplificado.
+
+    # Ejemplo de cómo podrías extraer y transformar datos:
+    # Asegúrate de que los campos existan en la respuesta de la API
+    # y maneja los casos donde puedan faltar.
+    return normalize_partido({
+        "fixture_id": match_data.get('fixture', {}).get('id'),
+        "fecha": to_utc_datetime(match_data.get('fixture', {}).get('date')), # ISO de la API -> BSON Date
+        "equipo_local": match_data.get('teams', {}).get('home', {}).get('name'),
+        "equipo_visitante": match_data.get('teams', {}).get('away', {}).get('name'),
+        "es_local": True, # Esto dependerá de cómo uses el dato, es un ejemplo
+        "goles_local": match_data.get('goals', {}).get('home'),
+        "goles_visitante": match_data.get('goals', {}).get('away'),
+        "posesion_local": match_data.get('statistics', [{}])[0].get('statistics', [{}])[0].get('value'), # Esto es muy simplificado, la posesión está anidada
+        "posesion_visitante": match_data.get('statistics', [{}])[1].get('statistics', [{}])[0].get('value'),
+        "tarjetas_amarillas_local": 0, # Placeholder, necesitarías buscar esto en las estadísticas
+        "tarjetas_amarillas_visitante": 0, # Placeholder
+        "remates_local": 0, # Placeholder
+        "remates_visitante": 0, # Placeholder
+        "liga": match_data.get('league', {}).get('name'),
+        "temporada": match_data.get('league', {}).get('season')
+    }) # Posesión "54%" -> 54 y campos derivados (goles_total, resultado)
+
+def iter_fixture_batches(fixture_ids):
+    """
+    Pide a API-Football los partidos indicados en lotes de hasta 20 IDs por petición
+    (una sesión HTTP para todos). Genera, por cada lote que se pudo descargar, la lista
+    de elementos de la respuesta (partido completo: equipos, goles, estadísticas, eventos...).
+    """
+    if not API_FOOTBALL_KEY:
+        print("Error: La variable de entorno API_FOOTBALL_KEY no está configurada.")
+        return
+
+    fixture_ids = [fid for fid in dict.fromkeys(fixture_ids) if fid is not None]
+    endpoint = f"{API_FOOTBALL_BASE_URL}fixtures"
+    with requests.Session() as session:
+        session.headers.update(_api_headers())
+        for i in range(0, len(fixture_ids), MAX_IDS_PER_REQUEST):
+            batch = fixture_ids[i:i + MAX_IDS_PER_REQUEST]
+            try:
+                response = session.get(endpoint, params={"ids": "-".join(str(fid) for fid in batch)})
+                response.raise_for_status()
+                yield response.json().get('response', [])
+            except requests.exceptions.RequestException as e:
+                print(f"Error al obtener el lote de partidos {batch}: {e}")
+            except ValueError as e:
+                print(f"Error al procesar el lote de partidos {batch}: {e}")
+
+def fetch_fixtures_by_ids(fixture_ids):
+    """
+    Obtiene de API-Football los partidos indicados, en lotes de hasta 20 IDs por petición.
+    Retorna un diccionario {fixture_id: partido mapeado a `partido_schema`}.
+    """
+    fixture_ids = list(fixture_ids)
+    fixtures = {}
+    for batch in iter_fixture_batches(fixture_ids):
+        for match_data in batch:
+            try:
+                processed_match = map_fixture_to_partido(match_data)
+            except (ValueError, IndexError, AttributeError) as e:
+                print(f"Error al procesar el partido {match_data.get('fixture', {}).get('id')}: {e}")
+                continue
+            fixtures[processed_match["fixture_id"]] = processed_match
+    requested = len({fid for fid in fixture_ids if fid is not None})
+    print(f"Obtenidos {len(fixtures)} de {requested} partidos solicitados.")
+    return fixtures
+
+def refresh_stored_matches(query, collection_name="partidos"):
+    """
+    Vuelve a descargar de API-Football los partidos guardados que cumplen `query`
+    (p. ej. los de los últimos días, cuyos resultados pueden haber cambiado) y
+    reescribe solo los que cambiaron (ver db/fixture_sync.py).
+    Retorna un diccionario {"requested": N, "fetched": N, "new": N, "changed": N,
+    "unchanged": N}; los tres últimos son None si falló la escritura.
+    """
+    stored = find_documents(query, collection_name, projection={"fixture_id": 1})
+    fixtures = fetch_fixtures_by_ids([doc.get("fixture_id") for doc in stored])
+    canonicalize_matches(list(fixtures.values()))
+    counts = sync_matches(list(fixtures.values()), collection_name) if fixtures else {"new": 0, "changed": 0, "unchanged": 0}
+    if counts is None:
+        counts = dict.fromkeys(("new", "changed", "unchanged"))
+    return {"requested": len(stored), "fetched": len(fixtures), **counts}
+
+def fetch_and_store_matches_from_api(date_str=None, league_id=None, season=None, date_from=None, date_to=None):
     """
     Función para consumir la API-Football y almacenar los datos en MongoDB.
     Esta es una implementación de ejemplo. Necesitarás ajustar los endpoints
@@ -23,15 +126,18 @@ def fetch_and_store_matches_from_api(date_str=None, league_id=None, season=None)
         date_str (str, optional): Fecha en formato 'YYYY-MM-DD' para filtrar partidos.
         league_id (int, optional): ID de la liga para filtrar.
         season (int, optional): Año de la temporada para filtrar.
+        date_from (str, optional): Inicio del rango 'YYYY-MM-DD' (requiere `season`).
+        date_to (str, optional): Fin del rango 'YYYY-MM-DD' (requiere `season`).
+
+    Returns:
+        dict | None: Conteo {"new", "changed", "unchanged"} de los partidos recibidos
+        (solo se escriben los nuevos y los modificados), o None si hubo un error.
     """
     if not API_FOOTBALL_KEY:
         print("Error: La variable de entorno API_FOOTBALL_KEY no está configurada.")
-        return
+        return None
 
-    headers = {
-        'x-rapidapi-key': API_FOOTBALL_KEY,
-        'x-rapidapi-host': 'v3.football.api-sports.io'
-    }
+    headers = _api_headers()
 
     # Ejemplo de endpoint para partidos (fixtures)
     # Consulta la documentación de API-Football para los parámetros correctos
@@ -44,6 +150,10 @@ def fetch_and_store_matches_from_api(date_str=None, league_id=None, season=None)
         params['league'] = league_id
     if season:
         params['season'] = season
+    if date_from:
+        params['from'] = date_from
+    if date_to:
+        params['to'] = date_to
 
     print(f"Intentando obtener datos de: {endpoint} con parámetros: {params}")
 
@@ -55,39 +165,17 @@ def fetch_and_store_matches_from_api(date_str=None, league_id=None, season=None)
         # Verifica si la respuesta contiene datos de partidos
         if data and 'response' in data and data['response']:
             print(f"Recibidos {len(data['response'])} partidos de la API.")
-            for match_data in data['response']:
-                # Aquí debes mapear la estructura de la respuesta de la API-Football
-                # a tu `partido_schema`. Esto es crucial y específico de la API.
-                # El siguiente es un ejemplo simplificado.
-
-                # Ejemplo de cómo podrías extraer y transformar datos:
-                # Asegúrate de que los campos existan en la respuesta de la API
-                # y maneja los casos donde puedan faltar.
-                processed_match = {
-                    "fixture_id": match_data.get('fixture', {}).get('id'),
-                    "fecha": match_data.get('fixture', {}).get('date'), # Ya debería ser ISO
-                    "equipo_local": match_data.get('teams', {}).get('home', {}).get('name'),
-                    "equipo_visitante": match_data.get('teams', {}).get('away', {}).get('name'),
-                    "es_local": True, # Esto dependerá de cómo uses el dato, es un ejemplo
-                    "goles_local": match_data.get('goals', {}).get('home'),
-                    "goles_visitante": match_data.get('goals', {}).get('away'),
-                    "posesion_local": match_data.get('statistics', [{}])[0].get('statistics', [{}])[0].get('value'), # Esto es muy simplificado, la posesión está anidada
-                    "posesion_visitante": match_data.get('statistics', [{}])[1].get('statistics', [{}])[0].get('value'),
-                    "tarjetas_amarillas_local": 0, # Placeholder, necesitarías buscar esto en las estadísticas
-                    "tarjetas_amarillas_visitante": 0, # Placeholder
-                    "remates_local": 0, # Placeholder
-                    "remates_visitante": 0, # Placeholder
-                    "liga": match_data.get('league', {}).get('name'),
-                    "temporada": match_data.get('league', {}).get('season')
-                }
-
-                # Es importante validar y limpiar los datos antes de insertar
-                # Por ejemplo, asegurarse de que los campos numéricos sean ints, etc.
-                # Aquí se usa un ejemplo de documento para simular la inserción
-                # En un caso real, usarías `processed_match`
-                insert_document(processed_match) # Inserta el documento procesado
+            processed_matches = [map_fixture_to_partido(match_data) for match_data in data['response']]
+
+            # Los nombres de equipo se resuelven a su forma canónica en un solo lote
+            # (p. ej. "Man Utd" -> "Manchester United", con `equipo_local_id`)
+            canonicalize_matches(processed_matches)
+
+            # Solo se escriben los partidos nuevos o con cambios (hash de contenido por lote)
+            return sync_matches(processed_matches)
         else:
             print("No se encontraron partidos para los criterios especificados o la respuesta de la API está vacía.")
+            return {"new": 0, "changed": 0, "unchanged": 0}
 
     except requests.exceptions.RequestException as e:
         print(f"Error al conectar con la API-Football: {e}")
@@ -95,6 +183,7 @@ def fetch_and_store_matches_from_api(date_str=None, league_id=None, season=None)
         print(f"Error al parsear la respuesta JSON de la API: {e}")
     except Exception as e:
         print(f"Ocurrió un error inesperado al obtener o procesar partidos: {e}")
+    return None
 
 def simulate_fetch_and_store_dummy_data(num_matches=5):
     """
@@ -102,19 +191,23 @@ def simulate_fetch_and_store_dummy_data(num_matches=5):
     Útil para pruebas sin depender de la API-Football.
     """
     print(f"Simulando la obtención y almacenamiento de {num_matches} partidos de prueba...")
+    dummy_matches = []
     for i in range(num_matches):
         dummy_match = ejemplo_partido.copy()
         dummy_match["fixture_id"] = dummy_match["fixture_id"] + i
         dummy_match["equipo_local"] = f"Equipo Local {i+1}"
         dummy_match["equipo_visitante"] = f"Equipo Visitante {i+1}"
-        dummy_match["fecha"] = (datetime.now() - timedelta(days=i)).isoformat() + "Z"
+        dummy_match["fecha"] = to_utc_datetime(datetime.now(timezone.utc)) - timedelta(days=i)
         dummy_match["goles_local"] = i % 4
         dummy_match["goles_visitante"] = (i + 1) % 3
         dummy_match["liga"] = "Liga de Prueba" if i % 2 == 0 else "Otra Liga"
         dummy_match["temporada"] = 2025
+        dummy_matches.append(normalize_partido(dummy_match))
 
-        insert_document(dummy_match)
-    print(f"Se insertaron {num_matches} partidos de prueba en MongoDB.")
+    canonicalize_matches(dummy_matches)
+    counts = sync_matches(dummy_matches)
+    print(f"Partidos de prueba guardados: {counts}")
+    return counts
 
 # Ejemplo de uso (opcional, para pruebas)
 if __name__ == "__main__":
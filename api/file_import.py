@@ -0,0 +1,277 @@
+# api/file_import.py
+
+# Importación de volcados históricos de partidos desde archivos CSV, JSON Lines o Parquet.
+#
+# El archivo se lee por bloques (`chunksize` de pandas para CSV/JSONL, lotes de pyarrow
+# para Parquet), así la memoria no depende del tamaño del archivo. Cada bloque:
+#   1. renombra sus columnas a las de `partido_schema` (alias habituales de los volcados
+#      y los que se indiquen con `column_map`) y descarta las demás;
+#   2. se valida fila a fila: fixture_id entero, fecha válida, equipos y liga presentes,
+#      y estadísticas numéricas dentro de rango. Las filas inválidas se escriben, con su
+#      número de fila y el motivo, en un archivo aparte (JSON Lines);
+#   3. se convierte con `dataframe_to_mongo` (las celdas vacías quedan como None) y se
+#      normaliza (`normalize_partido`) y canonicaliza (db/team_registry.py) como los
+#      partidos de la API;
+#   4. se escribe con `sync_matches` (db/fixture_sync.py): por lote de 1000, una lectura
+#      `fixture_id $in`, un insert_many de los nuevos y un bulk_write de los modificados.
+#      Reimportar el mismo archivo no reescribe nada.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m api.file_import partidos_2019.csv
+#   python -m api.file_import historico.parquet --chunk-size 20000 --map home=equipo_local away=equipo_visitante
+
+import json
+import os
+import time
+
+from db.fixture_sync import sync_matches
+from db.team_registry import canonicalize_matches
+from models.partido_schema import normalize_partido, partido_schema
+
+IMPORT_CHUNK_SIZE = 5000
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+# Nombres de columna habituales en los volcados -> campo de `partido_schema`
+COLUMN_ALIASES = {
+    "id": "fixture_id", "match_id": "fixture_id", "fixture": "fixture_id",
+    "date": "fecha", "datetime": "fecha", "kickoff": "fecha",
+    "home_team": "equipo_local", "home": "equipo_local", "local": "equipo_local",
+    "away_team": "equipo_visitante", "away": "equipo_visitante", "visitante": "equipo_visitante",
+    "home_goals": "goles_local", "home_score": "goles_local", "fthg": "goles_local",
+    "away_goals": "goles_visitante", "away_score": "goles_visitante", "ftag": "goles_visitante",
+    "home_possession": "posesion_local", "away_possession": "posesion_visitante",
+    "home_shots": "remates_local", "hs": "remates_local",
+    "away_shots": "remates_visitante", "as": "remates_visitante",
+    "home_yellow_cards": "tarjetas_amarillas_local", "hy": "tarjetas_amarillas_local",
+    "away_yellow_cards": "tarjetas_amarillas_visitante", "ay": "tarjetas_amarillas_visitante",
+    "league": "liga", "competition": "liga", "div": "liga",
+    "season": "temporada",
+}
+# Campos que se recalculan al importar (no se toman del archivo)
+COMPUTED_FIELDS = ("goles_total", "resultado", "content_hash", "equipo_local_id", "equipo_visitante_id")
+REQUIRED_TEXT_FIELDS = ("equipo_local", "equipo_visitante", "liga")
+# Campo numérico -> (mínimo, máximo) admitidos
+NUMERIC_RANGES = {
+    "goles_local": (0, 99), "goles_visitante": (0, 99),
+    "posesion_local": (0, 100), "posesion_visitante": (0, 100),
+    "tarjetas_amarillas_local": (0, 30), "tarjetas_amarillas_visitante": (0, 30),
+    "remates_local": (0, 200), "remates_visitante": (0, 200),
+    "temporada": (1850, 2100),
+}
+
+def detect_format(path):
+    """Formato a partir de la extensión (ignora .gz/.bz2/.zip/.xz de compresión)."""
+    root, extension = os.path.splitext(path.lower())
+    if extension in (".gz", ".bz2", ".zip", ".xz"):
+        extension = os.path.splitext(root)[1]
+    file_format = FORMATS.get(extension)
+    if file_format is None:
+        raise ValueError(f"Formato no reconocido para {path} (use --format csv|jsonl|parquet)")
+    return file_format
+
+def iter_file_chunks(path, file_format=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Genera DataFrames de hasta `chunk_size` filas del archivo."""
+    import pandas as pd
+
+    file_format = file_format or detect_format(path)
+    if file_format == "parquet":
+        import pyarrow.parquet as pq # Dependencia opcional, solo para Parquet
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+        return
+    if file_format == "jsonl":
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=True)
+    with reader:
+        yield from reader
+
+def map_columns(df, column_map=None):
+    """
+    Renombra las columnas a los campos de `partido_schema` (primero `column_map`, luego
+    los alias, sin distinguir mayúsculas) y descarta las que no son del esquema.
+    """
+    renames = {}
+    for column in df.columns:
+        key = str(column).strip()
+        if column_map and key in column_map:
+            renames[column] = column_map[key]
+        elif key.lower() in partido_schema:
+            renames[column] = key.lower()
+        elif key.lower() in COLUMN_ALIASES:
+            renames[column] = COLUMN_ALIASES[key.lower()]
+    # Si dos columnas van al mismo campo, vale la primera
+    targets, keep = set(), {}
+    for column, field in renames.items():
+        if field in partido_schema and field not in COMPUTED_FIELDS and field not in targets:
+            targets.add(field)
+            keep[column] = field
+    return df[list(keep)].rename(columns=keep)
+
+def validate_chunk(df):
+    """
+    Valida y convierte los tipos del bloque (ya con columnas del esquema).
+    Retorna (DataFrame de filas válidas, {índice: motivo} de las rechazadas).
+    """
+    import pandas as pd
+    from models.partido_schema import parse_percentage
+
+    reasons = {}
+
+    def reject(mask, reason):
+        for index in df.index[mask]:
+            reasons.setdefault(index, reason)
+
+    for field in ("fixture_id", "fecha", *REQUIRED_TEXT_FIELDS):
+        if field not in df.columns:
+            reject(df.index == df.index, f"falta la columna '{field}'")
+            return df.iloc[0:0], reasons
+
+    fixture_ids = pd.to_numeric(df["fixture_id"], errors="coerce")
+    reject(fixture_ids.isna() | (fixture_ids % 1 != 0), "fixture_id inválido")
+    df = df.assign(fixture_id=fixture_ids)
+
+    fechas = pd.to_datetime(df["fecha"], errors="coerce", utc=True)
+    reject(fechas.isna(), "fecha inválida")
+    df = df.assign(fecha=fechas.dt.tz_localize(None)) # BSON Date en UTC, como mongo_to_dataframe
+
+    for field in REQUIRED_TEXT_FIELDS:
+        text = df[field].astype("string").str.strip()
+        reject((text.fillna("") == "").to_numpy(bool), f"falta '{field}'")
+        df = df.assign(**{field: text})
+
+    for field, (low, high) in NUMERIC_RANGES.items():
+        if field not in df.columns:
+            continue
+        raw = df[field]
+        if field.startswith("posesion_"):
+            raw = raw.map(lambda v: parse_percentage(v) if isinstance(v, str) else v)
+        values = pd.to_numeric(raw, errors="coerce")
+        present = (raw.astype("string").str.strip().fillna("") != "").to_numpy(bool)
+        reject(present & values.isna(), f"'{field}' no es numérico")
+        reject(values.notna() & ((values < low) | (values > high) | (values % 1 != 0)), f"'{field}' fuera de rango")
+        df = df.assign(**{field: values})
+
+    if "es_local" in df.columns:
+        df = df.assign(es_local=df["es_local"].map(
+            lambda v: str(v).strip().lower() in ("true", "1", "si", "sí") if isinstance(v, str) else v
+        ))
+    return df.drop(index=list(reasons)), reasons
+
+def _documents_from_chunk(df):
+    """
+    Convierte el bloque válido en partidos. Los tipos ya los convirtió `validate_chunk`;
+    las celdas vacías se guardan como None (igual que la ingesta desde la API) en lugar
+    del 0 de `clean_and_format_dataframe`, que crearía la temporada 0 y sesgaría los
+    KPIs y los sketches de cuantiles.
+    """
+    from utils.dataframe_tools import dataframe_to_mongo
+
+    df = df.assign(fixture_id=df["fixture_id"].astype("int64"))
+    for field in REQUIRED_TEXT_FIELDS:
+        df[field] = df[field].astype(str)
+    documents = dataframe_to_mongo(df)
+    for document in documents:
+        for field, value in document.items():
+            if isinstance(value, float) and value != value: # NaN
+                document[field] = None
+            elif field in NUMERIC_RANGES and value is not None:
+                document[field] = int(value)
+        normalize_partido(document)
+    return canonicalize_matches(documents)
+
+def _json_value(value):
+    import pandas as pd
+
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError): # Listas u otros valores no escalares
+        pass
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item() # Tipos escalares de NumPy
+    return value
+
+def import_file(path, file_format=None, chunk_size=IMPORT_CHUNK_SIZE, column_map=None, rejected_path=None):
+    """
+    Importa los partidos del archivo por bloques. Las filas rechazadas se escriben en
+    `rejected_path` (por defecto "<archivo>.rejected.jsonl", solo si hay alguna).
+    Retorna {"rows", "new", "changed", "unchanged", "rejected", "chunks", "seconds",
+    "rows_per_s", "rejected_path"}, o None si no se pudo leer el archivo o falló
+    alguna escritura.
+    """
+    rejected_path = rejected_path or f"{path}.rejected.jsonl"
+    counts = {"rows": 0, "new": 0, "changed": 0, "unchanged": 0, "rejected": 0, "chunks": 0}
+    started = time.perf_counter()
+    failed = False
+    rejected_file = None
+    try:
+        for chunk in iter_file_chunks(path, file_format, chunk_size):
+            chunk_started = time.perf_counter()
+            # Número de fila de datos en el archivo (la primera es la 1)
+            chunk.index = range(counts["rows"] + 1, counts["rows"] + len(chunk) + 1)
+            counts["rows"] += len(chunk)
+            counts["chunks"] += 1
+
+            valid, reasons = validate_chunk(map_columns(chunk, column_map))
+            if reasons:
+                if rejected_file is None:
+                    rejected_file = open(rejected_path, "w", encoding="utf-8")
+                for index, reason in sorted(reasons.items()):
+                    row = {str(k): _json_value(v) for k, v in chunk.loc[index].items()}
+                    rejected_file.write(json.dumps({"row": int(index), "reason": reason, "data": row},
+                                                   ensure_ascii=False, default=str) + "\n")
+                counts["rejected"] += len(reasons)
+
+            if not valid.empty:
+                synced = sync_matches(_documents_from_chunk(valid))
+                if synced is None:
+                    failed = True
+                else:
+                    for key in ("new", "changed", "unchanged"):
+                        counts[key] += synced[key]
+            elapsed = time.perf_counter() - chunk_started
+            print(f"Bloque {counts['chunks']}: {len(chunk)} filas ({len(reasons)} rechazadas) "
+                  f"en {elapsed:.2f} s, {len(chunk) / elapsed if elapsed else 0:.0f} filas/s.")
+    except ImportError as e:
+        print(f"Falta una dependencia para leer {path}: {e}")
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Error al leer {path}: {e}")
+        return None
+    finally:
+        if rejected_file is not None:
+            rejected_file.close()
+
+    seconds = time.perf_counter() - started
+    summary = {**counts, "seconds": round(seconds, 3),
+               "rows_per_s": round(counts["rows"] / seconds) if seconds else None,
+               "rejected_path": rejected_path if counts["rejected"] else None}
+    print(f"Importación de {path}: {counts['rows']} filas, {counts['new']} nuevas, {counts['changed']} modificadas, "
+          f"{counts['unchanged']} sin cambios, {counts['rejected']} rechazadas ({summary['rows_per_s']} filas/s).")
+    return None if failed else summary
+
+def parse_column_map(pairs):
+    """["origen=destino", ...] -> {"origen": "destino"}."""
+    column_map = {}
+    for pair in pairs or []:
+        source, _, target = pair.partition("=")
+        if not target or target not in partido_schema:
+            raise ValueError(f"Mapeo inválido '{pair}' (use columna=campo_del_esquema)")
+        column_map[source.strip()] = target
+    return column_map
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importa partidos desde CSV, JSON Lines o Parquet")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())))
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--map", nargs="+", metavar="COLUMNA=CAMPO", help="Columnas con otros nombres")
+    parser.add_argument("--rejected", help="Archivo de filas rechazadas")
+    args = parser.parse_args()
+    import_file(args.path, args.format, args.chunk_size, parse_column_map(args.map), args.rejected)
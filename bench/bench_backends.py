@@ -0,0 +1,119 @@
+# bench/bench_backends.py
+
+# Compara los backends de almacenamiento (ver db/storage.py) con las consultas que
+# hace el dashboard: todos los partidos, por liga, por equipo ($or), por rango de
+# fechas, liga + fechas y los valores distintos para los desplegables.
+# Usa datos sintéticos en una colección aparte ("bench_partidos") que se borra al final.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m bench.bench_backends                       # solo SQLite (archivo temporal)
+#   python -m bench.bench_backends --backends sqlite mongo --rows 50000
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db.mongo_config import is_configured
+from db.queries import build_match_query
+from db.storage import MongoBackend, SQLiteBackend
+
+BENCH_COLLECTION = "bench_partidos"
+LEAGUES = ["Premier League", "La Liga", "Serie A", "Bundesliga", "Ligue 1", "Eredivisie"]
+
+def make_matches(rows, teams_per_league=20, seed=42):
+    """Genera `rows` partidos sintéticos con la forma de `partido_schema`."""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    matches = []
+    for i in range(rows):
+        liga = rng.choice(LEAGUES)
+        local, visitante = rng.sample(range(teams_per_league), 2)
+        goles_local, goles_visitante = rng.randint(0, 5), rng.randint(0, 5)
+        matches.append({
+            "fixture_id": 1_000_000 + i,
+            "fecha": start + timedelta(hours=rng.randint(0, 5 * 365 * 24)),
+            "equipo_local": f"{liga} Equipo {local}",
+            "equipo_visitante": f"{liga} Equipo {visitante}",
+            "goles_local": goles_local,
+            "goles_visitante": goles_visitante,
+            "posesion_local": rng.randint(30, 70),
+            "liga": liga,
+            "temporada": 2020 + i % 5,
+        })
+    return matches
+
+def query_shapes():
+    """Consultas del dashboard, construidas con `build_match_query` como en la UI."""
+    return {
+        "todos": build_match_query({}),
+        "por liga": build_match_query({"league": "La Liga"}),
+        "por equipo": build_match_query({"team": "La Liga Equipo 3"}),
+        "rango de fechas": build_match_query({"start_date": datetime(2023, 1, 1), "end_date": datetime(2023, 3, 31)}),
+        "liga + fechas": build_match_query({"league": "Serie A", "start_date": datetime(2022, 1, 1),
+                                            "end_date": datetime(2022, 12, 31)}),
+    }
+
+def _timed(function, runs):
+    """Ejecuta `function` `runs` veces sin su salida por consola. Retorna (mediana_ms, resultado)."""
+    timings = []
+    result = None
+    for _ in range(runs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            result = function()
+            timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings), result
+
+def bench_backend(backend, matches, runs=5):
+    """Carga `matches` en `backend`, mide cada consulta y limpia. Retorna {consulta: (ms, filas)}."""
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.delete_many_documents({}, BENCH_COLLECTION)
+        backend.ensure_indexes(BENCH_COLLECTION)
+    try:
+        ms, _ = _timed(lambda: backend.insert_documents(matches, BENCH_COLLECTION), 1)
+        results["inserción"] = (ms, len(matches))
+        for name, query in query_shapes().items():
+            ms, documents = _timed(lambda: backend.find_documents(query, BENCH_COLLECTION), runs)
+            results[name] = (ms, len(documents))
+        ms, values = _timed(lambda: [backend.distinct(field, collection_name=BENCH_COLLECTION)
+                                     for field in ("equipo_local", "equipo_visitante", "liga")], runs)
+        results["distintos"] = (ms, sum(len(v) for v in values))
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            backend.delete_many_documents({}, BENCH_COLLECTION)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de backends de almacenamiento")
+    parser.add_argument("--backends", nargs="+", default=["sqlite"], choices=["sqlite", "mongo"])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    matches = make_matches(args.rows)
+    all_results = {}
+    for name in args.backends:
+        if name == "mongo":
+            if not is_configured():
+                print("mongo: MONGO_URI no está configurada, se omite.")
+                continue
+            all_results[name] = bench_backend(MongoBackend(), matches, args.runs)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                backend = SQLiteBackend(os.path.join(tmp, "bench.db"))
+                try:
+                    all_results[name] = bench_backend(backend, matches, args.runs)
+                finally:
+                    backend.close()
+
+    for name, results in all_results.items():
+        print(f"\n== {name} ({args.rows} partidos) ==")
+        for query, (ms, count) in results.items():
+            print(f"{query:<16} {ms:>9.1f} ms   {count:>7} filas")
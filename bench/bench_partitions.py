@@ -0,0 +1,102 @@
+# bench/bench_partitions.py
+
+# Compara la colección única con el particionado por temporada (ver db/partitions.py)
+# en consultas acotadas a una o dos temporadas, que son las habituales del dashboard,
+# y en una consulta sin filtros (el peor caso del particionado: recorre todas las
+# particiones). Usa los mismos datos sintéticos que bench_backends, con la temporada
+# derivada de la fecha (agosto a julio), en la colección aparte "bench_partidos".
+#
+# Uso (desde la raíz del proyecto):
+#   python -m bench.bench_partitions                        # SQLite (archivo temporal)
+#   python -m bench.bench_partitions --backends sqlite mongo --rows 100000
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+from datetime import datetime
+
+from bench.bench_backends import BENCH_COLLECTION, _timed, make_matches
+from db.mongo_config import is_configured
+from db.partitions import PARTITIONS_COLLECTION, PartitionedBackend
+from db.queries import build_match_query
+from db.storage import MongoBackend, SQLiteBackend
+
+def season_of(fecha):
+    """Temporada europea (agosto a julio): 2023-10-01 -> 2023, 2024-03-01 -> 2023."""
+    return fecha.year if fecha.month >= 8 else fecha.year - 1
+
+def make_season_matches(rows):
+    matches = make_matches(rows)
+    for match in matches:
+        match["temporada"] = season_of(match["fecha"])
+    return matches
+
+def query_shapes():
+    return {
+        "una temporada": {"temporada": 2022},
+        "liga + temporada": {"temporada": 2023, "liga": "La Liga"},
+        "rango en 1 temporada": build_match_query({"start_date": datetime(2023, 1, 1), "end_date": datetime(2023, 3, 31)}),
+        "rango en 2 temporadas": build_match_query({"start_date": datetime(2022, 5, 1), "end_date": datetime(2022, 9, 30)}),
+        "equipo + rango": build_match_query({"team": "La Liga Equipo 3", "start_date": datetime(2021, 9, 1),
+                                             "end_date": datetime(2022, 6, 30)}),
+        "todos": {},
+    }
+
+def _cleanup(backend):
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.delete_many_documents({}, BENCH_COLLECTION)
+        inner = getattr(backend, "inner", backend)
+        inner.delete_many_documents({"collection": BENCH_COLLECTION}, PARTITIONS_COLLECTION)
+
+def bench_layout(backend, matches, runs=5):
+    """Carga `matches`, mide cada consulta y limpia. Retorna {consulta: (ms, filas)}."""
+    results = {}
+    _cleanup(backend)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            backend.insert_documents(matches, BENCH_COLLECTION)
+            backend.ensure_indexes(BENCH_COLLECTION)
+        for name, query in query_shapes().items():
+            ms, documents = _timed(lambda: backend.find_documents(query, BENCH_COLLECTION), runs)
+            results[name] = (ms, len(documents))
+    finally:
+        _cleanup(backend)
+    return results
+
+def bench_backend(inner, matches, runs=5):
+    """Retorna {"única": resultados, "particionada": resultados} sobre el mismo backend."""
+    return {
+        "única": bench_layout(inner, matches, runs),
+        "particionada": bench_layout(PartitionedBackend(inner, collections=(BENCH_COLLECTION,)), matches, runs),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del particionado por temporada")
+    parser.add_argument("--backends", nargs="+", default=["sqlite"], choices=["sqlite", "mongo"])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    matches = make_season_matches(args.rows)
+    for name in args.backends:
+        if name == "mongo":
+            if not is_configured():
+                print("mongo: MONGO_URI no está configurada, se omite.")
+                continue
+            layouts = bench_backend(MongoBackend(), matches, args.runs)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                backend = SQLiteBackend(os.path.join(tmp, "bench.db"))
+                try:
+                    layouts = bench_backend(backend, matches, args.runs)
+                finally:
+                    backend.close()
+
+        print(f"\n== {name} ({args.rows} partidos) ==")
+        print(f"{'consulta':<22} {'única':>10} {'particionada':>13} {'filas':>8}")
+        for query, (single_ms, count) in layouts["única"].items():
+            partitioned_ms, partitioned_count = layouts["particionada"][query]
+            check = "" if count == partitioned_count else f"  (¡{partitioned_count} filas!)"
+            print(f"{query:<22} {single_ms:>8.1f} ms {partitioned_ms:>10.1f} ms {count:>8}{check}")
@@ -0,0 +1,196 @@
+# bench/bench_quantiles.py
+
+# Compara los percentiles de los sketches KLL (db/sketches.py, utils/quantile_sketch.py)
+# con los exactos de pandas sobre los mismos valores de remates, posesión y tarjetas:
+#   - precisión: error (en puntos de percentil) del percentil de valores de prueba y
+#     error de rango de los cuantiles 5 %..95 %, por liga + temporada y por liga
+#     (sketches de todas las temporadas combinados), también tras editar un 10 % de
+#     los partidos (valores descontados en el sketch `removed`);
+#   - velocidad: construir los sketches y responder un percentil, frente a filtrar la
+#     serie y calcular el percentil o el cuantil exacto con pandas en cada consulta.
+# Los datos son sintéticos (misma forma que bench_backends) y no se escriben en la base.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m bench.bench_quantiles --rows 100000
+
+import argparse
+import random
+import statistics
+import time
+
+from bench.bench_backends import make_matches
+from db.sketches import SKETCH_METRICS, Distribution
+
+QUANTILES = [q / 20 for q in range(1, 20)]
+EDITED_FRACTION = 0.1
+
+def make_stat_matches(rows, seed=7):
+    """Partidos sintéticos con remates, posesión y tarjetas de ambos equipos."""
+    rng = random.Random(seed)
+    matches = make_matches(rows)
+    for match in matches:
+        posesion = min(max(int(rng.gauss(50, 9)), 25), 75)
+        match.update({
+            "posesion_local": posesion,
+            "posesion_visitante": 100 - posesion,
+            "remates_local": max(int(rng.gauss(13, 4.5)), 0),
+            "remates_visitante": max(int(rng.gauss(11, 4)), 0),
+            "tarjetas_amarillas_local": min(int(rng.expovariate(1 / 1.8)), 8),
+            "tarjetas_amarillas_visitante": min(int(rng.expovariate(1 / 2.1)), 8),
+        })
+    return matches
+
+def to_frame(matches):
+    """Una fila por valor: liga, temporada, métrica y valor (como en los sketches)."""
+    import pandas as pd
+
+    records = [(match["liga"], match["temporada"], metric, match[field])
+               for match in matches for metric, fields in SKETCH_METRICS.items() for field in fields]
+    return pd.DataFrame.from_records(records, columns=["liga", "temporada", "metrica", "valor"])
+
+def build_distributions(matches, edited=()):
+    """
+    Sketches por (liga, temporada, métrica). Los partidos `edited` ({fixture_id: partido
+    nuevo}) entran con sus valores originales y después se reemplazan, como en una edición.
+    """
+    distributions = {}
+    for match in matches:
+        replaced = edited.get(match["fixture_id"]) if edited else None
+        for metric, fields in SKETCH_METRICS.items():
+            key = (match["liga"], match["temporada"], metric)
+            distribution = distributions.setdefault(key, Distribution())
+            for field in fields:
+                distribution.added.update(match[field])
+                if replaced is not None:
+                    distribution.removed.update(match[field])
+                    distribution.added.update(replaced[field])
+    return distributions
+
+def league_distributions(distributions):
+    """Combina las temporadas de cada liga (lo que hace `get_distributions` con temporada None)."""
+    merged = {}
+    for (liga, _, metric), distribution in distributions.items():
+        merged.setdefault((liga, None, metric), Distribution()).merge(distribution)
+    return merged
+
+def exact_percentile(values, value):
+    """Percentil exacto con la misma definición que `Distribution.percentile` (rango medio)."""
+    return 100 * ((values < value).sum() + (values <= value).sum()) / 2 / len(values)
+
+def accuracy(frame, distributions):
+    """Retorna (error máx. de percentil, error medio de percentil, error máx. de rango de cuantiles)."""
+    leagues = league_distributions(distributions)
+    percentile_errors, rank_errors = [], []
+    for (liga, temporada, metric), series in frame.groupby(["liga", "temporada", "metrica"])["valor"]:
+        percentile_errors.extend(_group_errors(series, distributions[(liga, temporada, metric)], rank_errors))
+    for (liga, metric), series in frame.groupby(["liga", "metrica"])["valor"]:
+        percentile_errors.extend(_group_errors(series, leagues[(liga, None, metric)], rank_errors))
+    return max(percentile_errors), statistics.mean(percentile_errors), max(rank_errors)
+
+def _group_errors(series, distribution, rank_errors):
+    values = series.to_numpy()
+    errors = []
+    for value in series.quantile(QUANTILES, interpolation="nearest").unique():
+        errors.append(abs(distribution.percentile(value) - exact_percentile(values, value)))
+    for q in QUANTILES:
+        estimate = distribution.quantile(q)
+        # Error de rango: distancia entre q y el rango exacto del valor estimado
+        below, at_or_below = (values < estimate).mean(), (values <= estimate).mean()
+        rank_errors.append(100 * max(below - q, q - at_or_below, 0))
+    return errors
+
+def _timed(function, runs):
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings), result
+
+def speed(frame, matches, runs=5, queries=200):
+    """Tiempos en ms: construcción de los sketches y `queries` consultas con cada método."""
+    rng = random.Random(1)
+    keys = sorted({(liga, temporada, metric) for liga, temporada, metric in
+                   frame[["liga", "temporada", "metrica"]].drop_duplicates().itertuples(index=False)})
+    probes = [(rng.choice(keys), rng.randint(0, 30)) for _ in range(queries)]
+
+    build_ms, distributions = _timed(lambda: build_distributions(matches), 1)
+    leagues = league_distributions(distributions)
+
+    def sketch_season():
+        return [distributions[key].percentile(value) for key, value in probes]
+
+    def sketch_league():
+        return [leagues[(key[0], None, key[2])].percentile(value) for key, value in probes]
+
+    def pandas_percentile(by_season):
+        results = []
+        for (liga, temporada, metric), value in probes:
+            mask = (frame["liga"] == liga) & (frame["metrica"] == metric)
+            if by_season:
+                mask &= frame["temporada"] == temporada
+            results.append(exact_percentile(frame.loc[mask, "valor"].to_numpy(), value))
+        return results
+
+    def pandas_quantile():
+        return [frame.loc[(frame["liga"] == liga) & (frame["temporada"] == temporada) & (frame["metrica"] == metric),
+                          "valor"].quantile(0.9) for (liga, temporada, metric), _ in probes]
+
+    def sketch_quantile():
+        return [distributions[key].quantile(0.9) for key, _ in probes]
+
+    return {
+        "construir sketches": build_ms,
+        "percentil liga+temporada (sketch)": _timed(sketch_season, runs)[0],
+        "percentil liga+temporada (pandas)": _timed(lambda: pandas_percentile(True), runs)[0],
+        "percentil liga (sketch)": _timed(sketch_league, runs)[0],
+        "percentil liga (pandas)": _timed(lambda: pandas_percentile(False), runs)[0],
+        "cuantil 0.9 (sketch)": _timed(sketch_quantile, runs)[0],
+        "cuantil 0.9 (pandas)": _timed(pandas_quantile, runs)[0],
+    }
+
+def edited_matches(matches, fraction=EDITED_FRACTION, seed=3):
+    """{fixture_id: partido editado} para una fracción de los partidos (valores nuevos)."""
+    rng = random.Random(seed)
+    edited = {}
+    for match in rng.sample(matches, int(len(matches) * fraction)):
+        replaced = dict(match)
+        for fields in SKETCH_METRICS.values():
+            for field in fields:
+                replaced[field] = max(match[field] + rng.randint(-3, 3), 0)
+        edited[match["fixture_id"]] = replaced
+    return edited
+
+def run(rows, runs=5, queries=200):
+    """Retorna {"precision": {...}, "precision_con_ediciones": {...}, "ms": {...}}."""
+    matches = make_stat_matches(rows)
+    frame = to_frame(matches)
+    edited = edited_matches(matches)
+    edited_frame = to_frame([edited.get(match["fixture_id"], match) for match in matches])
+
+    def summary(errors):
+        max_error, mean_error, max_rank_error = errors
+        return {"percentil_err_max": max_error, "percentil_err_medio": mean_error, "cuantil_err_rango_max": max_rank_error}
+
+    return {
+        "precision": summary(accuracy(frame, build_distributions(matches))),
+        "precision_con_ediciones": summary(accuracy(edited_frame, build_distributions(matches, edited))),
+        "ms": speed(frame, matches, runs, queries),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de sketches de cuantiles frente a pandas")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.runs, args.queries)
+    print(f"\n== Precisión ({args.rows} partidos, puntos de percentil) ==")
+    for name in ("precision", "precision_con_ediciones"):
+        errors = results[name]
+        print(f"{name:<24} percentil: máx {errors['percentil_err_max']:.2f}, medio {errors['percentil_err_medio']:.2f}"
+              f" · cuantiles: error de rango máx {errors['cuantil_err_rango_max']:.2f}")
+    print(f"\n== Velocidad ({args.queries} consultas) ==")
+    for name, ms in results["ms"].items():
+        print(f"{name:<36} {ms:>9.1f} ms")
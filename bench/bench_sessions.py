@@ -0,0 +1,174 @@
+# bench/bench_sessions.py
+
+# Prueba de carga local del modo web (varias sesiones en el mismo proceso, ver
+# db/sessions.py). Simula N pestañas del navegador en hilos concurrentes; cada sesión
+# repite las lecturas y escrituras que hace su Dashboard en cada acción:
+#   - "abrir":   consulta de la tabla, KPIs y valores de los desplegables;
+#   - "filtrar": lo mismo con un filtro de liga o equipo al azar;
+#   - "kpis":    recálculo de los KPIs de la consulta activa (tras una escritura);
+#   - "editar":  edición de un partido en la cola de escrituras diferidas compartida.
+# Con pandas instalado, "abrir" y "filtrar" incluyen también la conversión a DataFrame,
+# que cada sesión hace por su cuenta. La interfaz (Flet) no interviene.
+#
+# Se comparan dos configuraciones: "compartido" (cachés de lectura compartidas entre
+# sesiones, como en la aplicación) y "por sesión" (cada sesión consulta por su cuenta,
+# como antes). Se informa la latencia p50/p99 de cada acción.
+#
+# Usa SQLite en un archivo temporal con datos sintéticos (no toca la base configurada).
+#
+# Uso (desde la raíz del proyecto):
+#   python -m bench.bench_sessions --sessions 20 --actions 30
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from bench.bench_backends import LEAGUES, make_matches
+from db.queries import (build_match_query, find_documents, find_documents_cached, get_match_summary,
+                        get_unique_leagues, get_unique_teams, insert_documents, invalidate_read_caches)
+from db.sessions import get_session_registry
+from db.storage import SQLiteBackend, get_backend, set_backend
+from db.write_queue import WriteBehindQueue
+
+# Peso de cada acción en el guion de una sesión
+ACTION_WEIGHTS = {"abrir": 1, "filtrar": 4, "kpis": 3, "editar": 2}
+
+def _to_dataframe(documents):
+    """Conversión que hace cada Dashboard al cargar (si pandas está instalado)."""
+    try:
+        from utils.dataframe_tools import clean_and_format_dataframe, mongo_to_dataframe
+    except ImportError:
+        return None
+    return clean_and_format_dataframe(mongo_to_dataframe(documents))
+
+class SimulatedSession:
+    """Una pestaña del navegador: su propio estado (consulta activa) y las lecturas de su Dashboard."""
+
+    def __init__(self, session_id, shared, write_queue, match_ids, teams, seed):
+        self.session_id = session_id
+        self.shared = shared
+        self.write_queue = write_queue
+        self.match_ids = match_ids
+        self.teams = teams
+        self.rng = random.Random(seed)
+        self.current_query = {}
+
+    def _load(self, filters):
+        query = build_match_query(filters)
+        if self.shared:
+            documents = find_documents_cached(query)
+            get_match_summary(query)
+            get_unique_teams(), get_unique_leagues()
+        else:
+            documents = find_documents(query)
+            get_match_summary(query, use_cache=False)
+            backend = get_backend()
+            backend.distinct("equipo_local"), backend.distinct("equipo_visitante"), backend.distinct("liga")
+        _to_dataframe(documents)
+        self.current_query = query
+
+    def abrir(self):
+        self._load(None)
+
+    def filtrar(self):
+        if self.rng.random() < 0.5:
+            self._load({"league": self.rng.choice(LEAGUES)})
+        else:
+            self._load({"team": self.rng.choice(self.teams)})
+
+    def kpis(self):
+        get_match_summary(self.current_query, use_cache=self.shared)
+
+    def editar(self):
+        self.write_queue.enqueue(self.rng.choice(self.match_ids), {"goles_local": self.rng.randint(0, 5)})
+
+    def run(self, actions, think_ms, latencies, lock):
+        registry = get_session_registry()
+        registry.open(self.session_id, simulated=True)
+        try:
+            names = list(ACTION_WEIGHTS)
+            script = ["abrir"] + self.rng.choices(names, weights=list(ACTION_WEIGHTS.values()), k=actions - 1)
+            for name in script:
+                time.sleep(self.rng.uniform(0, think_ms) / 1000)
+                t0 = time.perf_counter()
+                getattr(self, name)()
+                elapsed = (time.perf_counter() - t0) * 1000
+                with lock:
+                    latencies.setdefault(name, []).append(elapsed)
+        finally:
+            registry.close(self.session_id)
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def run_sessions(sessions, actions, think_ms, shared, match_ids, teams, queue_path):
+    """Ejecuta `sessions` sesiones concurrentes. Retorna {acción: {"n", "p50_ms", "p99_ms"}}."""
+    invalidate_read_caches(None)
+    write_queue = WriteBehindQueue(path=queue_path).start()
+    latencies, lock = {}, threading.Lock()
+    threads = [
+        threading.Thread(target=SimulatedSession(f"bench-{i}", shared, write_queue, match_ids, teams, seed=i).run,
+                         args=(actions, think_ms, latencies, lock), daemon=True)
+        for i in range(sessions)
+    ]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        write_queue.stop()
+    elapsed = time.perf_counter() - started
+
+    results = {name: {"n": len(values), "p50_ms": statistics.median(values), "p99_ms": percentile(values, 0.99)}
+               for name, values in latencies.items()}
+    every = [value for values in latencies.values() for value in values]
+    results["total"] = {"n": len(every), "p50_ms": statistics.median(every), "p99_ms": percentile(every, 0.99),
+                        "actions_per_s": len(every) / elapsed}
+    return results
+
+def run(sessions=20, actions=30, rows=20000, think_ms=50):
+    """Carga `rows` partidos sintéticos y compara ambas configuraciones. Retorna {config: resultados}."""
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, "bench.db"))
+        previous = set_backend(backend)
+        try:
+            matches = make_matches(rows)
+            with contextlib.redirect_stdout(io.StringIO()):
+                match_ids = [str(i) for i in insert_documents(matches)]
+                backend.ensure_indexes()
+            teams = sorted({match["equipo_local"] for match in matches})
+            queue_path = os.path.join(tmp, "write_queue.json")
+            results = {
+                config: run_sessions(sessions, actions, think_ms, config == "compartido", match_ids, teams, queue_path)
+                for config in ("por sesión", "compartido")
+            }
+            results["sesiones_abiertas_al_final"] = get_session_registry().active()
+            return results
+        finally:
+            set_backend(previous)
+            invalidate_read_caches(None)
+            backend.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga con sesiones concurrentes")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--actions", type=int, default=30, help="Acciones por sesión")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--think-ms", type=float, default=50, help="Pausa máxima entre acciones")
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.actions, args.rows, args.think_ms)
+    for config in ("por sesión", "compartido"):
+        print(f"\n== {config}: {args.sessions} sesiones x {args.actions} acciones ({args.rows} partidos) ==")
+        print(f"{'acción':<10} {'n':>6} {'p50':>10} {'p99':>10}")
+        for name, stats in results[config].items():
+            print(f"{name:<10} {stats['n']:>6} {stats['p50_ms']:>7.1f} ms {stats['p99_ms']:>7.1f} ms")
+        print(f"{results[config]['total']['actions_per_s']:.0f} acciones/s")
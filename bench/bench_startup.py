@@ -0,0 +1,79 @@
+# bench/bench_startup.py
+
+# Mide el tiempo de arranque (import en frío) de los módulos de la aplicación y lo
+# compara con un presupuesto. Cada medición se hace en un proceso nuevo para que
+# no haya módulos ya cargados en caché.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m bench.bench_startup
+#   STARTUP_BUDGET_MS=400 python -m bench.bench_startup --runs 7
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos a medir y presupuesto de arranque en milisegundos para cada uno
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "500"))
+MODULES = ["db.queries", "cli", "ui.dashboard", "main"]
+
+# Módulos pesados que no deberían cargarse solo por abrir la ventana
+HEAVY_MODULES = ["pandas", "requests", "api.fetch_matches", "utils.dataframe_tools", "pymongo"]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - t0) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure_import(module, runs=5):
+    """
+    Importa `module` en `runs` procesos nuevos.
+    Retorna un diccionario con la mediana, el mínimo y los módulos pesados cargados.
+    """
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(data["ms"])
+        loaded = data["loaded"]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "heavy_loaded": loaded,
+    }
+
+def run(runs=5, budget_ms=STARTUP_BUDGET_MS):
+    """Ejecuta el benchmark de arranque. Retorna (resultados, dentro_del_presupuesto)."""
+    results = [measure_import(module, runs) for module in MODULES]
+    within_budget = all("error" not in r and r["median_ms"] <= budget_ms for r in results)
+    return results, within_budget
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo de arranque")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    results, ok = run(args.runs, args.budget_ms)
+    for r in results:
+        if "error" in r:
+            print(f"{r['module']:<15} ERROR: {r['error']}")
+        else:
+            print(f"{r['module']:<15} mediana {r['median_ms']:>8.1f} ms   min {r['min_ms']:>8.1f} ms   "
+                  f"pesados cargados: {', '.join(r['heavy_loaded']) or '-'}")
+    print(f"Presupuesto: {args.budget_ms:.0f} ms -> {'OK' if ok else 'EXCEDIDO'}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,81 @@
+# bench/bench_table_build.py
+
+# Compara el recorrido de datos al construir la tabla del dashboard:
+#   - "iterrows": el constructor anterior, que recorría el DataFrame con `iterrows`
+#     (una Series por fila) y guardaba en el botón de edición de cada fila una copia
+#     de la fila (`row.to_dict()`) y en cada columna una referencia al DataFrame.
+#   - "frame_store": el constructor actual, que recorre el almacén compartido
+#     (utils/frame_store.py) con `itertuples` y en cada fila solo guarda el `_id`;
+#     la fila se materializa al abrir el popup.
+# La creación de los controles de Flet es igual en ambos casos y no se incluye.
+# Se mide el tiempo y la memoria retenida (tracemalloc) por los callbacks de las filas.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m bench.bench_table_build --rows 20000
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+import tracemalloc
+
+from bench.bench_backends import make_matches
+from utils.dataframe_tools import clean_and_format_dataframe, mongo_to_dataframe
+from utils.frame_store import FrameStore
+
+HIDDEN_COLUMNS = ("_id", "updated_at")
+
+def build_with_iterrows(df):
+    """Recorrido anterior. Retorna (celdas, callbacks por fila, callbacks por columna)."""
+    columns = [col for col in df.columns if col not in HIDDEN_COLUMNS]
+    on_sort = [lambda e, col_name=col, data=df: (col_name, data) for col in columns]
+    cells, callbacks = [], []
+    for index, row in df.iterrows():
+        cells.append([str(row[col]) for col in columns])
+        callbacks.append(lambda e, data=row.to_dict(): data)
+    return cells, callbacks, on_sort
+
+def build_with_frame_store(df):
+    """Recorrido actual. Retorna (celdas, callbacks por fila, almacén)."""
+    store = FrameStore(df)
+    columns = [col for col in store.columns if col not in HIDDEN_COLUMNS]
+    cells, callbacks = [], []
+    for row_id, *values in store.iter_values(columns):
+        cells.append([str(value) for value in values])
+        callbacks.append(lambda e, id=row_id: store.row(id))
+    return cells, callbacks, store
+
+def measure(builder, df, runs):
+    """Retorna (mediana_ms, KiB retenidos por el resultado)."""
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        builder(df)
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = builder(df)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return statistics.median(timings), retained / 1024
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de construcción de la tabla")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = clean_and_format_dataframe(mongo_to_dataframe(
+            [dict(m, _id=f"{i:024x}") for i, m in enumerate(make_matches(args.rows))]
+        ))
+
+    results = {name: measure(builder, df, args.runs)
+               for name, builder in [("iterrows", build_with_iterrows), ("frame_store", build_with_frame_store)]}
+    for name, (ms, kib) in results.items():
+        print(f"{name:<12} {ms:>9.1f} ms   {kib:>10.0f} KiB retenidos")
+    (old_ms, old_kib), (new_ms, new_kib) = results["iterrows"], results["frame_store"]
+    print(f"Mejora: {old_ms / new_ms:.1f}x más rápido, {old_kib / max(new_kib, 1):.1f}x menos memoria")
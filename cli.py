@@ -0,0 +1,291 @@
+# cli.py
+
+# Punto de entrada por línea de comandos para tareas programadas (cron, schedulers),
+# sin cargar la interfaz (Flet). Cada subcomando importa solo los módulos de datos
+# que necesita, y al terminar escribe en stdout una sola línea JSON con el resumen
+# de la ejecución; los mensajes informativos de los módulos van a stderr.
+#
+# Uso (desde la raíz del proyecto):
+#   python -m cli ingest --date 2025-07-10 --league 39 --season 2024
+#   python -m cli ingest --leagues 39 140 --seasons 2023 2024 --workers 4
+#   python -m cli ingest --dummy 20
+#   python -m cli sync --days 3
+#   python -m cli enrich
+#   python -m cli export --out partidos.csv --league "Premier League" --from 2025-01-01
+#   python -m cli import-file historico.parquet --chunk-size 20000 --map home=equipo_local
+#   python -m cli migrate [--list] [--target 0002]
+#   python -m cli sketches --rebuild
+#   python -m cli sketches --metric remates --league "La Liga" --season 2024 --value 18
+#   python -m cli bench startup|backends|partitions|quantiles|sessions
+#   python -m cli ensure-indexes
+#
+# Código de salida: 0 si la ejecución fue correcta, 1 si falló.
+
+import argparse
+import contextlib
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+def cmd_ingest(args):
+    """Descarga partidos de API-Football (o genera datos de prueba) y los guarda."""
+    if args.dummy:
+        from api.fetch_matches import simulate_fetch_and_store_dummy_data
+        counts = simulate_fetch_and_store_dummy_data(num_matches=args.dummy)
+        return {"ok": counts is not None, **(counts or {})}
+    if args.leagues or args.seasons:
+        if not (args.leagues and args.seasons):
+            raise ValueError("--leagues y --seasons deben indicarse juntos")
+        from api.backfill import run_backfill
+        summary = run_backfill(args.leagues, args.seasons, args.date_from, args.date_to,
+                               args.window_days, args.workers, args.job)
+        return {"ok": not summary["failed_units"], **summary}
+
+    from api.fetch_matches import fetch_and_store_matches_from_api
+    counts = fetch_and_store_matches_from_api(
+        date_str=args.date, league_id=args.league, season=args.season,
+        date_from=args.date_from, date_to=args.date_to
+    )
+    return {"ok": counts is not None, **(counts or {})}
+
+def cmd_sync(args):
+    """Actualiza desde la API los partidos guardados de los últimos `--days` días."""
+    from api.fetch_matches import refresh_stored_matches
+    from utils.date_tools import start_of_day, to_utc_datetime
+
+    since = start_of_day(to_utc_datetime(datetime.now(timezone.utc)) - timedelta(days=args.days))
+    result = refresh_stored_matches({"fecha": {"$gte": since}})
+    return {"ok": result["new"] is not None, "since": since.isoformat(), **result}
+
+def cmd_events(args):
+    """Descarga los eventos (goles, tarjetas, cambios) de los partidos guardados."""
+    from api.fetch_events import ingest_events
+    from utils.date_tools import start_of_day, to_utc_datetime
+
+    query = None
+    if not args.all:
+        since = start_of_day(to_utc_datetime(datetime.now(timezone.utc)) - timedelta(days=args.days))
+        query = {"fecha": {"$gte": since}}
+    result = ingest_events(query, refresh=args.refresh)
+    return {"ok": result["stored"] is not None, **result}
+
+def cmd_enrich(args):
+    """Re-canonicaliza los nombres de equipo de los partidos guardados."""
+    from db.team_registry import get_team_registry, recanonicalize_existing
+
+    if args.seed:
+        get_team_registry().seed()
+    updated = recanonicalize_existing(batch_size=args.batch_size)
+    return {"ok": True, "updated": updated}
+
+def cmd_export(args):
+    """Exporta los partidos que cumplen los filtros a CSV o JSON Lines."""
+    from db.queries import build_match_query, find_documents
+    from utils.dataframe_tools import clean_and_format_dataframe, mongo_to_dataframe
+    from utils.date_tools import end_of_day, start_of_day
+
+    filters = {}
+    if args.date_from:
+        filters["start_date"] = start_of_day(args.date_from)
+    if args.date_to:
+        filters["end_date"] = end_of_day(args.date_to)
+    if args.team:
+        filters["team"] = args.team
+    if args.league:
+        filters["league"] = args.league
+
+    df = clean_and_format_dataframe(mongo_to_dataframe(find_documents(build_match_query(filters))))
+    df = df.drop(columns=[c for c in ("_id", "updated_at") if c in df.columns])
+    if args.format == "jsonl":
+        df.to_json(args.out, orient="records", lines=True, date_format="iso", force_ascii=False)
+    else:
+        df.to_csv(args.out, index=False, encoding="utf-8")
+    return {"ok": True, "rows": len(df), "path": args.out, "format": args.format}
+
+def cmd_import_file(args):
+    """Importa partidos desde un archivo CSV, JSON Lines o Parquet, por bloques."""
+    from api.file_import import import_file, parse_column_map
+
+    summary = import_file(args.path, args.format, args.chunk_size, parse_column_map(args.map), args.rejected)
+    return {"ok": summary is not None, **(summary or {})}
+
+def cmd_migrate(args):
+    """Muestra o aplica las migraciones de esquema."""
+    from db.migrations import MigrationRunner
+
+    runner = MigrationRunner(batch_size=args.batch_size, ops_per_second=args.ops_per_second)
+    if args.list:
+        return {"ok": True, "migrations": [
+            {"version": v, "description": d, "status": s, "processed": p} for v, d, s, p in runner.status()
+        ]}
+    applied = runner.run(args.target)
+    pending = [m.version for m in runner.pending()
+               if args.target is None or m.version <= args.target]
+    return {"ok": not pending, "applied": applied, "pending": pending}
+
+def cmd_partition(args):
+    """Migra los partidos a colecciones por temporada o muestra el catálogo de particiones."""
+    from db.partitions import get_partitioned_backend, migrate_to_partitions
+
+    backend = get_partitioned_backend()
+    moved = migrate_to_partitions(backend, batch_size=args.batch_size) if args.migrate else {}
+    catalog = backend.catalog("partidos", refresh=True)
+    return {"ok": moved is not None, "moved": moved, "partitions": sorted(catalog)}
+
+def cmd_sketches(args):
+    """Reconstruye los sketches de cuantiles o consulta percentiles y cuantiles de una métrica."""
+    from db.sketches import get_distribution, rebuild_sketches
+
+    result = {"ok": True}
+    if args.rebuild:
+        result["sketches"] = rebuild_sketches()
+        result["ok"] = result["sketches"] is not None
+    if args.metric and args.league:
+        distribution = get_distribution(args.metric, args.league, args.season)
+        result.update({
+            "metric": args.metric, "league": args.league, "season": args.season, "values": distribution.n,
+            "quantiles": {str(q): distribution.quantile(q) for q in args.quantiles},
+        })
+        if args.value is not None:
+            result["percentile"] = distribution.percentile(args.value)
+    elif not args.rebuild:
+        raise ValueError("Indica --rebuild o --metric y --league")
+    return result
+
+def cmd_bench(args):
+    """Ejecuta un benchmark: arranque en frío, backends, particionado, cuantiles o sesiones concurrentes."""
+    if args.name == "startup":
+        from bench import bench_startup
+        results, within_budget = bench_startup.run(args.runs)
+        return {"ok": within_budget, "results": results}
+    if args.name == "partitions":
+        from bench import bench_partitions
+        layouts = bench_partitions.bench_backend(bench_partitions.SQLiteBackend(args.sqlite_path),
+                                                 bench_partitions.make_season_matches(args.rows), args.runs)
+        return {"ok": True, "backend": "sqlite", "rows": args.rows, "results": {
+            layout: {query: {"ms": round(ms, 1), "rows": count} for query, (ms, count) in results.items()}
+            for layout, results in layouts.items()
+        }}
+    if args.name == "sessions":
+        from bench import bench_sessions
+        return {"ok": True, "sessions": args.sessions, "rows": args.rows,
+                **bench_sessions.run(args.sessions, args.actions, args.rows)}
+    if args.name == "quantiles":
+        from bench import bench_quantiles
+        return {"ok": True, "rows": args.rows, **bench_quantiles.run(args.rows, args.runs)}
+
+    from bench import bench_backends
+    results = bench_backends.bench_backend(bench_backends.SQLiteBackend(args.sqlite_path),
+                                           bench_backends.make_matches(args.rows), args.runs)
+    return {"ok": True, "backend": "sqlite", "rows": args.rows,
+            "results": {query: {"ms": round(ms, 1), "rows": count} for query, (ms, count) in results.items()}}
+
+def cmd_ensure_indexes(args):
+    """Crea los índices de la colección de partidos."""
+    from db.queries import ensure_indexes
+
+    indexes = ensure_indexes()
+    return {"ok": bool(indexes), "indexes": indexes}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Tareas por lotes de futbol_stats_app")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest = subparsers.add_parser("ingest", help="Descarga y guarda partidos")
+    ingest.add_argument("--date", help="Fecha de los partidos (YYYY-MM-DD)")
+    ingest.add_argument("--league", type=int)
+    ingest.add_argument("--season", type=int)
+    ingest.add_argument("--from", dest="date_from", help="Inicio del rango (YYYY-MM-DD)")
+    ingest.add_argument("--to", dest="date_to", help="Fin del rango (YYYY-MM-DD)")
+    ingest.add_argument("--leagues", nargs="+", type=int, help="Backfill: varias ligas")
+    ingest.add_argument("--seasons", nargs="+", type=int, help="Backfill: varias temporadas")
+    ingest.add_argument("--window-days", type=int, default=30)
+    ingest.add_argument("--workers", type=int, default=4)
+    ingest.add_argument("--job", help="Nombre del job de backfill (para reanudar)")
+    ingest.add_argument("--dummy", type=int, metavar="N", help="Genera N partidos de prueba")
+    ingest.set_defaults(handler=cmd_ingest)
+
+    sync = subparsers.add_parser("sync", help="Actualiza desde la API los partidos recientes")
+    sync.add_argument("--days", type=int, default=3)
+    sync.set_defaults(handler=cmd_sync)
+
+    events = subparsers.add_parser("events", help="Descarga los eventos de los partidos guardados")
+    events.add_argument("--days", type=int, default=7)
+    events.add_argument("--all", action="store_true", help="Todos los partidos guardados")
+    events.add_argument("--refresh", action="store_true", help="Vuelve a descargar los que ya tienen eventos")
+    events.set_defaults(handler=cmd_events)
+
+    enrich = subparsers.add_parser("enrich", help="Re-canonicaliza los nombres de equipo")
+    enrich.add_argument("--seed", action="store_true", help="Carga antes los alias conocidos")
+    enrich.add_argument("--batch-size", type=int, default=1000)
+    enrich.set_defaults(handler=cmd_enrich)
+
+    export = subparsers.add_parser("export", help="Exporta partidos a un archivo")
+    export.add_argument("--out", default="partidos_futbol.csv")
+    export.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    export.add_argument("--from", dest="date_from")
+    export.add_argument("--to", dest="date_to")
+    export.add_argument("--team")
+    export.add_argument("--league")
+    export.set_defaults(handler=cmd_export)
+
+    import_file = subparsers.add_parser("import-file", help="Importa partidos desde CSV, JSON Lines o Parquet")
+    import_file.add_argument("path")
+    import_file.add_argument("--format", choices=["csv", "jsonl", "parquet"], help="Por defecto, según la extensión")
+    import_file.add_argument("--chunk-size", type=int, default=5000)
+    import_file.add_argument("--map", nargs="+", metavar="COLUMNA=CAMPO", help="Columnas con otros nombres")
+    import_file.add_argument("--rejected", help="Archivo de filas rechazadas (por defecto <archivo>.rejected.jsonl)")
+    import_file.set_defaults(handler=cmd_import_file)
+
+    migrate = subparsers.add_parser("migrate", help="Migraciones de esquema")
+    migrate.add_argument("--list", action="store_true")
+    migrate.add_argument("--target")
+    migrate.add_argument("--batch-size", type=int, default=500)
+    migrate.add_argument("--ops-per-second", type=float, default=None)
+    migrate.set_defaults(handler=cmd_migrate)
+
+    partition = subparsers.add_parser("partition", help="Particionado por temporada (PARTITION_BY_SEASON=1)")
+    partition.add_argument("--migrate", action="store_true", help="Mueve los partidos de la colección base a sus particiones")
+    partition.add_argument("--batch-size", type=int, default=1000)
+    partition.set_defaults(handler=cmd_partition)
+
+    sketches = subparsers.add_parser("sketches", help="Sketches de cuantiles (percentiles por liga y temporada)")
+    sketches.add_argument("--rebuild", action="store_true", help="Recalcula todos los sketches desde los partidos")
+    sketches.add_argument("--metric", choices=["remates", "posesion", "tarjetas_amarillas"])
+    sketches.add_argument("--league")
+    sketches.add_argument("--season", type=int, help="Sin temporada se combinan todas")
+    sketches.add_argument("--value", type=float, help="Valor del que se calcula el percentil")
+    sketches.add_argument("--quantiles", nargs="+", type=float, default=[0.1, 0.25, 0.5, 0.75, 0.9])
+    sketches.set_defaults(handler=cmd_sketches)
+
+    bench = subparsers.add_parser("bench", help="Benchmarks")
+    bench.add_argument("name", choices=["startup", "backends", "partitions", "quantiles", "sessions"])
+    bench.add_argument("--runs", type=int, default=5)
+    bench.add_argument("--rows", type=int, default=20000)
+    bench.add_argument("--sqlite-path", default=":memory:")
+    bench.add_argument("--sessions", type=int, default=20, help="sessions: sesiones concurrentes")
+    bench.add_argument("--actions", type=int, default=30, help="sessions: acciones por sesión")
+    bench.set_defaults(handler=cmd_bench)
+
+    indexes = subparsers.add_parser("ensure-indexes", help="Crea los índices de la colección de partidos")
+    indexes.set_defaults(handler=cmd_ensure_indexes)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    started = time.monotonic()
+    summary = {"command": args.command, "started_at": datetime.now(timezone.utc).isoformat()}
+    try:
+        # Los módulos de datos informan con print(); se desvían a stderr para que
+        # stdout contenga solo el resumen JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            summary.update(args.handler(args))
+    except Exception as e:
+        summary.update({"ok": False, "error": f"{type(e).__name__}: {e}"})
+    summary["duration_s"] = round(time.monotonic() - started, 3)
+    print(json.dumps(summary, ensure_ascii=False, default=str))
+    return 0 if summary.get("ok") else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+# db/change_feed.py
+
+# Suscripción a los cambios de la colección de partidos.
+# Usa un change stream de MongoDB (requiere replica set o Atlas) y, si el servidor
+# es standalone, recurre a sondear el campo `updated_at` que escriben
+# `insert_document` y `update_document`.
+#
+# Cada cambio se entrega al callback como un diccionario normalizado:
+#   {"op": "insert" | "update" | "delete", "_id": ObjectId, "doc": documento completo o None}
+#
+# Con varias sesiones en el mismo proceso (modo web) se usa un único ChangeFeed
+# compartido (`get_change_feed_hub`) que reparte los cambios entre las sesiones
+# suscritas y descarta las cachés de lectura compartidas (ver db/read_cache.py).
+
+import threading
+from datetime import datetime, timezone
+
+from db.queries import get_collection, invalidate_read_caches
+
+# Código de error de MongoDB cuando $changeStream no está disponible (servidor standalone)
+CHANGE_STREAM_NOT_SUPPORTED = 40573
+
+class ChangeFeed:
+    """
+    Escucha los cambios de una colección en un hilo de fondo y llama a `on_change`
+    por cada inserción, actualización o eliminación.
+
+    `get_tracked_ids` (opcional) retorna los _id que la UI tiene en pantalla; en modo
+    sondeo se usa para detectar eliminaciones, que `updated_at` no puede reflejar.
+    """
+    def __init__(self, on_change, collection_name="partidos", poll_interval=3.0, get_tracked_ids=None):
+        self.on_change = on_change
+        self.collection_name = collection_name
+        self.poll_interval = poll_interval
+        self.get_tracked_ids = get_tracked_ids
+        self.mode = None  # "change_stream" o "polling"
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stream = None
+        self._resume_token = None
+
+    def start(self):
+        """Inicia la escucha en segundo plano."""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene la escucha y cierra el change stream si está abierto."""
+        self._stop_event.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.poll_interval + 1)
+        self._thread = None
+
+    def _emit(self, op, document_id, document=None):
+        try:
+            self.on_change({"op": op, "_id": document_id, "doc": document})
+        except Exception as e:
+            print(f"Error al aplicar cambio {op} de {document_id}: {e}")
+
+    def _run(self):
+        from pymongo.errors import OperationFailure, PyMongoError
+
+        collection = get_collection(self.collection_name)
+        if collection is None:
+            print("ChangeFeed: no hay conexión a la base de datos.")
+            return
+
+        while not self._stop_event.is_set():
+            try:
+                self._watch(collection)
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_NOT_SUPPORTED or "replica set" in str(e).lower():
+                    print("ChangeFeed: change streams no disponibles, usando sondeo por 'updated_at'.")
+                    self._poll(collection)
+                    return
+                print(f"ChangeFeed: error en el change stream, reintentando: {e}")
+            except PyMongoError as e:
+                if self._stop_event.is_set():
+                    return
+                print(f"ChangeFeed: error en el change stream, reintentando: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def _watch(self, collection):
+        """Consume el change stream, reanudando desde el último token si se reinicia."""
+        self.mode = "change_stream"
+        with collection.watch(full_document="updateLookup", resume_after=self._resume_token,
+                              max_await_time_ms=1000) as stream:
+            self._stream = stream
+            while not self._stop_event.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is None:
+                    continue
+                self._resume_token = stream.resume_token
+                op = change.get("operationType")
+                document_id = change.get("documentKey", {}).get("_id")
+                if op in ("insert", "update", "replace"):
+                    self._emit("insert" if op == "insert" else "update", document_id, change.get("fullDocument"))
+                elif op == "delete":
+                    self._emit("delete", document_id)
+        self._stream = None
+
+    def _poll(self, collection):
+        """Sondea documentos con `updated_at` reciente y verifica los _id en pantalla."""
+        self.mode = "polling"
+        last_seen = datetime.now(timezone.utc)
+        seen_at_last = set()
+
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                cursor = collection.find({"updated_at": {"$gte": last_seen}}).sort("updated_at", 1)
+                for document in cursor:
+                    updated_at = document["updated_at"]
+                    if updated_at.tzinfo is None:
+                        updated_at = updated_at.replace(tzinfo=timezone.utc)
+                    if updated_at == last_seen and document["_id"] in seen_at_last:
+                        continue
+                    if updated_at > last_seen:
+                        last_seen = updated_at
+                        seen_at_last = set()
+                    seen_at_last.add(document["_id"])
+                    self._emit("update", document["_id"], document)
+
+                if self.get_tracked_ids:
+                    tracked = list(self.get_tracked_ids())
+                    if tracked:
+                        existing = {d["_id"] for d in collection.find({"_id": {"$in": tracked}}, {"_id": 1})}
+                        for document_id in tracked:
+                            if document_id not in existing:
+                                self._emit("delete", document_id)
+            except Exception as e:
+                print(f"ChangeFeed: error al sondear cambios: {e}")
+
+class ChangeFeedHub:
+    """
+    Un solo ChangeFeed (un change stream o un hilo de sondeo) para todas las sesiones.
+    El ChangeFeed se inicia con el primer suscriptor y se detiene con el último; en modo
+    sondeo, los _id en pantalla que se verifican son los de todas las sesiones.
+    """
+    def __init__(self, collection_name="partidos", poll_interval=3.0):
+        self.collection_name = collection_name
+        self.poll_interval = poll_interval
+        self._subscribers = {} # token -> (on_change, get_tracked_ids)
+        self._next_token = 0
+        self._feed = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, on_change, get_tracked_ids=None):
+        """Registra una sesión. Retorna el token para `unsubscribe`."""
+        with self._lock:
+            self._next_token += 1
+            self._subscribers[self._next_token] = (on_change, get_tracked_ids)
+            if self._feed is None:
+                self._feed = ChangeFeed(self._dispatch, self.collection_name, self.poll_interval,
+                                        get_tracked_ids=self._tracked_ids).start()
+            return self._next_token
+
+    def unsubscribe(self, token):
+        """Da de baja una sesión; sin suscriptores se detiene el ChangeFeed."""
+        with self._lock:
+            self._subscribers.pop(token, None)
+            feed = self._feed if not self._subscribers else None
+            if feed is not None:
+                self._feed = None
+        if feed is not None:
+            feed.stop()
+
+    def stop(self):
+        with self._lock:
+            self._subscribers.clear()
+            feed, self._feed = self._feed, None
+        if feed is not None:
+            feed.stop()
+
+    @property
+    def subscribers(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _dispatch(self, change):
+        # Un cambio de otro proceso deja desactualizadas las lecturas en caché
+        invalidate_read_caches(self.collection_name)
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for on_change, _ in subscribers:
+            try:
+                on_change(change)
+            except Exception as e:
+                print(f"Error al aplicar cambio {change['op']} de {change['_id']}: {e}")
+
+    def _tracked_ids(self):
+        with self._lock:
+            getters = [get_ids for _, get_ids in self._subscribers.values() if get_ids]
+        tracked = set()
+        for get_ids in getters:
+            tracked.update(get_ids())
+        return list(tracked)
+
+_hub = None
+_hub_lock = threading.Lock()
+
+def get_change_feed_hub():
+    """Retorna el ChangeFeed compartido por las sesiones, creándolo en el primer uso."""
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = ChangeFeedHub()
+    return _hub
+
+def close_change_feed_hub():
+    """Detiene el ChangeFeed compartido (si se creó)."""
+    global _hub
+    with _hub_lock:
+        hub, _hub = _hub, None
+    if hub is not None:
+        hub.stop()
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    feed = ChangeFeed(on_change=lambda change: print(change)).start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        feed.stop()
@@ -0,0 +1,107 @@
+# db/fixture_sync.py
+
+# Escritura de partidos importados sin reescribir los que no cambiaron.
+#
+# Cada partido guarda en `content_hash` un hash de sus campos canónicos
+# (ver `models.partido_schema.content_hash`). Al importar, los partidos se procesan
+# en lotes: por lote se hace una sola consulta `fixture_id $in [...]` (campo con
+# índice) que trae de los guardados solo `fixture_id`, `content_hash` y los campos de
+# los sketches, y se escriben únicamente los partidos nuevos (insert_many) y los que
+# cambiaron (un bulk_write).
+# Los partidos sin cambios no generan escrituras, ni entradas en el oplog, ni
+# invalidaciones de cachés. Los sketches de cuantiles (db/sketches.py) se actualizan
+# con los valores de los partidos nuevos y modificados de cada lote.
+
+from db.queries import bulk_update_documents, find_documents, insert_documents
+from db.sketches import source_projection, update_sketches
+from models.partido_schema import content_hash
+
+SYNC_BATCH_SIZE = 1000
+
+def _insert_all(documents, collection_name):
+    """
+    Inserta `documents` con un insert_many. Retorna la lista de documentos insertados,
+    o None si falló (los backends no informan de inserciones parciales: no se cuenta ninguno).
+    """
+    if not documents:
+        return []
+    return documents if len(insert_documents(documents, collection_name)) == len(documents) else None
+
+def sync_matches(matches, collection_name="partidos", batch_size=SYNC_BATCH_SIZE):
+    """
+    Guarda `matches` (ya normalizados y canonicalizados) escribiendo solo los nuevos
+    o modificados, identificados por `fixture_id`. Asigna `content_hash` a cada partido.
+    Los partidos guardados antes de existir el hash cuentan como modificados una vez.
+    Retorna {"new": N, "changed": N, "unchanged": N}, o None si falló alguna escritura.
+    """
+    counts = {"new": 0, "changed": 0, "unchanged": 0}
+    # Si un fixture llega repetido, vale la última versión
+    by_fixture = {}
+    without_id = []
+    for match in matches:
+        match["content_hash"] = content_hash(match)
+        if match.get("fixture_id") is None:
+            without_id.append(match)
+        else:
+            by_fixture[match["fixture_id"]] = match
+
+    failed = False
+    fixtures = list(by_fixture.values())
+    for i in range(0, len(fixtures), batch_size):
+        batch = fixtures[i:i + batch_size]
+        stored = find_documents(
+            {"fixture_id": {"$in": [match["fixture_id"] for match in batch]}},
+            collection_name, projection={"fixture_id": 1, "content_hash": 1, **source_projection()},
+        )
+        stored_by_fixture = {}
+        for document in stored:
+            stored_by_fixture.setdefault(document["fixture_id"], []).append(document)
+
+        new, updates = [], {}
+        # Valores que entran y salen de los sketches: cada documento modificado cambia
+        # sus valores guardados por los del partido importado
+        sketch_added, sketch_removed = [], []
+        changed_count = 0
+        for match in batch:
+            documents = stored_by_fixture.get(match["fixture_id"])
+            if not documents:
+                new.append(match)
+                continue
+            changed = [d["_id"] for d in documents if d.get("content_hash") != match["content_hash"]]
+            fields = {k: v for k, v in match.items() if k != "_id"}
+            for document_id in changed:
+                updates[document_id] = fields
+            for document in documents:
+                if document["_id"] in updates:
+                    sketch_added.append(match)
+                    sketch_removed.append(document)
+            if changed:
+                changed_count += 1
+            else:
+                counts["unchanged"] += 1
+
+        # Solo se cuentan y pasan a los sketches las escrituras que se aplicaron
+        inserted = _insert_all(new, collection_name)
+        if inserted is None:
+            failed = True
+        if updates and bulk_update_documents(updates, collection_name) is None:
+            failed = True
+            sketch_added, sketch_removed = [], []
+        else:
+            counts["changed"] += changed_count
+        counts["new"] += len(inserted or [])
+        if collection_name == "partidos" and (inserted or sketch_added):
+            update_sketches(added=(inserted or []) + sketch_added, removed=sketch_removed)
+
+    if without_id:
+        inserted = _insert_all(without_id, collection_name)
+        if inserted is None:
+            failed = True
+        else:
+            counts["new"] += len(inserted)
+            if collection_name == "partidos":
+                update_sketches(added=inserted)
+
+    print(f"Sincronización de partidos: {counts['new']} nuevos, {counts['changed']} modificados, "
+          f"{counts['unchanged']} sin cambios.")
+    return None if failed else counts
@@ -0,0 +1,266 @@
+# db/migrations.py
+
+# Framework de migraciones de esquema en segundo plano.
+#
+# Cada migración tiene una versión ("0001", "0002", ...), un filtro que selecciona los
+# documentos que todavía necesitan cambios y una función que calcula la actualización
+# de cada documento. El runner procesa la colección en lotes ordenados por `_id`,
+# escribe cada lote con un bulk_write, guarda el último `_id` procesado (checkpoint)
+# para poder reanudar tras una interrupción y se limita a un máximo de operaciones
+# por segundo para no saturar el cluster.
+#
+# El estado de cada migración se guarda en la colección `schema_migrations`:
+#   {"_id": "0001", "description": ..., "status": "running" | "applied",
+#    "last_id": ..., "processed": N, "modified": N, "started_at": ..., "applied_at": ...}
+#
+# Uso (desde la raíz del proyecto):
+#   python -m db.migrations --list
+#   python -m db.migrations --ops-per-second 500
+
+import time
+from datetime import datetime, timezone
+
+from db.queries import get_collection, bulk_write_operations
+from models.partido_schema import derived_fields, parse_percentage
+from utils.date_tools import to_utc_datetime
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+class Migration:
+    """
+    Clase base de una migración. Las subclases definen `version`, `description`,
+    `filter()` y `migrate_document(doc)`.
+    """
+    version = None
+    description = ""
+    collection_name = "partidos"
+    projection = None  # Campos a leer de cada documento (None = todos)
+
+    def filter(self):
+        """Consulta que selecciona los documentos que aún necesitan la migración."""
+        return {}
+
+    def migrate_document(self, document):
+        """
+        Retorna el documento de actualización de MongoDB (p. ej. {"$set": {...}})
+        para `document`, o None si no hay nada que cambiar.
+        """
+        raise NotImplementedError
+
+    def after_batch(self, migrated):
+        """
+        Se llama tras escribir cada lote con la lista de (documento, actualización)
+        aplicadas, para mantener datos derivados (p. ej. los sketches de cuantiles).
+        """
+
+MIGRATIONS = []
+
+def register(migration_class):
+    """Decorador que registra una migración (se ejecutan en orden de versión)."""
+    MIGRATIONS.append(migration_class())
+    MIGRATIONS.sort(key=lambda m: m.version)
+    return migration_class
+
+@register
+class FechaToDate(Migration):
+    version = "0001"
+    description = "Convierte 'fecha' de string ISO a BSON Date"
+    projection = {"fecha": 1}
+
+    def filter(self):
+        return {"fecha": {"$type": "string"}}
+
+    def migrate_document(self, document):
+        fecha = to_utc_datetime(document["fecha"])
+        if fecha is None:
+            print(f"No se pudo interpretar la fecha {document['fecha']!r} del documento {document['_id']}.")
+            return None
+        return {"$set": {"fecha": fecha}}
+
+@register
+class PosesionToInt(Migration):
+    version = "0002"
+    description = "Convierte la posesión guardada como \"54%\" a int"
+    projection = {"posesion_local": 1, "posesion_visitante": 1, "liga": 1, "temporada": 1}
+
+    def filter(self):
+        return {"$or": [
+            {"posesion_local": {"$type": "string"}},
+            {"posesion_visitante": {"$type": "string"}},
+        ]}
+
+    def migrate_document(self, document):
+        changes = {
+            field: parse_percentage(document.get(field))
+            for field in ("posesion_local", "posesion_visitante")
+            if isinstance(document.get(field), str)
+        }
+        return {"$set": changes} if changes else None
+
+    def after_batch(self, migrated):
+        """Añade a los sketches las posesiones convertidas (como texto no se contaban)."""
+        from db.sketches import update_sketches
+
+        converted = [{"liga": document.get("liga"), "temporada": document.get("temporada"), **update["$set"]}
+                     for document, update in migrated]
+        if update_sketches(added=converted) is None:
+            print("No se pudieron actualizar los sketches de posesión (python -m cli sketches --rebuild).")
+
+@register
+class BackfillDerivedFields(Migration):
+    version = "0003"
+    description = "Rellena los campos derivados 'goles_total' y 'resultado'"
+    projection = {"goles_local": 1, "goles_visitante": 1}
+
+    def filter(self):
+        return {"goles_total": {"$exists": False}, "goles_local": {"$type": ["int", "long"]}, "goles_visitante": {"$type": ["int", "long"]}}
+
+    def migrate_document(self, document):
+        changes = derived_fields(document)
+        return {"$set": changes} if changes else None
+
+class MigrationRunner:
+    """
+    Ejecuta las migraciones pendientes en orden.
+    `ops_per_second` limita el ritmo de escritura (None = sin límite).
+    """
+    def __init__(self, migrations=None, batch_size=500, ops_per_second=None):
+        self.migrations = migrations if migrations is not None else MIGRATIONS
+        self.batch_size = batch_size
+        self.ops_per_second = ops_per_second
+
+    def _state_collection(self):
+        return get_collection(MIGRATIONS_COLLECTION)
+
+    def applied_versions(self):
+        """Versiones ya aplicadas por completo."""
+        state = self._state_collection()
+        if state is None:
+            return set()
+        return {doc["_id"] for doc in state.find({"status": "applied"}, {"_id": 1})}
+
+    def pending(self):
+        """Migraciones que todavía no se aplicaron (incluidas las interrumpidas)."""
+        applied = self.applied_versions()
+        return [m for m in self.migrations if m.version not in applied]
+
+    def status(self):
+        """Lista de (versión, descripción, estado, procesados) de todas las migraciones."""
+        state = self._state_collection()
+        records = {doc["_id"]: doc for doc in state.find()} if state is not None else {}
+        return [
+            (m.version, m.description, records.get(m.version, {}).get("status", "pending"),
+             records.get(m.version, {}).get("processed", 0))
+            for m in self.migrations
+        ]
+
+    def run(self, target_version=None):
+        """Aplica las migraciones pendientes hasta `target_version` (inclusive). Retorna las versiones aplicadas."""
+        applied = []
+        for migration in self.pending():
+            if target_version is not None and migration.version > target_version:
+                break
+            if not self.run_migration(migration):
+                print(f"La migración {migration.version} no terminó; se reanudará desde su checkpoint.")
+                break
+            applied.append(migration.version)
+        return applied
+
+    def _throttle(self, started, operations_done):
+        """Duerme lo necesario para no superar `ops_per_second`."""
+        if not self.ops_per_second:
+            return
+        expected_elapsed = operations_done / self.ops_per_second
+        elapsed = time.monotonic() - started
+        if expected_elapsed > elapsed:
+            time.sleep(expected_elapsed - elapsed)
+
+    def run_migration(self, migration):
+        """
+        Ejecuta una migración por lotes, reanudando desde su checkpoint si existe.
+        Retorna True si terminó, False si se interrumpió por un error de escritura.
+        """
+        collection = get_collection(migration.collection_name)
+        state = self._state_collection()
+        if collection is None or state is None:
+            print("Error: No hay conexión a la base de datos.")
+            return False
+
+        from pymongo import UpdateOne
+
+        record = state.find_one({"_id": migration.version}) or {}
+        last_id = record.get("last_id")
+        processed = record.get("processed", 0)
+        modified = record.get("modified", 0)
+        if record:
+            print(f"Reanudando migración {migration.version} desde _id {last_id} ({processed} procesados).")
+        else:
+            state.insert_one({
+                "_id": migration.version,
+                "description": migration.description,
+                "status": "running",
+                "processed": 0,
+                "modified": 0,
+                "started_at": datetime.now(timezone.utc),
+            })
+        print(f"Aplicando migración {migration.version}: {migration.description}")
+
+        started = time.monotonic()
+        operations_done = 0
+        while True:
+            query = dict(migration.filter())
+            if last_id is not None:
+                query = {"$and": [query, {"_id": {"$gt": last_id}}]}
+            batch = list(collection.find(query, migration.projection).sort("_id", 1).limit(self.batch_size))
+            if not batch:
+                break
+
+            operations, migrated = [], []
+            for document in batch:
+                update = migration.migrate_document(document)
+                if update:
+                    operations.append(UpdateOne({"_id": document["_id"]}, update))
+                    migrated.append((document, update))
+
+            if operations:
+                result = bulk_write_operations(operations, migration.collection_name)
+                if result is None:
+                    return False
+                modified += result.modified_count
+                operations_done += len(operations)
+                migration.after_batch(migrated)
+
+            last_id = batch[-1]["_id"]
+            processed += len(batch)
+            state.update_one(
+                {"_id": migration.version},
+                {"$set": {"last_id": last_id, "processed": processed, "modified": modified}}
+            )
+            self._throttle(started, operations_done)
+
+        state.update_one(
+            {"_id": migration.version},
+            {"$set": {"status": "applied", "applied_at": datetime.now(timezone.utc),
+                      "processed": processed, "modified": modified},
+             "$unset": {"last_id": ""}}
+        )
+        print(f"Migración {migration.version} aplicada: {processed} procesados, {modified} modificados.")
+        return True
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migraciones de esquema de futbol_stats_app")
+    parser.add_argument("--list", action="store_true", help="Muestra el estado de las migraciones")
+    parser.add_argument("--target", help="Aplica hasta esta versión (inclusive)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--ops-per-second", type=float, default=None)
+    args = parser.parse_args()
+
+    runner = MigrationRunner(batch_size=args.batch_size, ops_per_second=args.ops_per_second)
+    if args.list:
+        for version, description, status, processed in runner.status():
+            print(f"{version}  {status:<8}  {processed:>8}  {description}")
+    else:
+        print(f"Migraciones aplicadas: {runner.run(args.target)}")
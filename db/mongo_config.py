@@ -1,43 +1,91 @@
 # db/mongo_config.py
 
 import os
+import threading
 from dotenv import load_dotenv
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
 
 # Carga las variables de entorno desde un archivo .env
 # Asegúrate de tener un archivo .env en la raíz de tu proyecto con:
 # MONGO_URI="mongodb+srv://<tu_usuario>:<tu_contraseña>@<tu_cluster>.mongodb.net/?retryWrites=true&w=majority"
 # DB_NAME="futbol_db"
+# Opcionalmente se pueden ajustar el pool, los timeouts y la compresión:
+# MONGO_MAX_POOL_SIZE=20
+# MONGO_MIN_POOL_SIZE=0
+# MONGO_SERVER_SELECTION_TIMEOUT_MS=5000
+# MONGO_CONNECT_TIMEOUT_MS=5000
+# MONGO_SOCKET_TIMEOUT_MS=20000
+# MONGO_COMPRESSORS="zstd,snappy,zlib"
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "futbol_db") # Nombre de la base de datos, por defecto 'futbol_db'
 
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "20"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+# pymongo ignora (con un aviso) los compresores cuya librería no esté instalada
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+
 client = None
 db = None
+_lock = threading.Lock()
 
-def connect_to_mongodb():
+def is_configured():
+    """Indica si hay una MONGO_URI configurada, sin abrir ninguna conexión."""
+    return bool(MONGO_URI)
+
+def get_client_options():
+    """Retorna las opciones de MongoClient derivadas de las variables de entorno."""
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "compressors": MONGO_COMPRESSORS,
+    }
+
+def get_db():
     """
-    Establece la conexión con MongoDB Atlas.
-    Retorna el objeto de la base de datos si la conexión es exitosa, None en caso contrario.
+    Retorna la base de datos, creando el cliente en el primer uso.
+    No hace ningún round trip: MongoClient conecta en segundo plano y la primera
+    operación real espera como máximo `serverSelectionTimeoutMS`.
+    Retorna None si MONGO_URI no está configurada.
     """
     global client, db
-    if client and db:
-        print("Ya conectado a MongoDB.")
+    if db is not None:
         return db
 
     if not MONGO_URI:
         print("Error: La variable de entorno MONGO_URI no está configurada.")
         return None
 
+    with _lock:
+        if db is None:
+            # Import diferido: pymongo no se carga hasta que se necesita la base de datos
+            from pymongo import MongoClient
+            client = MongoClient(MONGO_URI, **get_client_options())
+            db = client[DB_NAME]
+    return db
+
+def connect_to_mongodb():
+    """
+    Establece la conexión con MongoDB Atlas y la verifica con un ping.
+    Retorna el objeto de la base de datos si la conexión es exitosa, None en caso contrario.
+    """
+    from pymongo.errors import ConnectionFailure
+
+    database = get_db()
+    if database is None:
+        return None
+
     try:
-        client = MongoClient(MONGO_URI)
         # El comando ping se usa para confirmar que la conexión es exitosa
         client.admin.command('ping')
-        db = client[DB_NAME]
         print(f"Conexión exitosa a MongoDB Atlas, base de datos: {DB_NAME}")
-        return db
+        return database
     except ConnectionFailure as e:
         print(f"Error de conexión a MongoDB Atlas: {e}")
         return None
@@ -48,16 +96,17 @@ def connect_to_mongodb():
 def close_mongodb_connection():
     """Cierra la conexión con MongoDB."""
     global client, db
-    if client:
-        client.close()
-        print("Conexión a MongoDB cerrada.")
-        client = None
-        db = None
+    with _lock:
+        if client:
+            client.close()
+            print("Conexión a MongoDB cerrada.")
+            client = None
+            db = None
 
 # Ejemplo de uso (opcional, para pruebas)
 if __name__ == "__main__":
     # Para probar la conexión, asegúrate de tener MONGO_URI en tu .env
     database = connect_to_mongodb()
-    if database:
+    if database is not None:
         print(f"Colecciones disponibles: {database.list_collection_names()}")
-    close_mongodb_connection()
\ No newline at end of file
+    close_mongodb_connection()
@@ -0,0 +1,537 @@
+# db/partitions.py
+
+# Particionado opcional de los partidos por temporada.
+#
+# Con PARTITION_BY_SEASON=1 el backend activo (ver db/storage.py) se envuelve en un
+# `PartitionedBackend`: los partidos de la colección lógica `partidos` se guardan en
+# una colección física por temporada (`partidos_2023`, `partidos_2024`, ...; los que
+# no tienen temporada en `partidos_sin_temporada`), así cada índice y cada recorrido
+# solo cubren las temporadas que la consulta necesita.
+#
+# Enrutado de consultas:
+#   - El catálogo (colección `particiones`) guarda por partición su temporada y el
+#     rango de fechas [min_fecha, max_fecha] de sus partidos. El rango solo se amplía,
+#     así que siempre contiene a los partidos guardados y descartar particiones con él
+#     nunca omite resultados.
+#   - De la consulta se toman las condiciones sobre `temporada` y `fecha` que están al
+#     nivel superior o dentro de un $and; las particiones que no pueden cumplirlas se
+#     omiten. Una consulta sin esas condiciones recorre todas las particiones.
+#   - La colección base (`partidos`) se incluye siempre: contiene los partidos aún no
+#     migrados, de modo que la aplicación funciona durante y sin la migración.
+#   - Con MongoDB, las particiones se combinan en una sola agregación con $unionWith
+#     (un round trip); con otros backends se consultan en paralelo.
+#
+# `get_collection("partidos")` retorna un `PartitionedCollection` con las operaciones
+# de lectura que usan las agregaciones, el change feed y las migraciones de esquema.
+# Las escrituras por `_id` se envían a todas las particiones (cada una resuelve el
+# `_id` con su índice); si cambian `temporada` o `fecha` y el partido pasa a otra
+# partición, se inserta en la nueva antes de borrarlo de la anterior.
+#
+# Migración de los datos existentes (reanudable; mueve cada temporada por lotes):
+#   python -m db.partitions --migrate
+#   python -m db.partitions --list
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db.storage import StorageBackend
+from utils.date_tools import to_utc_datetime
+
+PARTITION_BY_SEASON = os.getenv("PARTITION_BY_SEASON", "0").lower() in ("1", "true", "yes")
+PARTITIONED_COLLECTIONS = ("partidos",)
+PARTITIONS_COLLECTION = "particiones"
+NO_SEASON = "sin_temporada"
+# Campos que determinan la partición de un partido (o su rango en el catálogo)
+ROUTING_FIELDS = ("temporada", "fecha")
+# Segundos que se reutiliza el catálogo antes de releerlo (particiones creadas por otros procesos)
+CATALOG_TTL = 30
+MIGRATION_BATCH_SIZE = 1000
+PARALLEL_QUERIES = 8
+
+def partition_name(collection_name, temporada):
+    """Colección física de una temporada: ("partidos", 2024) -> "partidos_2024"."""
+    return f"{collection_name}_{NO_SEASON if temporada is None else int(temporada)}"
+
+def _bounds(condition):
+    """
+    Interpreta una condición sobre un campo como (valores permitidos | None, mínimo, máximo).
+    Retorna None si la condición no permite descartar particiones.
+    """
+    if isinstance(condition, dict) and any(op.startswith("$") for op in condition):
+        values, low, high = None, None, None
+        for op, operand in condition.items():
+            if op == "$in":
+                values = set(operand)
+            elif op in ("$gte", "$gt"):
+                low = operand
+            elif op in ("$lte", "$lt"):
+                high = operand
+            elif op == "$eq":
+                values = {operand}
+            else:
+                return None
+        return values, low, high
+    return {condition}, None, None
+
+def _routing_constraints(query, constraints=None):
+    """Condiciones sobre los campos de enrutado que deben cumplirse (nivel superior y $and)."""
+    constraints = constraints if constraints is not None else {field: [] for field in ROUTING_FIELDS}
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            for sub_query in condition:
+                _routing_constraints(sub_query, constraints)
+        elif key in constraints:
+            bounds = _bounds(condition)
+            if bounds is not None:
+                constraints[key].append(bounds)
+    return constraints
+
+def _season_allowed(temporada, constraints):
+    for values, low, high in constraints:
+        if temporada is None:
+            return False # La condición sobre `temporada` excluye a los partidos sin temporada
+        if values is not None and temporada not in values:
+            return False
+        if (low is not None and temporada < low) or (high is not None and temporada > high):
+            return False
+    return True
+
+def _dates_overlap(min_fecha, max_fecha, constraints):
+    if min_fecha is None or max_fecha is None:
+        return not constraints # Partición sin fechas: solo sin condiciones de fecha
+    for values, low, high in constraints:
+        if values is not None:
+            dates = [to_utc_datetime(v) for v in values]
+            if None not in dates and not any(min_fecha <= d <= max_fecha for d in dates):
+                return False
+        low, high = to_utc_datetime(low), to_utc_datetime(high)
+        if (low is not None and low > max_fecha) or (high is not None and high < min_fecha):
+            return False
+    return True
+
+class PartitionedBackend(StorageBackend):
+    """
+    Envuelve un backend (`inner`) y reparte las colecciones de `collections` en una
+    colección física por temporada. Las demás colecciones se delegan sin cambios.
+    """
+    def __init__(self, inner, collections=PARTITIONED_COLLECTIONS):
+        self.inner = inner
+        self.name = inner.name
+        self.collections = tuple(collections)
+        self._catalog = None
+        self._catalog_loaded_at = 0.0
+        self._catalog_lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=PARALLEL_QUERIES, thread_name_prefix="partitions")
+
+    def _partitioned(self, collection_name):
+        return collection_name in self.collections
+
+    # --- Catálogo ---
+
+    def catalog(self, collection_name, refresh=False):
+        """Particiones de `collection_name`: {nombre: {"temporada", "min_fecha", "max_fecha"}}."""
+        with self._catalog_lock:
+            if refresh or self._catalog is None or time.monotonic() - self._catalog_loaded_at > CATALOG_TTL:
+                catalog = {}
+                for entry in self.inner.find_documents(None, PARTITIONS_COLLECTION):
+                    catalog.setdefault(entry["collection"], {})[entry["_id"]] = {
+                        "temporada": entry.get("temporada"),
+                        "min_fecha": to_utc_datetime(entry.get("min_fecha")),
+                        "max_fecha": to_utc_datetime(entry.get("max_fecha")),
+                    }
+                self._catalog, self._catalog_loaded_at = catalog, time.monotonic()
+            return dict(self._catalog.get(collection_name, {}))
+
+    def _extend_catalog(self, collection_name, partition, temporada, documents):
+        """
+        Amplía el rango de fechas de `partition` para incluir a `documents` con un upsert
+        atómico ($min/$max), así dos procesos que escriben a la vez nunca lo estrechan.
+        Retorna False si no se pudo actualizar el catálogo.
+        """
+        dates = [to_utc_datetime(d.get("fecha")) for d in documents if d.get("fecha") is not None]
+        dates = [d for d in dates if d is not None]
+        new_min, new_max = min(dates, default=None), max(dates, default=None)
+        # El rango guardado solo se amplía: si el del catálogo en caché ya cubre las
+        # fechas, el guardado también (aunque la caché esté desactualizada)
+        entry = self.catalog(collection_name).get(partition)
+        if entry is not None and (new_min is None or (
+                entry["min_fecha"] is not None and entry["min_fecha"] <= new_min and new_max <= entry["max_fecha"])):
+            return True
+        lower = {"min_fecha": new_min.isoformat(timespec="microseconds")} if new_min else {}
+        upper = {"max_fecha": new_max.isoformat(timespec="microseconds")} if new_max else {}
+        applied = self.inner.extend_bounds(partition, lower, upper,
+                                           {"collection": collection_name, "temporada": temporada},
+                                           PARTITIONS_COLLECTION)
+        with self._catalog_lock:
+            self._catalog = None # Se relee en la próxima consulta con el rango ya ampliado
+        return applied
+
+    def partitions(self, collection_name, query=None):
+        """
+        Colecciones físicas que pueden contener documentos que cumplan `query`:
+        la colección base primero y luego las particiones no descartadas.
+        """
+        constraints = _routing_constraints(query)
+        routed = [
+            name for name, entry in sorted(self.catalog(collection_name).items())
+            if _season_allowed(entry["temporada"], constraints["temporada"])
+            and _dates_overlap(entry["min_fecha"], entry["max_fecha"], constraints["fecha"])
+        ]
+        return [collection_name] + routed
+
+    def all_partitions(self, collection_name):
+        return [collection_name] + sorted(self.catalog(collection_name))
+
+    def _fan_out(self, function, names):
+        """Ejecuta `function(nombre)` en paralelo sobre las colecciones `names`. Retorna la lista de resultados."""
+        if len(names) == 1:
+            return [function(names[0])]
+        return list(self._pool.map(function, names))
+
+    # --- Interfaz de StorageBackend ---
+
+    def get_collection(self, collection_name="partidos"):
+        collection = self.inner.get_collection(collection_name)
+        if collection is None or not self._partitioned(collection_name):
+            return collection
+        return PartitionedCollection(self, collection_name, collection)
+
+    def insert_document(self, document, collection_name="partidos"):
+        inserted = self.insert_documents([document], collection_name)
+        return inserted[0] if inserted else None
+
+    def insert_documents(self, documents, collection_name="partidos"):
+        if not self._partitioned(collection_name):
+            return self.inner.insert_documents(documents, collection_name)
+        by_partition = {}
+        for document in documents:
+            temporada = document.get("temporada")
+            by_partition.setdefault(temporada, []).append(document)
+        inserted = []
+        for temporada, group in by_partition.items():
+            partition = partition_name(collection_name, temporada)
+            # El catálogo se amplía antes de insertar: nunca hay partidos fuera del rango
+            if not self._extend_catalog(collection_name, partition, temporada, group):
+                continue
+            inserted.extend(self.inner.insert_documents(group, partition))
+        return inserted
+
+    def find_documents(self, query=None, collection_name="partidos", projection=None):
+        if not self._partitioned(collection_name):
+            return self.inner.find_documents(query, collection_name, projection)
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            try:
+                documents = list(collection.find(query or {}, projection))
+                print(f"Encontrados {len(documents)} documentos.")
+                return documents
+            except Exception as e:
+                print(f"Error al buscar documentos: {e}")
+                return []
+        results = self._fan_out(lambda name: self.inner.find_documents(query, name, projection),
+                                self.partitions(collection_name, query))
+        return [document for documents in results for document in documents]
+
+    def update_document(self, document_id, updates, collection_name="partidos"):
+        return bool(self.bulk_update_documents({document_id: updates}, collection_name))
+
+    def delete_document(self, document_id, collection_name="partidos"):
+        return bool(self.bulk_delete_documents([document_id], collection_name))
+
+    def bulk_update_documents(self, updates_by_id, collection_name="partidos"):
+        if not self._partitioned(collection_name):
+            return self.inner.bulk_update_documents(updates_by_id, collection_name)
+        updates_by_id = {document_id: updates for document_id, updates in updates_by_id.items() if updates}
+        moving = {document_id: updates for document_id, updates in updates_by_id.items()
+                  if any(field in updates for field in ROUTING_FIELDS)}
+        in_place = {document_id: updates for document_id, updates in updates_by_id.items()
+                    if document_id not in moving}
+
+        matched = 0
+        if in_place:
+            counts = self._fan_out(lambda name: self.inner.bulk_update_documents(in_place, name),
+                                   self.all_partitions(collection_name))
+            if any(count is None for count in counts):
+                return None
+            matched += sum(counts)
+        if moving:
+            moved = self._move_documents(moving, collection_name)
+            if moved is None:
+                return None
+            matched += moved
+        return matched
+
+    def _move_documents(self, updates_by_id, collection_name):
+        """
+        Aplica cambios de `temporada`/`fecha`. Los partidos que siguen en la misma
+        partición (y solo están en ella) se actualizan en su sitio. Los demás se mueven:
+        se borran de la partición de destino (por si un intento anterior ya los insertó),
+        se insertan en ella y solo después se borran de las demás particiones donde estén.
+        Si falla el último borrado el partido queda en dos particiones hasta que otro
+        cambio de `temporada`/`fecha` (o el mismo reintentado) lo vuelva a mover.
+        """
+        from db.storage import _as_object_id, _utc_now
+
+        ids = [_as_object_id(document_id) for document_id in updates_by_id]
+        names = self.all_partitions(collection_name)
+        found = self._fan_out(lambda name: self.inner.find_documents({"_id": {"$in": ids}}, name), names)
+        updates_by_key = {str(document_id): updates for document_id, updates in updates_by_id.items()}
+
+        copies = {} # _id -> [(partición, documento)]; más de una si quedó un movimiento a medias
+        for source, documents in zip(names, found):
+            for document in documents:
+                copies.setdefault(str(document["_id"]), []).append((source, document))
+
+        in_place = {}  # partición -> {_id: cambios}
+        moving = {}    # destino -> [(documento ya modificado, particiones de origen)]
+        for key, located in copies.items():
+            # Con varias copias vale la que ya está en la partición de su temporada (la
+            # insertada por el movimiento a medias, que incluye sus cambios)
+            document = next((d for source, d in located
+                             if source == partition_name(collection_name, d.get("temporada"))), located[0][1])
+            document = dict(document, **updates_by_key[key])
+            target = partition_name(collection_name, document.get("temporada"))
+            sources = [source for source, _ in located if source != target]
+            if len(located) == 1 and not sources:
+                in_place.setdefault(target, {})[document["_id"]] = updates_by_key[key]
+            else:
+                moving.setdefault(target, []).append((document, sources))
+
+        matched = 0
+        for partition, partition_updates in in_place.items():
+            entry = self.catalog(collection_name).get(partition) or {}
+            if not self._extend_catalog(collection_name, partition, entry.get("temporada"),
+                                        [{"fecha": u.get("fecha")} for u in partition_updates.values()]):
+                return None
+            count = self.inner.bulk_update_documents(partition_updates, partition)
+            if count is None:
+                return None
+            matched += count
+        for target, entries in moving.items():
+            documents = [document for document, _ in entries]
+            if not self._extend_catalog(collection_name, target, documents[0].get("temporada"), documents):
+                return None
+            if self.inner.bulk_delete_documents([d["_id"] for d in documents], target) is None:
+                return None
+            now = _utc_now()
+            inserted = self.inner.insert_documents([dict(d, updated_at=now) for d in documents], target)
+            if len(inserted) != len(documents):
+                return None
+            by_source = {}
+            for document, sources in entries:
+                for source in sources:
+                    by_source.setdefault(source, []).append(document["_id"])
+            for source, source_ids in by_source.items():
+                if self.inner.bulk_delete_documents(source_ids, source) is None:
+                    return None
+            matched += len(documents)
+        return matched
+
+    def bulk_update_if_match(self, updates_by_id, expected_by_id, collection_name="partidos"):
+        if not self._partitioned(collection_name):
+            return self.inner.bulk_update_if_match(updates_by_id, expected_by_id, collection_name)
+        counts = self._fan_out(lambda name: self.inner.bulk_update_if_match(updates_by_id, expected_by_id, name),
+                               self.all_partitions(collection_name))
+        return None if any(count is None for count in counts) else sum(counts)
+
+    def bulk_delete_documents(self, document_ids, collection_name="partidos"):
+        if not self._partitioned(collection_name):
+            return self.inner.bulk_delete_documents(document_ids, collection_name)
+        document_ids = list(document_ids)
+        counts = self._fan_out(lambda name: self.inner.bulk_delete_documents(document_ids, name),
+                               self.all_partitions(collection_name))
+        return None if any(count is None for count in counts) else sum(counts)
+
+    def delete_many_documents(self, query, collection_name="partidos"):
+        if not self._partitioned(collection_name):
+            return self.inner.delete_many_documents(query, collection_name)
+        counts = self._fan_out(lambda name: self.inner.delete_many_documents(query, name),
+                               self.partitions(collection_name, query))
+        return None if any(count is None for count in counts) else sum(counts)
+
+    def bulk_write(self, operations, collection_name="partidos"):
+        """
+        `bulk_write` de MongoDB sobre todas las particiones. Solo admite operaciones
+        con filtro (UpdateOne/UpdateMany/DeleteOne/DeleteMany); las inserciones deben
+        pasar por `insert_documents` para elegir su partición.
+        """
+        if not hasattr(self.inner, "bulk_write"):
+            print(f"bulk_write no está disponible con el backend '{self.name}'.")
+            return None
+        if not self._partitioned(collection_name):
+            return self.inner.bulk_write(operations, collection_name)
+        from pymongo import InsertOne, ReplaceOne
+
+        if any(isinstance(op, (InsertOne, ReplaceOne)) for op in operations):
+            print("bulk_write particionado: use insert_documents para insertar o reemplazar documentos.")
+            return None
+        results = self._fan_out(lambda name: self.inner.bulk_write(operations, name),
+                                self.all_partitions(collection_name))
+        if any(result is None for result in results):
+            return None
+        return BulkWriteSummary(results)
+
+    def distinct(self, field, query=None, collection_name="partidos"):
+        if not self._partitioned(collection_name):
+            return self.inner.distinct(field, query, collection_name)
+        results = self._fan_out(lambda name: self.inner.distinct(field, query, name),
+                                self.partitions(collection_name, query))
+        return list(dict.fromkeys(value for values in results for value in values))
+
+    def find_batch(self, query=None, collection_name="partidos", after_id=None, limit=1000, projection=None):
+        if not self._partitioned(collection_name):
+            return self.inner.find_batch(query, collection_name, after_id, limit, projection)
+        results = self._fan_out(lambda name: self.inner.find_batch(query, name, after_id, limit, projection),
+                                self.partitions(collection_name, query))
+        if any(documents is None for documents in results):
+            return None
+        return sorted((d for documents in results for d in documents), key=lambda d: d["_id"])[:limit]
+
+    def extend_bounds(self, document_id, lower, upper, on_insert, collection_name):
+        return self.inner.extend_bounds(document_id, lower, upper, on_insert, collection_name)
+
+    def ensure_indexes(self, collection_name="partidos"):
+        if not self._partitioned(collection_name):
+            return self.inner.ensure_indexes(collection_name)
+        return [index for name in self.all_partitions(collection_name)
+                for index in self.inner.ensure_indexes(name)]
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.inner.close()
+
+class BulkWriteSummary:
+    """Suma de los BulkWriteResult de cada partición (mismos contadores que pymongo)."""
+    def __init__(self, results):
+        for counter in ("matched_count", "modified_count", "deleted_count", "inserted_count", "upserted_count"):
+            setattr(self, counter, sum(getattr(result, counter) for result in results))
+
+class PartitionedCollection:
+    """
+    Vista de solo lectura de una colección particionada de MongoDB, con la interfaz de
+    pymongo que usan las agregaciones (`aggregate`, `find`, `count_documents`,
+    `distinct`) y el change feed (`watch`). Cada operación se ejecuta sobre la
+    colección base combinando las particiones enrutadas con $unionWith.
+    """
+    def __init__(self, backend, collection_name, base_collection):
+        self.backend = backend
+        self.name = collection_name
+        self.base = base_collection
+        self.database = base_collection.database
+
+    def _union_pipeline(self, query, tail=()):
+        match = {"$match": query or {}}
+        partitions = self.backend.partitions(self.name, query)[1:]
+        return ([match]
+                + [{"$unionWith": {"coll": partition, "pipeline": [match]}} for partition in partitions]
+                + list(tail))
+
+    def aggregate(self, pipeline, **kwargs):
+        """Agregación sobre las particiones enrutadas por el $match inicial (si lo hay)."""
+        if pipeline and "$match" in pipeline[0]:
+            return self.base.aggregate(self._union_pipeline(pipeline[0]["$match"], pipeline[1:]), **kwargs)
+        return self.base.aggregate(self._union_pipeline({}, pipeline), **kwargs)
+
+    def find(self, filter=None, projection=None):
+        return UnionCursor(self, filter or {}, projection)
+
+    def count_documents(self, filter):
+        rows = list(self.aggregate([{"$match": filter}, {"$count": "n"}]))
+        return rows[0]["n"] if rows else 0
+
+    def distinct(self, key, filter=None):
+        return self.backend.distinct(key, filter, self.name)
+
+    def watch(self, pipeline=None, **kwargs):
+        """Change stream de la base de datos limitado a la colección base y sus particiones."""
+        namespace = {"$match": {"ns.coll": {"$regex": f"^{re.escape(self.name)}(_.+)?$"}}}
+        return self.database.watch([namespace] + list(pipeline or []), **kwargs)
+
+class UnionCursor:
+    """Cursor diferido de `PartitionedCollection.find`: admite `sort` y `limit` encadenados."""
+    def __init__(self, collection, query, projection):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self._sort = None
+        self._limit = None
+
+    def sort(self, key, direction=1):
+        self._sort = dict(key) if isinstance(key, list) else {key: direction}
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def __iter__(self):
+        tail = []
+        if self._sort:
+            tail.append({"$sort": self._sort})
+        if self._limit:
+            tail.append({"$limit": self._limit})
+        if self.projection:
+            tail.append({"$project": self.projection})
+        return iter(self.collection.base.aggregate(self.collection._union_pipeline(self.query, tail)))
+
+def migrate_to_partitions(backend, collection_name="partidos", batch_size=MIGRATION_BATCH_SIZE):
+    """
+    Mueve los documentos de la colección base a sus particiones, temporada por
+    temporada y en lotes de `batch_size` leídos en orden de `_id` (la memoria no
+    depende del tamaño de la temporada). Cada lote se borra primero de la partición de
+    destino (por si una ejecución anterior se interrumpió tras insertarlo), se inserta y
+    luego se borra de la base, así que la migración se puede relanzar en cualquier momento.
+    Retorna {partición: documentos movidos}, o None si falló una lectura o una escritura.
+    """
+    inner = backend.inner
+    moved = {}
+    seasons = inner.distinct("temporada", None, collection_name)
+    for temporada in seasons + [None]:
+        partition = partition_name(collection_name, temporada)
+        last_id = None
+        while True:
+            batch = inner.find_batch({"temporada": temporada}, collection_name, after_id=last_id, limit=batch_size)
+            if batch is None:
+                return None
+            if not batch:
+                break
+            last_id = batch[-1]["_id"]
+            ids = [document["_id"] for document in batch]
+            if inner.bulk_delete_documents(ids, partition) is None:
+                return None
+            if len(backend.insert_documents(batch, collection_name)) != len(batch):
+                return None
+            if inner.bulk_delete_documents(ids, collection_name) is None:
+                return None
+            moved[partition] = moved.get(partition, 0) + len(batch)
+            print(f"Particiones: {moved[partition]} partidos movidos a {partition}.")
+    backend.ensure_indexes(collection_name)
+    return moved
+
+def get_partitioned_backend():
+    """Backend activo como `PartitionedBackend` (error si PARTITION_BY_SEASON no está activo)."""
+    from db.storage import get_backend
+
+    backend = get_backend()
+    if not isinstance(backend, PartitionedBackend):
+        raise ValueError("El particionado no está activo: defina PARTITION_BY_SEASON=1.")
+    return backend
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Particionado de partidos por temporada")
+    parser.add_argument("--migrate", action="store_true", help="Mueve los partidos de la colección base a sus particiones")
+    parser.add_argument("--list", action="store_true", help="Muestra el catálogo de particiones")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    backend = get_partitioned_backend()
+    if args.migrate:
+        print(migrate_to_partitions(backend, batch_size=args.batch_size))
+    for name, entry in sorted(backend.catalog("partidos", refresh=True).items()):
+        print(f"{name:<28} temporada={entry['temporada']} fechas={entry['min_fecha']} .. {entry['max_fecha']}")
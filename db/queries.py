@@ -1,57 +1,77 @@
 # db/queries.py
 
-from bson.objectid import ObjectId
-from db.mongo_config import connect_to_mongodb
+# Las funciones de este módulo delegan en el backend de almacenamiento activo
+# (MongoDB por defecto, o SQLite embebido con STORAGE_BACKEND="sqlite"; ver db/storage.py).
+# Los resúmenes de KPIs, los valores distintos de los desplegables y las consultas de la
+# tabla (`find_documents_cached`) se guardan en cachés compartidas por todas las sesiones
+# (ver db/read_cache.py) que se invalidan con cada escritura en la colección.
 
-# Obtiene la instancia de la base de datos
-db = connect_to_mongodb()
+import json
 
-# Verifica que la conexión se haya establecido correctamente
-if not db:
-    print("Error: No se pudo conectar a la base de datos. Las operaciones de la DB no funcionarán.")
+from db.read_cache import ReadCache
+from db.storage import get_backend
+from utils.date_tools import to_utc_datetime
+
+# Segundos que se reutiliza un resumen de KPIs para la misma consulta
+SUMMARY_CACHE_TTL = 60
+# Segundos que se reutilizan los resultados de consultas y los valores distintos
+QUERY_CACHE_TTL = 30
+DISTINCT_CACHE_TTL = 300
+
+summary_cache = ReadCache(SUMMARY_CACHE_TTL)
+# Los backends retornan [] si la consulta falla: las listas vacías no se guardan
+query_cache = ReadCache(QUERY_CACHE_TTL, max_entries=32, cache_empty=False)
+distinct_cache = ReadCache(DISTINCT_CACHE_TTL, cache_empty=False)
+READ_CACHES = (summary_cache, query_cache, distinct_cache)
+
+def _query_key(collection_name, query):
+    return (collection_name, json.dumps(query or {}, sort_keys=True, default=str))
 
 def get_collection(collection_name="partidos"):
     """
     Retorna la colección especificada.
+    La conexión se crea de forma diferida en el primer uso (ver `get_db`).
+    Retorna None si no hay conexión o si el backend activo no es MongoDB.
     """
-    if db:
-        return db[collection_name]
-    return None
+    return get_backend().get_collection(collection_name)
 
 def insert_document(document, collection_name="partidos"):
     """
     Inserta un solo documento en la colección especificada.
     Retorna el ID del documento insertado.
     """
-    collection = get_collection(collection_name)
-    if collection:
-        try:
-            result = collection.insert_one(document)
-            print(f"Documento insertado con ID: {result.inserted_id}")
-            return result.inserted_id
-        except Exception as e:
-            print(f"Error al insertar documento: {e}")
-            return None
-    return None
-
-def find_documents(query=None, collection_name="partidos"):
+    result = get_backend().insert_document(document, collection_name)
+    invalidate_read_caches(collection_name)
+    return result
+
+def insert_documents(documents, collection_name="partidos"):
+    """
+    Inserta varios documentos en un solo round trip (insert_many no ordenado).
+    Retorna la lista de IDs insertados.
+    """
+    if not documents:
+        return []
+    result = get_backend().insert_documents(documents, collection_name)
+    invalidate_read_caches(collection_name)
+    return result
+
+def find_documents(query=None, collection_name="partidos", projection=None):
     """
     Encuentra documentos en la colección especificada que coincidan con la consulta.
     Si la consulta es None, retorna todos los documentos.
+    `projection` ({campo: 1, ...}) limita los campos retornados.
     Retorna una lista de documentos.
     """
-    collection = get_collection(collection_name)
-    if collection:
-        try:
-            if query is None:
-                query = {}
-            documents = list(collection.find(query))
-            print(f"Encontrados {len(documents)} documentos.")
-            return documents
-        except Exception as e:
-            print(f"Error al buscar documentos: {e}")
-            return []
-    return []
+    return get_backend().find_documents(query, collection_name, projection)
+
+def find_documents_cached(query=None, collection_name="partidos"):
+    """
+    Como `find_documents`, pero el resultado se comparte entre sesiones durante
+    QUERY_CACHE_TTL segundos (o hasta la próxima escritura en la colección).
+    La lista y sus documentos se comparten: no deben modificarse.
+    """
+    return query_cache.get_or_load(_query_key(collection_name, query),
+                                   lambda: find_documents(query, collection_name))
 
 def update_document(document_id, updates, collection_name="partidos"):
     """
@@ -60,24 +80,9 @@ def update_document(document_id, updates, collection_name="partidos"):
     `updates` es un diccionario con los campos a actualizar.
     Retorna True si la actualización fue exitosa, False en caso contrario.
     """
-    collection = get_collection(collection_name)
-    if collection:
-        try:
-            # Asegura que el ID sea un ObjectId
-            if isinstance(document_id, str):
-                document_id = ObjectId(document_id)
-
-            result = collection.update_one({"_id": document_id}, {"$set": updates})
-            if result.matched_count > 0:
-                print(f"Documento con ID {document_id} actualizado. Modificados: {result.modified_count}")
-                return True
-            else:
-                print(f"No se encontró documento con ID {document_id} para actualizar.")
-                return False
-        except Exception as e:
-            print(f"Error al actualizar documento con ID {document_id}: {e}")
-            return False
-    return False
+    result = get_backend().update_document(document_id, updates, collection_name)
+    invalidate_read_caches(collection_name)
+    return result
 
 def delete_document(document_id, collection_name="partidos"):
     """
@@ -85,35 +90,73 @@ def delete_document(document_id, collection_name="partidos"):
     `document_id` puede ser una cadena (para ObjectId) o un ObjectId.
     Retorna True si la eliminación fue exitosa, False en caso contrario.
     """
-    collection = get_collection(collection_name)
-    if collection:
-        try:
-            # Asegura que el ID sea un ObjectId
-            if isinstance(document_id, str):
-                document_id = ObjectId(document_id)
-
-            result = collection.delete_one({"_id": document_id})
-            if result.deleted_count > 0:
-                print(f"Documento con ID {document_id} eliminado.")
-                return True
-            else:
-                print(f"No se encontró documento con ID {document_id} para eliminar.")
-                return False
-        except Exception as e:
-            print(f"Error al eliminar documento con ID {document_id}: {e}")
-            return False
-    return False
+    result = get_backend().delete_document(document_id, collection_name)
+    invalidate_read_caches(collection_name)
+    return result
+
+def bulk_write_operations(operations, collection_name="partidos"):
+    """
+    Ejecuta una lista de operaciones de pymongo (UpdateOne, DeleteOne, ...) en un
+    solo `bulk_write` no ordenado. Solo disponible con el backend de MongoDB.
+    Retorna el BulkWriteResult, o None si hubo un error.
+    """
+    backend = get_backend()
+    if not hasattr(backend, "bulk_write"):
+        print(f"bulk_write no está disponible con el backend '{backend.name}'.")
+        return None
+    result = backend.bulk_write(operations, collection_name)
+    invalidate_read_caches(collection_name)
+    return result
+
+def bulk_update_documents(updates_by_id, collection_name="partidos"):
+    """
+    Actualiza varios documentos en un solo round trip.
+    `updates_by_id` es un diccionario {_id: {campo: valor}}; cada documento recibe su propio $set.
+    Retorna el número de documentos encontrados, o None si hubo un error.
+    """
+    result = get_backend().bulk_update_documents(updates_by_id, collection_name)
+    invalidate_read_caches(collection_name)
+    return result
+
+def bulk_update_if_match(updates_by_id, expected_by_id, collection_name="partidos"):
+    """
+    Actualización condicional en un solo round trip: cada documento recibe su $set solo
+    si sus campos coinciden con `expected_by_id[_id]` ({campo: valor}; None = ausente).
+    Retorna el número de documentos actualizados, o None si hubo un error.
+    """
+    result = get_backend().bulk_update_if_match(updates_by_id, expected_by_id, collection_name)
+    invalidate_read_caches(collection_name)
+    return result
+
+def bulk_delete_documents(document_ids, collection_name="partidos"):
+    """
+    Elimina varios documentos por su ID en un solo round trip.
+    Retorna el número de documentos eliminados, o None si hubo un error.
+    """
+    result = get_backend().bulk_delete_documents(document_ids, collection_name)
+    invalidate_read_caches(collection_name)
+    return result
+
+def delete_many_documents(query, collection_name="partidos"):
+    """
+    Elimina todos los documentos que coincidan con la consulta.
+    Retorna el número de documentos eliminados, o None si hubo un error.
+    """
+    result = get_backend().delete_many_documents(query, collection_name)
+    invalidate_read_caches(collection_name)
+    return result
 
 # Funciones de filtrado específicas
 def filter_by_date_range(start_date, end_date, collection_name="partidos"):
     """
     Filtra partidos por un rango de fechas.
-    Las fechas deben estar en formato ISO 8601 (ej. "2025-07-01T00:00:00Z").
+    Las fechas pueden ser datetime o strings ISO 8601 (ej. "2025-07-01T00:00:00Z");
+    se convierten a datetime UTC porque `fecha` se almacena como BSON Date.
     """
     query = {
         "fecha": {
-            "$gte": start_date,
-            "$lte": end_date
+            "$gte": to_utc_datetime(start_date),
+            "$lte": to_utc_datetime(end_date)
         }
     }
     return find_documents(query, collection_name)
@@ -130,35 +173,194 @@ def filter_by_team(team_name, collection_name="partidos"):
     }
     return find_documents(query, collection_name)
 
+def build_match_query(filters=None):
+    """
+    Construye la consulta de MongoDB a partir del diccionario de filtros del dashboard
+    (claves opcionales: start_date, end_date, team, league). Las fechas son datetime.
+    """
+    query = {}
+    if filters:
+        if "start_date" in filters and "end_date" in filters:
+            query["fecha"] = {
+                "$gte": to_utc_datetime(filters["start_date"]),
+                "$lte": to_utc_datetime(filters["end_date"])
+            }
+        elif "start_date" in filters:
+            query["fecha"] = {"$gte": to_utc_datetime(filters["start_date"])}
+        elif "end_date" in filters:
+            query["fecha"] = {"$lte": to_utc_datetime(filters["end_date"])}
+
+        if "team" in filters:
+            query["$or"] = [
+                {"equipo_local": filters["team"]},
+                {"equipo_visitante": filters["team"]}
+            ]
+        if "league" in filters:
+            query["liga"] = filters["league"]
+    return query
+
+def document_matches_query(document, query):
+    """
+    Evalúa en memoria si un documento cumple una consulta sencilla de MongoDB.
+    Soporta igualdad, $or, $and, $in y los comparadores $gt/$gte/$lt/$lte,
+    que son las formas que genera `build_match_query`.
+    """
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(document_matches_query(document, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(document_matches_query(document, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and any(op.startswith("$") for op in condition):
+            value = document.get(key)
+            for op, operand in condition.items():
+                try:
+                    if op == "$in":
+                        ok = value in operand
+                    elif value is None:
+                        ok = False
+                    elif op == "$gt":
+                        ok = value > operand
+                    elif op == "$gte":
+                        ok = value >= operand
+                    elif op == "$lt":
+                        ok = value < operand
+                    elif op == "$lte":
+                        ok = value <= operand
+                    elif op == "$ne":
+                        ok = value != operand
+                    else:
+                        raise ValueError(f"Operador no soportado: {op}")
+                except TypeError:
+                    ok = False
+                if not ok:
+                    return False
+        elif document.get(key) != condition:
+            return False
+    return True
+
+def _summarize_documents(documents):
+    """Calcula en Python los mismos KPIs que `get_match_summary` (backends sin agregaciones)."""
+    def total(field_a, field_b):
+        return sum((doc.get(field_a) or 0) + (doc.get(field_b) or 0) for doc in documents)
+
+    scored = [doc for doc in documents
+              if doc.get("goles_local") is not None and doc.get("goles_visitante") is not None]
+    possession = [doc["posesion_local"] for doc in documents if isinstance(doc.get("posesion_local"), (int, float))]
+    return {
+        "partidos": len(documents),
+        "goles": total("goles_local", "goles_visitante"),
+        "partidos_con_resultado": len(scored),
+        "victorias_local": sum(1 for doc in scored if doc["goles_local"] > doc["goles_visitante"]),
+        "posesion_local_media": sum(possession) / len(possession) if possession else None,
+        "tarjetas": total("tarjetas_amarillas_local", "tarjetas_amarillas_visitante"),
+    }
+
+def _summary_pipeline(query):
+    """Una sola agregación con $facet: totales y reparto de resultados."""
+    has_score = {"goles_local": {"$type": "number"}, "goles_visitante": {"$type": "number"}}
+    return [
+        {"$match": query},
+        {"$facet": {
+            "totales": [{"$group": {
+                "_id": None,
+                "partidos": {"$sum": 1},
+                "goles": {"$sum": {"$add": [{"$ifNull": ["$goles_local", 0]}, {"$ifNull": ["$goles_visitante", 0]}]}},
+                "posesion_local_media": {"$avg": "$posesion_local"},
+                "tarjetas": {"$sum": {"$add": [{"$ifNull": ["$tarjetas_amarillas_local", 0]},
+                                               {"$ifNull": ["$tarjetas_amarillas_visitante", 0]}]}},
+            }}],
+            "resultados": [
+                {"$match": has_score},
+                {"$group": {"_id": {"$cmp": ["$goles_local", "$goles_visitante"]}, "n": {"$sum": 1}}},
+            ],
+        }},
+    ]
+
+def get_match_summary(query=None, collection_name="partidos", use_cache=True):
+    """
+    KPIs de los partidos que cumplen `query` (la misma consulta que carga la tabla):
+    partidos, goles, goles por partido, % de victorias locales, posesión local media y
+    tarjetas por partido. Con MongoDB se calculan en el servidor con una sola agregación
+    `$facet`. El resultado se guarda en caché por consulta durante SUMMARY_CACHE_TTL
+    segundos y se invalida con cada escritura en la colección.
+    Retorna un diccionario, o None si hubo un error.
+    """
+    query = query or {}
+    if not use_cache:
+        return _compute_match_summary(query, collection_name)
+    summary = summary_cache.get_or_load(_query_key(collection_name, query),
+                                        lambda: _compute_match_summary(query, collection_name))
+    return dict(summary) if summary is not None else None
+
+def _compute_match_summary(query, collection_name):
+    collection = get_collection(collection_name)
+    try:
+        if collection is not None:
+            facets = next(collection.aggregate(_summary_pipeline(query)))
+            totals = facets["totales"][0] if facets["totales"] else {}
+            results = {row["_id"]: row["n"] for row in facets["resultados"]}
+            raw = {
+                "partidos": totals.get("partidos", 0),
+                "goles": totals.get("goles", 0),
+                "partidos_con_resultado": sum(results.values()),
+                "victorias_local": results.get(1, 0),
+                "posesion_local_media": totals.get("posesion_local_media"),
+                "tarjetas": totals.get("tarjetas", 0),
+            }
+        else:
+            raw = _summarize_documents(find_documents(query, collection_name))
+    except Exception as e:
+        print(f"Error al calcular el resumen de partidos: {e}")
+        return None
+
+    matches = raw["partidos"]
+    summary = {
+        "partidos": matches,
+        "goles": raw["goles"],
+        "goles_por_partido": raw["goles"] / matches if matches else None,
+        "victorias_local_pct": (100 * raw["victorias_local"] / raw["partidos_con_resultado"]
+                                if raw["partidos_con_resultado"] else None),
+        "posesion_local_media": raw["posesion_local_media"],
+        "tarjetas_por_partido": raw["tarjetas"] / matches if matches else None,
+    }
+    return summary
+
+def invalidate_read_caches(collection_name="partidos"):
+    """
+    Descarta los resúmenes, consultas y valores distintos en caché de la colección
+    (o de todas si es None). Se llama después de cada escritura, así ninguna lectura
+    simultánea deja en caché los datos anteriores.
+    """
+    for cache in READ_CACHES:
+        cache.invalidate(collection_name)
+
+def ensure_indexes(collection_name="partidos"):
+    """
+    Crea (si no existen) los índices que usan los filtros del dashboard y la ingesta.
+    Retorna la lista de nombres de índices creados/existentes.
+    """
+    return get_backend().ensure_indexes(collection_name)
+
 def get_unique_teams(collection_name="partidos"):
     """
     Obtiene una lista de todos los equipos únicos (locales y visitantes) en la colección.
     """
-    collection = get_collection(collection_name)
-    if collection:
-        try:
-            local_teams = collection.distinct("equipo_local")
-            visitor_teams = collection.distinct("equipo_visitante")
-            all_teams = sorted(list(set(local_teams + visitor_teams)))
-            return all_teams
-        except Exception as e:
-            print(f"Error al obtener equipos únicos: {e}")
-            return []
-    return []
+    def load():
+        backend = get_backend()
+        local_teams = backend.distinct("equipo_local", collection_name=collection_name)
+        visitor_teams = backend.distinct("equipo_visitante", collection_name=collection_name)
+        return sorted(set(local_teams + visitor_teams))
+    return list(distinct_cache.get_or_load((collection_name, "teams"), load))
 
 def get_unique_leagues(collection_name="partidos"):
     """
     Obtiene una lista de todas las ligas únicas en la colección.
     """
-    collection = get_collection(collection_name)
-    if collection:
-        try:
-            leagues = collection.distinct("liga")
-            return sorted(leagues)
-        except Exception as e:
-            print(f"Error al obtener ligas únicas: {e}")
-            return []
-    return []
+    return list(distinct_cache.get_or_load(
+        (collection_name, "leagues"), lambda: sorted(get_backend().distinct("liga", collection_name=collection_name))
+    ))
 
 # Ejemplo de uso (opcional, para pruebas)
 if __name__ == "__main__":
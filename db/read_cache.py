@@ -0,0 +1,104 @@
+# db/read_cache.py
+
+# Caché de lecturas compartida por todas las sesiones del proceso. En modo web cada
+# pestaña del navegador es una sesión con su propio Dashboard, y casi todas abren las
+# mismas vistas (todos los partidos, una liga, los desplegables de equipos y ligas):
+# con esta caché la consulta se hace una vez y el resultado se reutiliza.
+#
+# - Las entradas caducan a los `ttl` segundos y se descartan las menos usadas por
+#   encima de `max_entries`.
+# - Si varias sesiones piden a la vez una clave que no está en caché, solo una hace la
+#   consulta y las demás esperan su resultado (sin consultas duplicadas en ráfaga).
+# - Las escrituras invalidan las entradas de su colección (ver db/queries.py), y los
+#   cambios de otros procesos llegan por el ChangeFeed compartido (db/change_feed.py).
+#
+# Los valores se comparten entre sesiones: quien los recibe no debe modificarlos.
+
+import threading
+import time
+from collections import OrderedDict
+
+class _Loading:
+    """Consulta en curso de una clave: las demás sesiones esperan a `done`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class ReadCache:
+    """
+    Caché {clave: valor} con TTL, LRU y una sola consulta simultánea por clave.
+    El primer elemento de cada clave es el nombre de la colección (para invalidar).
+    Con `cache_empty=False` los resultados vacíos no se guardan: los backends retornan
+    [] cuando la consulta falla, y guardarlo dejaría a todas las sesiones sin datos
+    hasta que caduque la entrada.
+    """
+    def __init__(self, ttl, max_entries=256, cache_empty=True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_empty = cache_empty
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # clave -> (instante, valor)
+        self._loading = {}            # clave -> _Loading
+        self._generations = {}        # colección -> número de invalidaciones
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """Retorna el valor en caché de `key` o lo obtiene con `loader()` (una sola vez)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            loading = self._loading.get(key)
+            owner = loading is None
+            if owner:
+                loading = self._loading[key] = _Loading()
+                generation = self._generations.get(key[0], 0)
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            loading.done.wait()
+            if loading.error is not None:
+                raise loading.error
+            return loading.value
+
+        try:
+            loading.value = loader()
+        except Exception as e:
+            loading.error = e
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+                # Si hubo una escritura durante la consulta el resultado puede estar
+                # desactualizado: se entrega a quien esperaba, pero no se guarda
+                cacheable = loading.value is not None and (self.cache_empty or len(loading.value) > 0)
+                if loading.error is None and cacheable and self._generations.get(key[0], 0) == generation:
+                    self._entries[key] = (time.monotonic(), loading.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            loading.done.set()
+        return loading.value
+
+    def invalidate(self, collection_name=None):
+        """Descarta las entradas de la colección (o todas si no se indica)."""
+        with self._lock:
+            for key in [k for k in self._entries if collection_name is None or k[0] == collection_name]:
+                del self._entries[key]
+            if collection_name is None:
+                names = set(self._generations) | {key[0] for key in self._loading}
+            else:
+                names = {collection_name}
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
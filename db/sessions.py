@@ -0,0 +1,64 @@
+# db/sessions.py
+
+# Ciclo de vida de los recursos compartidos entre sesiones.
+#
+# En modo escritorio hay una sola sesión. En modo web (APP_MODE=web, ver main.py) Flet
+# llama a `main` una vez por pestaña del navegador, todas en el mismo proceso. Cada
+# sesión tiene su propio Dashboard (filtros, tabla, selección), pero comparten:
+#   - el backend de almacenamiento: un único MongoClient, cuyo pool de conexiones es
+#     seguro entre hilos (MONGO_MAX_POOL_SIZE), o la conexión de SQLite;
+#   - las cachés de lectura (db/read_cache.py) y el ChangeFeed (db/change_feed.py);
+#   - la cola de escrituras diferidas (db/write_queue.py).
+# Cerrar una sesión solo libera lo suyo; los recursos compartidos se cierran con
+# `shutdown_shared_resources`, al salir del proceso o al cerrar la ventana de escritorio.
+
+import atexit
+import threading
+import time
+
+class SessionRegistry:
+    """Sesiones abiertas en el proceso: {id: {"opened_at": ..., **info}}."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def open(self, session_id, **info):
+        with self._lock:
+            self._sessions[session_id] = {"opened_at": time.time(), **info}
+            return len(self._sessions)
+
+    def close(self, session_id):
+        """Da de baja la sesión. Retorna el número de sesiones que siguen abiertas."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            return len(self._sessions)
+
+    def active(self):
+        with self._lock:
+            return len(self._sessions)
+
+_registry = SessionRegistry()
+_shutdown_lock = threading.Lock()
+
+def get_session_registry():
+    return _registry
+
+def shutdown_shared_resources():
+    """
+    Cierra los recursos compartidos: detiene el ChangeFeed, intenta escribir las
+    ediciones pendientes (las demás quedan guardadas localmente) y cierra el backend.
+    Se puede llamar más de una vez.
+    """
+    from db.change_feed import close_change_feed_hub
+    from db.queries import invalidate_read_caches
+    from db.storage import close_backend
+    from db.write_queue import close_write_queue
+
+    with _shutdown_lock:
+        close_change_feed_hub()
+        close_write_queue()
+        close_backend()
+        invalidate_read_caches(None)
+
+atexit.register(shutdown_shared_resources)
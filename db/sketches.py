@@ -0,0 +1,295 @@
+# db/sketches.py
+
+# Distribuciones históricas de estadísticas por liga, temporada y métrica, resumidas
+# con sketches de cuantiles KLL (ver utils/quantile_sketch.py) en la colección `sketches`.
+# Permiten responder "los remates de este equipo están en el percentil 90 de la liga"
+# sin leer ni ordenar todos los valores históricos en cada consulta.
+#
+# Un documento por (liga, temporada, métrica):
+#   {"_id": "Premier League|2024|remates", "liga": "Premier League", "temporada": 2024,
+#    "metrica": "remates", "added": {sketch}, "removed": {sketch}, "version": "..."}
+# Cada partido aporta dos valores a cada métrica: el del local y el del visitante.
+#
+# Los sketches se actualizan de forma incremental al importar (db/fixture_sync.py) y al
+# editar o eliminar partidos (`apply_match_updates`, `apply_match_deletes`,
+# `apply_matching_delete`). Un KLL no permite quitar valores, así que los valores que
+# dejan de existir se añaden al sketch `removed` y el rango de un valor se estima como
+# rank(added) - rank(removed). Tras muchas ediciones conviene reconstruirlos con
+# `rebuild_sketches` (python -m cli sketches --rebuild).
+
+import random
+import threading
+import time
+import uuid
+
+from db.queries import (bulk_delete_documents, bulk_update_documents, bulk_update_if_match,
+                        delete_many_documents, find_documents, insert_documents)
+from utils.quantile_sketch import KLLSketch
+
+SKETCHES_COLLECTION = "sketches"
+
+# Métrica -> campos del partido (local y visitante) que aportan valores
+SKETCH_METRICS = {
+    "remates": ("remates_local", "remates_visitante"),
+    "posesion": ("posesion_local", "posesion_visitante"),
+    "tarjetas_amarillas": ("tarjetas_amarillas_local", "tarjetas_amarillas_visitante"),
+}
+# Campos del partido que determinan a qué sketches aporta y con qué valores
+SKETCH_SOURCE_FIELDS = ("liga", "temporada") + tuple(f for fields in SKETCH_METRICS.values() for f in fields)
+
+# Segundos que se reutilizan los sketches leídos para calcular percentiles
+DISTRIBUTION_CACHE_TTL = 60
+_distribution_cache = {}
+_distribution_cache_lock = threading.Lock()
+# Serializa la lectura-combinación-escritura de los sketches dentro del proceso; entre
+# procesos, las escrituras son condicionales a la versión leída (ver `update_sketches`)
+_update_lock = threading.Lock()
+# Intentos ante escrituras concurrentes y espera máxima (segundos) entre intentos
+SKETCH_UPDATE_ATTEMPTS = 5
+SKETCH_RETRY_DELAY = 0.05
+
+def sketch_id(liga, temporada, metric):
+    return f"{liga}|{temporada}|{metric}"
+
+def source_projection():
+    """Proyección con los campos que necesitan los sketches."""
+    return {field: 1 for field in SKETCH_SOURCE_FIELDS}
+
+def _metric_values(documents):
+    """Agrupa los valores de `documents` en {(liga, temporada, métrica): [valores]}."""
+    grouped = {}
+    for document in documents:
+        liga = document.get("liga")
+        if not liga:
+            continue
+        for metric, fields in SKETCH_METRICS.items():
+            for field in fields:
+                value = document.get(field)
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+                    grouped.setdefault((liga, document.get("temporada"), metric), []).append(value)
+    return grouped
+
+def update_sketches(added=(), removed=()):
+    """
+    Añade a los sketches los valores de los partidos `added` y descuenta los de `removed`
+    (documentos con al menos SKETCH_SOURCE_FIELDS). Por intento, una lectura `_id $in`,
+    un insert_many de los sketches nuevos y un bulk_write condicional de los existentes.
+    Cada escritura guarda un `version` nuevo y solo se aplica si el sketch sigue en la
+    versión leída, así otro proceso (CLI, backfill, importación) que escriba a la vez no
+    pisa sus valores: los sketches en conflicto se releen y se reintentan.
+    Retorna el número de sketches escritos, o None si falló alguna escritura.
+    """
+    added_values, removed_values = _metric_values(added), _metric_values(removed)
+    keys = set(added_values) | set(removed_values)
+    if not keys:
+        return 0
+
+    pending = {sketch_id(*key): key for key in keys}
+    versions = {} # _id -> versión escrita en el último intento
+    with _update_lock:
+        for attempt in range(SKETCH_UPDATE_ATTEMPTS + 1):
+            stored = {d["_id"]: d for d in find_documents({"_id": {"$in": list(pending)}}, SKETCHES_COLLECTION)}
+            # El intento anterior se aplicó si el sketch tiene la versión que escribió
+            for document_id in [i for i in pending if i in versions]:
+                if stored.get(document_id, {}).get("version") == versions[document_id]:
+                    del pending[document_id]
+            if not pending or attempt == SKETCH_UPDATE_ATTEMPTS:
+                break
+            if attempt:
+                time.sleep(random.uniform(0, SKETCH_RETRY_DELAY * attempt))
+
+            new, updates, expected = [], {}, {}
+            for document_id, (liga, temporada, metric) in pending.items():
+                document = stored.get(document_id)
+                sketches = {"version": uuid.uuid4().hex}
+                for part, values in (("added", added_values), ("removed", removed_values)):
+                    sketch = KLLSketch.from_dict(document[part]) if document and part in document else KLLSketch()
+                    sketch.extend(values.get((liga, temporada, metric), ()))
+                    sketches[part] = sketch.to_dict()
+                versions[document_id] = sketches["version"]
+                if document is None:
+                    new.append({"_id": document_id, "liga": liga, "temporada": temporada, "metrica": metric, **sketches})
+                else:
+                    updates[document_id] = sketches
+                    expected[document_id] = {"version": document.get("version")}
+            # Si otro proceso creó el mismo sketch, su inserción falla y se reintenta como actualización
+            if new:
+                insert_documents(new, SKETCHES_COLLECTION)
+            if updates:
+                bulk_update_if_match(updates, expected, SKETCHES_COLLECTION)
+    invalidate_distributions()
+    if pending:
+        print(f"No se pudieron actualizar {len(pending)} sketches (python -m cli sketches --rebuild).")
+        return None
+    return len(keys)
+
+def _source_documents(document_ids, collection_name):
+    from db.storage import _as_object_id
+
+    # Los sketches resumen solo la colección de partidos
+    if not document_ids or collection_name != "partidos":
+        return []
+    return find_documents({"_id": {"$in": [_as_object_id(i) for i in document_ids]}},
+                          collection_name, projection=source_projection())
+
+def apply_match_updates(updates_by_id, collection_name="partidos"):
+    """
+    Escribe `updates_by_id` ({_id: {campo: valor}}) con `bulk_update_documents` y, si los
+    cambios tocan campos de los sketches, cambia en ellos los valores viejos por los nuevos.
+    Retorna lo mismo que `bulk_update_documents`.
+    """
+    touched = [i for i, updates in updates_by_id.items() if any(f in updates for f in SKETCH_SOURCE_FIELDS)]
+    before = _source_documents(touched, collection_name)
+
+    matched = bulk_update_documents(updates_by_id, collection_name)
+    if matched is not None and before:
+        updates_by_key = {str(i): updates for i, updates in updates_by_id.items()}
+        after = [{**document, **updates_by_key.get(str(document["_id"]), {})} for document in before]
+        update_sketches(added=after, removed=before)
+    return matched
+
+def apply_match_deletes(document_ids, collection_name="partidos"):
+    """
+    Elimina los partidos `document_ids` con `bulk_delete_documents` y descuenta sus
+    valores de los sketches. Retorna lo mismo que `bulk_delete_documents`.
+    """
+    before = _source_documents(document_ids, collection_name)
+    deleted = bulk_delete_documents(document_ids, collection_name)
+    if deleted and before:
+        update_sketches(removed=before)
+    return deleted
+
+def apply_matching_delete(query, collection_name="partidos"):
+    """
+    Elimina con `delete_many_documents` los partidos que cumplen `query` y descuenta sus
+    valores de los sketches. Retorna lo mismo que `delete_many_documents`.
+    """
+    before = find_documents(query, collection_name, projection=source_projection()) if collection_name == "partidos" else []
+    deleted = delete_many_documents(query, collection_name)
+    if deleted and before:
+        update_sketches(removed=before)
+    return deleted
+
+def rebuild_sketches(collection_name="partidos"):
+    """
+    Recalcula todos los sketches desde la colección de partidos (descarta los valores
+    descontados acumulados). Retorna el número de sketches, o None si hubo un error.
+    """
+    grouped = _metric_values(find_documents(None, collection_name, projection=source_projection()))
+    with _update_lock:
+        if delete_many_documents({}, SKETCHES_COLLECTION) is None:
+            return None
+        documents = [
+            {"_id": sketch_id(liga, temporada, metric), "liga": liga, "temporada": temporada, "metrica": metric,
+             "added": KLLSketch().extend(values).to_dict(), "removed": KLLSketch().to_dict()}
+            for (liga, temporada, metric), values in grouped.items()
+        ]
+        inserted = insert_documents(documents, SKETCHES_COLLECTION)
+    invalidate_distributions()
+    return len(inserted) if len(inserted) == len(documents) else None
+
+class Distribution:
+    """Distribución de una métrica: valores añadidos menos valores descontados."""
+
+    def __init__(self, added=None, removed=None):
+        self.added = added or KLLSketch()
+        self.removed = removed or KLLSketch()
+
+    @property
+    def n(self):
+        return self.added.n - self.removed.n
+
+    def merge(self, other):
+        self.added.merge(other.added)
+        self.removed.merge(other.removed)
+        return self
+
+    def rank(self, value, inclusive=True):
+        return self.added.rank(value, inclusive) - self.removed.rank(value, inclusive)
+
+    def percentile(self, value):
+        """
+        Percentil (0 a 100) de `value`: porcentaje de valores menores más la mitad de los
+        iguales, así un valor muy repetido (p. ej. 1 tarjeta) no sale siempre en el extremo.
+        Retorna None si la distribución está vacía.
+        """
+        if self.n <= 0:
+            return None
+        midrank = (self.rank(value) + self.rank(value, inclusive=False)) / 2
+        return min(max(100 * midrank / self.n, 0.0), 100.0)
+
+    def quantile(self, q):
+        """Valor del cuantil `q` (0 a 1), o None si la distribución está vacía."""
+        if self.n <= 0:
+            return None
+        if not self.removed.n:
+            return self.added.quantile(q)
+        values, _ = self.added._weighted()
+        target = q * self.n
+        for value in values:
+            if self.rank(value) >= target:
+                return value
+        return values[-1]
+
+def get_distributions(keys):
+    """
+    Distribuciones de varias (liga, temporada, métrica) con una sola lectura; `temporada`
+    None combina todas las temporadas de la liga. Se guardan en caché DISTRIBUTION_CACHE_TTL
+    segundos y se invalidan al actualizar los sketches.
+    Retorna {clave: Distribution} (vacía si no hay datos).
+    """
+    now = time.monotonic()
+    result, missing = {}, []
+    with _distribution_cache_lock:
+        for key in set(keys):
+            cached = _distribution_cache.get(key)
+            if cached and now - cached[0] < DISTRIBUTION_CACHE_TTL:
+                result[key] = cached[1]
+            else:
+                missing.append(key)
+    if not missing:
+        return result
+
+    exact = [sketch_id(*key) for key in missing if key[1] is not None]
+    leagues = list({key[0] for key in missing if key[1] is None})
+    conditions = ([{"_id": {"$in": exact}}] if exact else []) + ([{"liga": {"$in": leagues}}] if leagues else [])
+    query = conditions[0] if len(conditions) == 1 else {"$or": conditions}
+    documents = find_documents(query, SKETCHES_COLLECTION)
+
+    # Solo se combinan las claves leídas ahora: las de la caché no se modifican nunca
+    fresh = {key: Distribution() for key in missing}
+    for document in documents:
+        distribution = Distribution(KLLSketch.from_dict(document["added"]), KLLSketch.from_dict(document["removed"]))
+        liga, temporada, metric = document["liga"], document["temporada"], document["metrica"]
+        if (liga, temporada, metric) in fresh:
+            fresh[(liga, temporada, metric)].merge(distribution)
+        if (liga, None, metric) in fresh:
+            fresh[(liga, None, metric)].merge(distribution)
+    with _distribution_cache_lock:
+        for key, distribution in fresh.items():
+            _distribution_cache[key] = (now, distribution)
+    result.update(fresh)
+    return result
+
+def get_distribution(metric, liga, temporada=None):
+    return get_distributions([(liga, temporada, metric)])[(liga, temporada, metric)]
+
+def get_percentile(metric, value, liga, temporada=None):
+    """
+    Percentil (0 a 100) de `value` en la métrica `metric` ("remates", "posesion" o
+    "tarjetas_amarillas") de la liga, en una temporada o en todas (`temporada` None).
+    Retorna None si no hay datos.
+    """
+    return get_distribution(metric, liga, temporada).percentile(value)
+
+def get_quantile(metric, q, liga, temporada=None):
+    """Valor del cuantil `q` (0 a 1) de la métrica en la liga (y temporada), o None."""
+    return get_distribution(metric, liga, temporada).quantile(q)
+
+def invalidate_distributions():
+    with _distribution_cache_lock:
+        _distribution_cache.clear()
+
+if __name__ == "__main__":
+    count = rebuild_sketches()
+    print(f"Sketches reconstruidos: {count}")
@@ -0,0 +1,659 @@
+# db/storage.py
+
+# Backends de almacenamiento intercambiables.
+#
+# Las funciones públicas de `db/queries.py` delegan en el backend activo, que se elige
+# con la variable de entorno STORAGE_BACKEND:
+#   STORAGE_BACKEND="mongo"   (por defecto) MongoDB/Atlas vía pymongo
+#   STORAGE_BACKEND="sqlite"  base de datos embebida en un archivo (SQLITE_PATH),
+#                             sin servidor; útil para pruebas, demos y análisis locales.
+#
+# Las funciones específicas de MongoDB (change streams, agregaciones, migraciones)
+# siguen usando `get_collection`, que retorna None con backends que no son Mongo.
+
+import base64
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from bson.objectid import ObjectId
+from db.mongo_config import get_db
+from utils.date_tools import to_utc_datetime
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "futbol_stats.db")
+
+def _utc_now():
+    """Marca de tiempo para `updated_at` (la usa el sondeo de cambios en servidores standalone)."""
+    return datetime.now(timezone.utc)
+
+def _as_object_id(document_id):
+    """Convierte un _id en cadena a ObjectId (deja otros tipos sin cambios)."""
+    if isinstance(document_id, str) and ObjectId.is_valid(document_id):
+        return ObjectId(document_id)
+    return document_id
+
+class StorageBackend:
+    """
+    Interfaz común de almacenamiento de documentos. Las consultas usan la sintaxis de
+    filtros de MongoDB (igualdad, $or, $and, $in, $nin, $gt, $gte, $lt, $lte, $ne, $exists).
+    """
+    name = None
+
+    def get_collection(self, collection_name="partidos"):
+        """Colección nativa de pymongo, o None si el backend no es MongoDB."""
+        return None
+
+    def insert_document(self, document, collection_name="partidos"):
+        raise NotImplementedError
+
+    def insert_documents(self, documents, collection_name="partidos"):
+        raise NotImplementedError
+
+    def find_documents(self, query=None, collection_name="partidos", projection=None):
+        raise NotImplementedError
+
+    def update_document(self, document_id, updates, collection_name="partidos"):
+        raise NotImplementedError
+
+    def delete_document(self, document_id, collection_name="partidos"):
+        raise NotImplementedError
+
+    def bulk_update_documents(self, updates_by_id, collection_name="partidos"):
+        raise NotImplementedError
+
+    def bulk_delete_documents(self, document_ids, collection_name="partidos"):
+        raise NotImplementedError
+
+    def bulk_update_if_match(self, updates_by_id, expected_by_id, collection_name="partidos"):
+        """
+        Como `bulk_update_documents`, pero cada documento solo se actualiza si sus campos
+        coinciden con `expected_by_id[_id]` ({campo: valor}; None = campo ausente).
+        Retorna el número de documentos actualizados, o None si hubo un error.
+        """
+        raise NotImplementedError
+
+    def delete_many_documents(self, query, collection_name="partidos"):
+        raise NotImplementedError
+
+    def distinct(self, field, query=None, collection_name="partidos"):
+        raise NotImplementedError
+
+    def find_batch(self, query=None, collection_name="partidos", after_id=None, limit=1000, projection=None):
+        """
+        Hasta `limit` documentos que cumplen `query` con `_id` mayor que `after_id`, en
+        orden de `_id` (para recorrer una colección por lotes). Retorna None si falla.
+        """
+        raise NotImplementedError
+
+    def extend_bounds(self, document_id, lower, upper, on_insert, collection_name):
+        """
+        Upsert atómico de `document_id`: cada campo de `lower` guarda el mínimo entre su
+        valor y el nuevo ($min), cada campo de `upper` el máximo ($max), y `on_insert`
+        solo se escribe al crear el documento ($setOnInsert). Retorna True si se aplicó.
+        """
+        raise NotImplementedError
+
+    def ensure_indexes(self, collection_name="partidos"):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MongoBackend(StorageBackend):
+    """Backend sobre MongoDB/Atlas (conexión diferida, ver `db.mongo_config.get_db`)."""
+    name = "mongo"
+
+    def get_collection(self, collection_name="partidos"):
+        db = get_db()
+        if db is not None:
+            return db[collection_name]
+        return None
+
+    def insert_document(self, document, collection_name="partidos"):
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            try:
+                document = dict(document, updated_at=_utc_now())
+                result = collection.insert_one(document)
+                print(f"Documento insertado con ID: {result.inserted_id}")
+                return result.inserted_id
+            except Exception as e:
+                print(f"Error al insertar documento: {e}")
+                return None
+        return None
+
+    def insert_documents(self, documents, collection_name="partidos"):
+        collection = self.get_collection(collection_name)
+        if collection is not None and documents:
+            try:
+                now = _utc_now()
+                result = collection.insert_many([dict(d, updated_at=now) for d in documents], ordered=False)
+                print(f"Insertados {len(result.inserted_ids)} documentos.")
+                return result.inserted_ids
+            except Exception as e:
+                print(f"Error al insertar documentos: {e}")
+                return []
+        return []
+
+    def find_documents(self, query=None, collection_name="partidos", projection=None):
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            try:
+                if query is None:
+                    query = {}
+                documents = list(collection.find(query, projection))
+                print(f"Encontrados {len(documents)} documentos.")
+                return documents
+            except Exception as e:
+                print(f"Error al buscar documentos: {e}")
+                return []
+        return []
+
+    def update_document(self, document_id, updates, collection_name="partidos"):
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            try:
+                # Asegura que el ID sea un ObjectId
+                if isinstance(document_id, str):
+                    document_id = ObjectId(document_id)
+
+                result = collection.update_one({"_id": document_id}, {"$set": {**updates, "updated_at": _utc_now()}})
+                if result.matched_count > 0:
+                    print(f"Documento con ID {document_id} actualizado. Modificados: {result.modified_count}")
+                    return True
+                else:
+                    print(f"No se encontró documento con ID {document_id} para actualizar.")
+                    return False
+            except Exception as e:
+                print(f"Error al actualizar documento con ID {document_id}: {e}")
+                return False
+        return False
+
+    def delete_document(self, document_id, collection_name="partidos"):
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            try:
+                # Asegura que el ID sea un ObjectId
+                if isinstance(document_id, str):
+                    document_id = ObjectId(document_id)
+
+                result = collection.delete_one({"_id": document_id})
+                if result.deleted_count > 0:
+                    print(f"Documento con ID {document_id} eliminado.")
+                    return True
+                else:
+                    print(f"No se encontró documento con ID {document_id} para eliminar.")
+                    return False
+            except Exception as e:
+                print(f"Error al eliminar documento con ID {document_id}: {e}")
+                return False
+        return False
+
+    def bulk_write(self, operations, collection_name="partidos"):
+        """Ejecuta operaciones de pymongo en un solo `bulk_write` no ordenado."""
+        collection = self.get_collection(collection_name)
+        if collection is not None and operations:
+            try:
+                result = collection.bulk_write(operations, ordered=False)
+                print(f"bulk_write: {len(operations)} operaciones "
+                      f"(modificados: {result.modified_count}, eliminados: {result.deleted_count}, "
+                      f"insertados: {result.upserted_count + result.inserted_count}).")
+                return result
+            except Exception as e:
+                print(f"Error en bulk_write: {e}")
+                return None
+        return None
+
+    def bulk_update_documents(self, updates_by_id, collection_name="partidos"):
+        from pymongo import UpdateOne
+
+        now = _utc_now()
+        operations = [
+            UpdateOne({"_id": _as_object_id(document_id)}, {"$set": {**updates, "updated_at": now}})
+            for document_id, updates in updates_by_id.items() if updates
+        ]
+        result = self.bulk_write(operations, collection_name)
+        return result.matched_count if result is not None else None
+
+    def bulk_update_if_match(self, updates_by_id, expected_by_id, collection_name="partidos"):
+        from pymongo import UpdateOne
+
+        now = _utc_now()
+        operations = [
+            UpdateOne({**expected_by_id.get(document_id, {}), "_id": _as_object_id(document_id)},
+                      {"$set": {**updates, "updated_at": now}})
+            for document_id, updates in updates_by_id.items() if updates
+        ]
+        result = self.bulk_write(operations, collection_name)
+        return result.matched_count if result is not None else None
+
+    def bulk_delete_documents(self, document_ids, collection_name="partidos"):
+        from pymongo import DeleteOne
+
+        operations = [DeleteOne({"_id": _as_object_id(document_id)}) for document_id in document_ids]
+        result = self.bulk_write(operations, collection_name)
+        return result.deleted_count if result is not None else None
+
+    def delete_many_documents(self, query, collection_name="partidos"):
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            try:
+                result = collection.delete_many(query)
+                print(f"Eliminados {result.deleted_count} documentos que cumplen {query}.")
+                return result.deleted_count
+            except Exception as e:
+                print(f"Error al eliminar documentos: {e}")
+                return None
+        return None
+
+    def distinct(self, field, query=None, collection_name="partidos"):
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            try:
+                return collection.distinct(field, query or {})
+            except Exception as e:
+                print(f"Error al obtener valores distintos de '{field}': {e}")
+                return []
+        return []
+
+    def find_batch(self, query=None, collection_name="partidos", after_id=None, limit=1000, projection=None):
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            try:
+                if after_id is not None:
+                    query = {"$and": [query or {}, {"_id": {"$gt": _as_object_id(after_id)}}]}
+                return list(collection.find(query or {}, projection).sort("_id", 1).limit(limit))
+            except Exception as e:
+                print(f"Error al buscar documentos: {e}")
+                return None
+        return None
+
+    def extend_bounds(self, document_id, lower, upper, on_insert, collection_name):
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            update = {}
+            if lower:
+                update["$min"] = lower
+            if upper:
+                update["$max"] = upper
+            on_insert = {k: v for k, v in on_insert.items() if k not in lower and k not in upper}
+            if on_insert:
+                update["$setOnInsert"] = on_insert
+            try:
+                collection.update_one({"_id": document_id}, update, upsert=True)
+                return True
+            except Exception as e:
+                print(f"Error al actualizar {document_id}: {e}")
+                return False
+        return False
+
+    def ensure_indexes(self, collection_name="partidos"):
+        collection = self.get_collection(collection_name)
+        if collection is not None:
+            try:
+                return [
+                    collection.create_index("fixture_id"),
+                    collection.create_index([("fecha", -1)]),
+                    collection.create_index([("liga", 1), ("fecha", -1)]),
+                    collection.create_index("equipo_local"),
+                    collection.create_index("equipo_visitante"),
+                    collection.create_index("updated_at"),
+                ]
+            except Exception as e:
+                print(f"Error al crear índices: {e}")
+                return []
+        return []
+
+    def close(self):
+        from db.mongo_config import close_mongodb_connection
+        close_mongodb_connection()
+
+# Campos que se guardan como fecha; en SQLite se almacenan como texto ISO de ancho fijo
+# para que la comparación de textos coincida con el orden cronológico.
+SQLITE_DATE_FIELDS = ("fecha", "updated_at")
+# Campos con índice de expresión en SQLite (los que filtra el dashboard)
+SQLITE_INDEXED_FIELDS = ("fixture_id", "fecha", "liga", "equipo_local", "equipo_visitante")
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _sqlite_value(value):
+    """Convierte un valor de Python al tipo con el que se guarda/compara en SQLite."""
+    if isinstance(value, datetime):
+        return to_utc_datetime(value).isoformat(timespec="microseconds")
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        # Binarios (p. ej. los arrays empaquetados de `eventos`) como base64
+        return {"$binary": base64.b64encode(value).decode("ascii")}
+    converted = _sqlite_value(value)
+    if converted is value:
+        raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+    return converted
+
+def _json_object_hook(obj):
+    if set(obj) == {"$binary"}:
+        return base64.b64decode(obj["$binary"])
+    return obj
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend embebido sobre SQLite (módulo estándar `sqlite3`, sin dependencias).
+    Cada colección es una tabla (id TEXT PRIMARY KEY, doc TEXT con el JSON del documento)
+    con índices de expresión sobre `json_extract` para los campos que filtra el dashboard.
+    """
+    name = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+        self._tables = set()
+
+    def _table(self, collection_name):
+        if not _IDENTIFIER.match(collection_name):
+            raise ValueError(f"Nombre de colección inválido: {collection_name}")
+        if collection_name not in self._tables:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {collection_name} (id TEXT PRIMARY KEY, doc TEXT NOT NULL)"
+                )
+            self._tables.add(collection_name)
+        return collection_name
+
+    @staticmethod
+    def _field(field):
+        if field == "_id":
+            return "id"
+        if not all(_IDENTIFIER.match(part) for part in field.split(".")):
+            raise ValueError(f"Nombre de campo inválido: {field}")
+        return f"json_extract(doc, '$.{field}')"
+
+    def _where(self, query):
+        """Traduce un filtro estilo MongoDB a (cláusula SQL, parámetros)."""
+        clauses, params = [], []
+        for key, condition in (query or {}).items():
+            if key in ("$or", "$and"):
+                parts = [self._where(sub) for sub in condition]
+                joiner = " OR " if key == "$or" else " AND "
+                clauses.append("(" + joiner.join(f"({sql})" for sql, _ in parts) + ")")
+                for _, sub_params in parts:
+                    params.extend(sub_params)
+                continue
+
+            column = self._field(key)
+            if isinstance(condition, dict) and any(op.startswith("$") for op in condition):
+                for op, operand in condition.items():
+                    if op in ("$in", "$nin"):
+                        values = [_sqlite_value(v) for v in operand]
+                        if not values:
+                            clauses.append("0" if op == "$in" else "1")
+                            continue
+                        placeholders = ", ".join("?" for _ in values)
+                        clauses.append(f"{column} {'NOT ' if op == '$nin' else ''}IN ({placeholders})")
+                        params.extend(values)
+                    elif op == "$exists":
+                        clauses.append(f"{column} IS {'NOT ' if operand else ''}NULL")
+                    elif op == "$ne":
+                        clauses.append(f"({column} IS NULL OR {column} != ?)")
+                        params.append(_sqlite_value(operand))
+                    else:
+                        sql_op = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}.get(op)
+                        if sql_op is None:
+                            raise ValueError(f"Operador no soportado en SQLite: {op}")
+                        clauses.append(f"{column} {sql_op} ?")
+                        params.append(_sqlite_value(operand))
+            elif condition is None:
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(_sqlite_value(condition))
+        return (" AND ".join(clauses) or "1"), params
+
+    @staticmethod
+    def _decode(row_id, doc_json):
+        document = json.loads(doc_json, object_hook=_json_object_hook)
+        document["_id"] = row_id
+        for field in SQLITE_DATE_FIELDS:
+            if isinstance(document.get(field), str):
+                document[field] = to_utc_datetime(document[field])
+        return document
+
+    @staticmethod
+    def _encode(document):
+        body = {k: v for k, v in document.items() if k != "_id"}
+        return json.dumps(body, default=_json_default, ensure_ascii=False)
+
+    def insert_document(self, document, collection_name="partidos"):
+        inserted = self.insert_documents([document], collection_name)
+        return inserted[0] if inserted else None
+
+    def insert_documents(self, documents, collection_name="partidos"):
+        table = self._table(collection_name)
+        now = _utc_now()
+        rows = []
+        for document in documents:
+            document_id = str(document.get("_id") or ObjectId())
+            rows.append((document_id, self._encode(dict(document, updated_at=now))))
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(f"INSERT INTO {table} (id, doc) VALUES (?, ?)", rows)
+            print(f"Insertados {len(rows)} documentos.")
+            return [row[0] for row in rows]
+        except sqlite3.Error as e:
+            print(f"Error al insertar documentos: {e}")
+            return []
+
+    def find_documents(self, query=None, collection_name="partidos", projection=None):
+        table = self._table(collection_name)
+        try:
+            where, params = self._where(query)
+            with self._lock:
+                rows = self._conn.execute(f"SELECT id, doc FROM {table} WHERE {where}", params).fetchall()
+            documents = [self._decode(row_id, doc) for row_id, doc in rows]
+            if projection:
+                # Solo proyecciones de inclusión ({campo: 1}); `_id` siempre se incluye
+                fields = {field for field, include in projection.items() if include} | {"_id"}
+                documents = [{k: v for k, v in document.items() if k in fields} for document in documents]
+            print(f"Encontrados {len(documents)} documentos.")
+            return documents
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error al buscar documentos: {e}")
+            return []
+
+    def update_document(self, document_id, updates, collection_name="partidos"):
+        return bool(self.bulk_update_documents({document_id: updates}, collection_name))
+
+    def delete_document(self, document_id, collection_name="partidos"):
+        return bool(self.bulk_delete_documents([document_id], collection_name))
+
+    def bulk_update_documents(self, updates_by_id, collection_name="partidos"):
+        table = self._table(collection_name)
+        now = _utc_now()
+        matched = 0
+        try:
+            with self._lock, self._conn:
+                for document_id, updates in updates_by_id.items():
+                    if not updates:
+                        continue
+                    patch = self._encode(dict(updates, updated_at=now))
+                    cursor = self._conn.execute(
+                        f"UPDATE {table} SET doc = json_patch(doc, ?) WHERE id = ?", (patch, str(document_id))
+                    )
+                    matched += cursor.rowcount
+            print(f"Actualizados {matched} documentos.")
+            return matched
+        except sqlite3.Error as e:
+            print(f"Error al actualizar documentos: {e}")
+            return None
+
+    def bulk_update_if_match(self, updates_by_id, expected_by_id, collection_name="partidos"):
+        table = self._table(collection_name)
+        now = _utc_now()
+        matched = 0
+        try:
+            with self._lock, self._conn:
+                for document_id, updates in updates_by_id.items():
+                    if not updates:
+                        continue
+                    conditions, params = ["id = ?"], [str(document_id)]
+                    for field, value in expected_by_id.get(document_id, {}).items():
+                        conditions.append(f"{self._field(field)} IS ?")
+                        params.append(_sqlite_value(value))
+                    patch = self._encode(dict(updates, updated_at=now))
+                    cursor = self._conn.execute(
+                        f"UPDATE {table} SET doc = json_patch(doc, ?) WHERE {' AND '.join(conditions)}",
+                        [patch] + params
+                    )
+                    matched += cursor.rowcount
+            return matched
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error al actualizar documentos: {e}")
+            return None
+
+    def bulk_delete_documents(self, document_ids, collection_name="partidos"):
+        table = self._table(collection_name)
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.executemany(
+                    f"DELETE FROM {table} WHERE id = ?", [(str(document_id),) for document_id in document_ids]
+                )
+            print(f"Eliminados {cursor.rowcount} documentos.")
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Error al eliminar documentos: {e}")
+            return None
+
+    def delete_many_documents(self, query, collection_name="partidos"):
+        table = self._table(collection_name)
+        try:
+            where, params = self._where(query)
+            with self._lock, self._conn:
+                cursor = self._conn.execute(f"DELETE FROM {table} WHERE {where}", params)
+            print(f"Eliminados {cursor.rowcount} documentos que cumplen {query}.")
+            return cursor.rowcount
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error al eliminar documentos: {e}")
+            return None
+
+    def distinct(self, field, query=None, collection_name="partidos"):
+        table = self._table(collection_name)
+        try:
+            column = self._field(field)
+            where, params = self._where(query)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT DISTINCT {column} FROM {table} WHERE {where} AND {column} IS NOT NULL", params
+                ).fetchall()
+            return [row[0] for row in rows]
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error al obtener valores distintos de '{field}': {e}")
+            return []
+
+    def find_batch(self, query=None, collection_name="partidos", after_id=None, limit=1000, projection=None):
+        table = self._table(collection_name)
+        try:
+            where, params = self._where(query)
+            if after_id is not None:
+                where, params = f"({where}) AND id > ?", params + [str(after_id)]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, doc FROM {table} WHERE {where} ORDER BY id LIMIT ?", params + [limit]
+                ).fetchall()
+            documents = [self._decode(row_id, doc) for row_id, doc in rows]
+            if projection:
+                fields = {field for field, include in projection.items() if include} | {"_id"}
+                documents = [{k: v for k, v in document.items() if k in fields} for document in documents]
+            return documents
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error al buscar documentos: {e}")
+            return None
+
+    def extend_bounds(self, document_id, lower, upper, on_insert, collection_name):
+        table = self._table(collection_name)
+        # Una sola sentencia INSERT ... ON CONFLICT: atómica también entre procesos
+        assignments, params = [], []
+        for fields, keep in ((lower, "<="), (upper, ">=")):
+            for field, value in fields.items():
+                column = self._field(field)
+                assignments.append(f"'$.{field}', CASE WHEN {column} IS NOT NULL AND {column} {keep} ? "
+                                   f"THEN {column} ELSE ? END")
+                params.extend([_sqlite_value(value), _sqlite_value(value)])
+        document = self._encode({**on_insert, **lower, **upper})
+        conflict = f"UPDATE SET doc = json_set(doc, {', '.join(assignments)})" if assignments else "NOTHING"
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    f"INSERT INTO {table} (id, doc) VALUES (?, ?) ON CONFLICT(id) DO {conflict}",
+                    [str(document_id), document] + params
+                )
+            return True
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error al actualizar {document_id}: {e}")
+            return False
+
+    def ensure_indexes(self, collection_name="partidos"):
+        table = self._table(collection_name)
+        names = []
+        with self._lock, self._conn:
+            for field in SQLITE_INDEXED_FIELDS:
+                name = f"idx_{table}_{field}"
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({self._field(field)})")
+                names.append(name)
+        return names
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+BACKENDS = {
+    "mongo": MongoBackend,
+    "sqlite": SQLiteBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """
+    Retorna el backend configurado en STORAGE_BACKEND (se crea en el primer uso),
+    particionado por temporada si PARTITION_BY_SEASON está activo (ver db/partitions.py).
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_class = BACKENDS.get(STORAGE_BACKEND)
+                if backend_class is None:
+                    raise ValueError(f"STORAGE_BACKEND desconocido: {STORAGE_BACKEND} (opciones: {', '.join(BACKENDS)})")
+                backend = backend_class()
+                from db.partitions import PARTITION_BY_SEASON, PartitionedBackend
+                _backend = PartitionedBackend(backend) if PARTITION_BY_SEASON else backend
+    return _backend
+
+def close_backend():
+    """
+    Cierra el backend activo (el pool de conexiones de MongoDB o la conexión de SQLite),
+    compartido por todas las sesiones; el siguiente `get_backend` crea uno nuevo.
+    """
+    global _backend
+    with _backend_lock:
+        backend, _backend = _backend, None
+    if backend is not None:
+        backend.close()
+
+def set_backend(backend):
+    """Reemplaza el backend activo (p. ej. en benchmarks o pruebas). Retorna el anterior."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
@@ -0,0 +1,256 @@
+# db/team_registry.py
+
+# Registro canónico de equipos (colección `equipos`).
+# Un mismo club llega con nombres distintos según la fuente ("Man Utd" en nuestras
+# muestras, "Manchester United" en la API). El registro guarda un documento por club:
+#   {"_id": "manchester-united", "nombre": "Manchester United", "aliases": ["man utd", ...]}
+# y resuelve nombres entrantes a su ID canónico por alias exacto o, si no existe,
+# por similitud de n-gramas / abreviatura contra un índice en memoria.
+
+import re
+import threading
+from collections import defaultdict
+
+from db.queries import get_collection, bulk_write_operations, bulk_update_documents
+from utils.team_index import fold_text, trigrams
+
+TEAMS_COLLECTION = "equipos"
+
+# Umbral de similitud para asociar un nombre nuevo a un equipo existente
+SIMILARITY_THRESHOLD = 0.7
+
+# Palabras que distinguen a equipos filiales, juveniles o femeninos del primer equipo;
+# dos nombres solo se asocian si coinciden en estas palabras
+DISTINGUISHING_TOKENS = {"ii", "iii", "b", "c", "u17", "u19", "u20", "u21", "u23", "w", "women", "femenino", "reserves"}
+
+# Alias conocidos que la similitud de n-gramas no puede resolver por sí sola
+SEED_ALIASES = {
+    "Manchester United": ["Man Utd", "Man United", "Manchester Utd"],
+    "Manchester City": ["Man City"],
+    "Tottenham Hotspur": ["Tottenham", "Spurs"],
+    "Wolverhampton Wanderers": ["Wolves"],
+    "Paris Saint Germain": ["PSG", "Paris SG"],
+    "Bayern Munich": ["Bayern München", "FC Bayern"],
+    "Borussia Dortmund": ["Dortmund", "BVB"],
+    "Olympique de Marseille": ["Marseille", "OM"],
+    "Atletico Madrid": ["Atlético de Madrid", "Atl. Madrid"],
+    "Inter": ["Inter Milan", "Internazionale"],
+}
+
+def team_slug(name):
+    """ID canónico legible a partir del nombre: "Manchester United" -> "manchester-united"."""
+    return re.sub(r"\s+", "-", fold_text(name))
+
+def _distinguishing(folded_name):
+    """Palabras del nombre que deben coincidir exactamente (filiales y cualquier número)."""
+    return {t for t in folded_name.split(" ") if t in DISTINGUISHING_TOKENS or any(c.isdigit() for c in t)}
+
+def _is_abbreviation(short, long):
+    """
+    Indica si `short` es una abreviatura palabra a palabra de `long`:
+    cada palabra corta es una subsecuencia (con la misma inicial) de la palabra larga
+    correspondiente ("man utd" -> "manchester united"). Solo se aplica a nombres de
+    varias palabras: con una sola, clubes distintos coinciden ("porto" -> "portsmouth").
+    """
+    short_words, long_words = short.split(" "), long.split(" ")
+    if len(short_words) < 2 or len(short_words) != len(long_words) or short == long:
+        return False
+    for s, l in zip(short_words, long_words):
+        if not s or s[0] != l[0]:
+            return False
+        position = 0
+        for ch in s:
+            position = l.find(ch, position) + 1
+            if position == 0:
+                return False
+    return True
+
+class TeamRegistry:
+    """
+    Caché en memoria de la colección `equipos` con un índice de alias y otro de trigramas.
+    Las resoluciones nuevas (alias aprendidos y equipos creados) se persisten en lote.
+    """
+    def __init__(self, collection_name=TEAMS_COLLECTION, threshold=SIMILARITY_THRESHOLD):
+        self.collection_name = collection_name
+        self.threshold = threshold
+        self._teams = {}                     # id -> nombre canónico
+        self._alias_to_id = {}               # alias normalizado -> id
+        self._postings = defaultdict(set)    # trigrama -> alias normalizados
+        self._by_initial = defaultdict(set)  # inicial -> alias normalizados (para abreviaturas)
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def _index_alias(self, folded_alias, team_id):
+        self._alias_to_id[folded_alias] = team_id
+        self._by_initial[folded_alias[:1]].add(folded_alias)
+        for gram in trigrams(folded_alias):
+            self._postings[gram].add(folded_alias)
+
+    def load(self):
+        """Carga el registro desde MongoDB (una sola consulta)."""
+        collection = get_collection(self.collection_name)
+        with self._lock:
+            self._teams, self._alias_to_id = {}, {}
+            self._postings, self._by_initial = defaultdict(set), defaultdict(set)
+            if collection is not None:
+                for team in collection.find({}, {"nombre": 1, "aliases": 1}):
+                    self._teams[team["_id"]] = team["nombre"]
+                    self._index_alias(fold_text(team["nombre"]), team["_id"])
+                    for alias in team.get("aliases", []):
+                        self._index_alias(alias, team["_id"])
+            self.loaded = True
+        print(f"Registro de equipos cargado: {len(self._teams)} equipos, {len(self._alias_to_id)} alias.")
+        return self
+
+    def _best_match(self, folded_name):
+        """Retorna (id, similitud) del alias más parecido, o (None, 0.0)."""
+        query_grams = trigrams(folded_name)
+        shared_counts = defaultdict(int)
+        for gram in query_grams:
+            for alias in self._postings.get(gram, ()):
+                shared_counts[alias] += 1
+
+        best_id, best_score = None, 0.0
+        marks = _distinguishing(folded_name)
+        for alias, shared in shared_counts.items():
+            if _distinguishing(alias) != marks:
+                continue
+            score = shared / (len(query_grams) + len(trigrams(alias)) - shared)
+            if score > best_score:
+                best_id, best_score = self._alias_to_id[alias], score
+
+        if best_score < self.threshold:
+            # Abreviaturas ("man utd") no comparten suficientes trigramas con el nombre completo.
+            # Solo se aceptan si corresponden a un único equipo; si hay varios, no se asocia
+            candidates = {
+                self._alias_to_id[alias] for alias in self._by_initial.get(folded_name[:1], ())
+                if _distinguishing(alias) == marks and _is_abbreviation(folded_name, alias)
+            }
+            if len(candidates) == 1:
+                return candidates.pop(), self.threshold
+        return best_id, best_score
+
+    def canonicalize_batch(self, names, create_missing=True):
+        """
+        Resuelve una lista de nombres a equipos canónicos.
+        Retorna un diccionario {nombre: {"id": ..., "nombre": ...}}; los nombres que no
+        se pueden resolver (y `create_missing` es False) no aparecen en el resultado.
+        Los alias aprendidos y los equipos nuevos se guardan con un único bulk_write.
+        """
+        from pymongo import UpdateOne
+
+        if not self.loaded:
+            self.load()
+
+        resolved = {}
+        operations = []
+        with self._lock:
+            for name in dict.fromkeys(n for n in names if n):
+                folded = fold_text(name)
+                team_id = self._alias_to_id.get(folded)
+                if team_id is None:
+                    team_id, score = self._best_match(folded)
+                    if team_id is not None and score >= self.threshold:
+                        operations.append(UpdateOne({"_id": team_id}, {"$addToSet": {"aliases": folded}}))
+                    elif create_missing:
+                        team_id = team_slug(name)
+                        self._teams.setdefault(team_id, name)
+                        operations.append(UpdateOne(
+                            {"_id": team_id},
+                            {"$setOnInsert": {"nombre": name}, "$addToSet": {"aliases": folded}},
+                            upsert=True
+                        ))
+                    else:
+                        continue
+                    self._index_alias(folded, team_id)
+                resolved[name] = {"id": team_id, "nombre": self._teams[team_id]}
+
+        if operations:
+            bulk_write_operations(operations, self.collection_name)
+        return resolved
+
+    def seed(self, seed_aliases=SEED_ALIASES):
+        """Crea/actualiza los equipos y alias conocidos de `SEED_ALIASES`."""
+        from pymongo import UpdateOne
+
+        operations = [
+            UpdateOne(
+                {"_id": team_slug(name)},
+                {"$setOnInsert": {"nombre": name},
+                 "$addToSet": {"aliases": {"$each": [fold_text(a) for a in [name, *aliases]]}}},
+                upsert=True
+            )
+            for name, aliases in seed_aliases.items()
+        ]
+        bulk_write_operations(operations, self.collection_name)
+        return self.load()
+
+_registry = None
+
+def get_team_registry():
+    """Retorna el registro compartido, cargándolo en el primer uso."""
+    global _registry
+    if _registry is None:
+        _registry = TeamRegistry().load()
+    return _registry
+
+def canonicalize_matches(matches, registry=None):
+    """
+    Reemplaza en cada partido `equipo_local`/`equipo_visitante` por su nombre canónico
+    y añade `equipo_local_id`/`equipo_visitante_id`. Resuelve todos los nombres en un lote.
+    Retorna la misma lista de partidos.
+    """
+    registry = registry or get_team_registry()
+    names = [m.get(field) for m in matches for field in ("equipo_local", "equipo_visitante")]
+    resolved = registry.canonicalize_batch(names)
+    for match in matches:
+        for field in ("equipo_local", "equipo_visitante"):
+            team = resolved.get(match.get(field))
+            if team:
+                match[field] = team["nombre"]
+                match[f"{field}_id"] = team["id"]
+    return matches
+
+def recanonicalize_existing(batch_size=1000, collection_name="partidos"):
+    """
+    Trabajo por lotes que recorre los partidos guardados en orden de `_id` y reescribe
+    los nombres de equipo a su forma canónica (un bulk_write por lote, solo con los
+    documentos que cambian). Retorna el número de documentos actualizados.
+    """
+    collection = get_collection(collection_name)
+    if collection is None:
+        return 0
+
+    registry = get_team_registry()
+    projection = {"equipo_local": 1, "equipo_visitante": 1, "equipo_local_id": 1, "equipo_visitante_id": 1}
+    last_id = None
+    updated = 0
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = list(collection.find(query, projection).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        names = [doc.get(field) for doc in batch for field in ("equipo_local", "equipo_visitante")]
+        resolved = registry.canonicalize_batch(names)
+        changes_by_id = {}
+        for doc in batch:
+            changes = {}
+            for field in ("equipo_local", "equipo_visitante"):
+                team = resolved.get(doc.get(field))
+                if team and (doc.get(field) != team["nombre"] or doc.get(f"{field}_id") != team["id"]):
+                    changes[field] = team["nombre"]
+                    changes[f"{field}_id"] = team["id"]
+            if changes:
+                changes_by_id[doc["_id"]] = changes
+        if changes_by_id:
+            updated += bulk_update_documents(changes_by_id, collection_name) or 0
+        print(f"Re-canonicalizados {updated} partidos (último _id: {last_id}).")
+    return updated
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    registry = TeamRegistry().seed()
+    print(registry.canonicalize_batch(["Man Utd", "Manchester United", "Bayern München", "Real Betis"]))
+    print(f"Partidos actualizados: {recanonicalize_existing()}")
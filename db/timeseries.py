@@ -0,0 +1,185 @@
+# db/timeseries.py
+
+# Series temporales para el panel de gráficos, con un presupuesto fijo de puntos.
+#
+# Para cada ventana [inicio, fin] se cuenta primero cuántos partidos hay:
+#   - Si caben en RAW_LIMIT_FACTOR × presupuesto, se leen solo los campos necesarios
+#     (una fila por partido) y la serie se reduce con LTTB (utils/downsampling.py).
+#   - Si no, el servidor agrega por periodos con $dateTrunc (día, semana, mes o año,
+#     con `binSize` para que el número de periodos no supere el presupuesto) y solo
+#     viajan los promedios por periodo.
+# Con backends que no son MongoDB (ver db/storage.py) la agregación se hace en Python.
+
+import math
+from datetime import datetime, timedelta
+
+from db.queries import find_documents, get_collection
+from utils.downsampling import lttb
+
+# Número máximo de puntos por gráfico
+DEFAULT_POINT_BUDGET = 300
+# Por encima de presupuesto × este factor se agrega en el servidor en lugar de leer partidos
+RAW_LIMIT_FACTOR = 20
+# Ventana para la forma de un equipo (promedio de puntos de los últimos N partidos)
+FORM_WINDOW = 5
+
+# Unidades de $dateTrunc y su duración aproximada en días, de la más fina a la más gruesa
+DATE_UNITS = [("day", 1), ("week", 7), ("month", 30.44), ("year", 365.25)]
+
+# Las fechas son UTC sin zona horaria; se pasan a segundos desde esta referencia para LTTB
+EPOCH = datetime(1970, 1, 1)
+
+SERIES = {
+    "goles": "Goles por partido",
+    "posesion": "Posesión (%)",
+    "forma": f"Forma (puntos, media de {FORM_WINDOW} partidos)",
+}
+
+def choose_bucket(start, end, budget):
+    """
+    Elige la unidad de $dateTrunc y el `binSize` para que [start, end] quede dividido
+    en como máximo `budget` periodos. Retorna (unidad, bin_size).
+    """
+    span_days = max((end - start).total_seconds() / 86400, 1)
+    for unit, unit_days in DATE_UNITS:
+        if span_days / unit_days <= budget:
+            return unit, 1
+    unit, unit_days = DATE_UNITS[-1]
+    return unit, math.ceil(span_days / unit_days / budget)
+
+def truncate_date(value, unit, bin_size=1):
+    """Equivalente en Python de $dateTrunc (semanas desde el lunes, años agrupados desde 2000)."""
+    if unit == "day":
+        return datetime(value.year, value.month, value.day)
+    if unit == "week":
+        day = datetime(value.year, value.month, value.day)
+        return day - timedelta(days=day.weekday())
+    if unit == "month":
+        return datetime(value.year, value.month, 1)
+    return datetime(2000 + (value.year - 2000) // bin_size * bin_size, 1, 1)
+
+def _window_query(query, start, end):
+    """Combina la consulta base con la ventana de fechas del gráfico."""
+    window = {"fecha": {"$gte": start, "$lte": end}}
+    base = {k: v for k, v in (query or {}).items() if k != "fecha"}
+    return {"$and": [base, window]} if base else window
+
+def _team_query(team):
+    return {"$or": [{"equipo_local": team}, {"equipo_visitante": team}]}
+
+def _value_expression(kind, team):
+    """Expresión de agregación con el valor de un partido para la serie `kind`."""
+    if kind == "goles":
+        return {"$add": ["$goles_local", "$goles_visitante"]}
+    is_local = {"$eq": ["$equipo_local", team]}
+    if kind == "posesion":
+        if team is None:
+            return "$posesion_local"
+        return {"$cond": [is_local, "$posesion_local", "$posesion_visitante"]}
+    # forma: 3 puntos por victoria, 1 por empate
+    own = {"$cond": [is_local, "$goles_local", "$goles_visitante"]}
+    other = {"$cond": [is_local, "$goles_visitante", "$goles_local"]}
+    return {"$switch": {"branches": [
+        {"case": {"$gt": [own, other]}, "then": 3},
+        {"case": {"$eq": [own, other]}, "then": 1},
+    ], "default": 0}}
+
+def match_value(kind, document, team=None):
+    """Valor de un partido para la serie `kind` (None si faltan datos)."""
+    local, visitante = document.get("goles_local"), document.get("goles_visitante")
+    if kind == "goles":
+        return local + visitante if local is not None and visitante is not None else None
+    is_local = document.get("equipo_local") == team
+    if kind == "posesion":
+        return document.get("posesion_local" if team is None or is_local else "posesion_visitante")
+    if local is None or visitante is None:
+        return None
+    own, other = (local, visitante) if is_local else (visitante, local)
+    return 3 if own > other else 1 if own == other else 0
+
+def date_extent(query=None):
+    """Retorna (fecha mínima, fecha máxima) de los partidos que cumplen `query`, o (None, None)."""
+    collection = get_collection()
+    if collection is not None:
+        result = list(collection.aggregate([
+            {"$match": query or {}},
+            {"$group": {"_id": None, "min": {"$min": "$fecha"}, "max": {"$max": "$fecha"}}},
+        ]))
+        return (result[0]["min"], result[0]["max"]) if result else (None, None)
+    dates = [doc["fecha"] for doc in find_documents(query) if isinstance(doc.get("fecha"), datetime)]
+    return (min(dates), max(dates)) if dates else (None, None)
+
+def _count(query):
+    collection = get_collection()
+    if collection is not None:
+        return collection.count_documents(query)
+    return len(find_documents(query))
+
+def _raw_series(kind, query, team, budget):
+    """Un punto por partido (forma: media móvil), reducido con LTTB. Retorna [(fecha, valor)]."""
+    collection = get_collection()
+    projection = {"fecha": 1, "equipo_local": 1, "goles_local": 1, "goles_visitante": 1,
+                  "posesion_local": 1, "posesion_visitante": 1}
+    if collection is not None:
+        documents = list(collection.find(query, projection).sort("fecha", 1))
+    else:
+        documents = sorted(find_documents(query), key=lambda d: d["fecha"])
+
+    points = []
+    recent = []
+    for document in documents:
+        value = match_value(kind, document, team)
+        if value is None:
+            continue
+        if kind == "forma":
+            recent = (recent + [value])[-FORM_WINDOW:]
+            value = sum(recent) / len(recent)
+        points.append(((document["fecha"] - EPOCH).total_seconds(), float(value)))
+    return [(EPOCH + timedelta(seconds=x), y) for x, y in lttb(points, budget)]
+
+def _bucketed_series(kind, query, team, unit, bin_size):
+    """Promedio por periodo de $dateTrunc. Retorna [(inicio del periodo, valor)]."""
+    collection = get_collection()
+    if collection is not None:
+        pipeline = [
+            {"$match": query},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": "$fecha", "unit": unit, "binSize": bin_size, "startOfWeek": "monday"}},
+                "value": {"$avg": _value_expression(kind, team)},
+            }},
+            {"$match": {"value": {"$ne": None}}},
+            {"$sort": {"_id": 1}},
+        ]
+        return [(row["_id"], row["value"]) for row in collection.aggregate(pipeline)]
+
+    sums = {}
+    for document in find_documents(query):
+        value = match_value(kind, document, team)
+        if value is None or not isinstance(document.get("fecha"), datetime):
+            continue
+        bucket = truncate_date(document["fecha"], unit, bin_size)
+        total, count = sums.get(bucket, (0, 0))
+        sums[bucket] = (total + value, count + 1)
+    return [(bucket, total / count) for bucket, (total, count) in sorted(sums.items())]
+
+def fetch_series(kind, query, start, end, team=None, budget=DEFAULT_POINT_BUDGET):
+    """
+    Serie `kind` ("goles", "posesion" o "forma") de los partidos que cumplen `query`
+    dentro de [start, end], con como máximo `budget` puntos.
+    Retorna un diccionario {"points": [(fecha, valor)], "mode": "raw" | "bucket",
+    "matches": N, "unit": ..., "bin_size": ...}.
+    """
+    if kind == "forma" and not team:
+        raise ValueError("La serie de forma necesita un equipo.")
+    window_query = _window_query(query, start, end)
+    if team:
+        window_query = {"$and": [window_query, _team_query(team)]}
+
+    matches = _count(window_query)
+    if matches <= budget * RAW_LIMIT_FACTOR:
+        return {"points": _raw_series(kind, window_query, team, budget), "mode": "raw",
+                "matches": matches, "unit": None, "bin_size": None}
+
+    unit, bin_size = choose_bucket(start, end, budget)
+    return {"points": _bucketed_series(kind, window_query, team, unit, bin_size), "mode": "bucket",
+            "matches": matches, "unit": unit, "bin_size": bin_size}
@@ -0,0 +1,233 @@
+# db/write_queue.py
+
+# Cola de escrituras diferidas (write-behind) para las ediciones de partidos.
+#
+# `enqueue(_id, cambios)` acepta la edición al instante: los cambios sucesivos sobre
+# el mismo `_id` se combinan en uno solo, y un hilo en segundo plano los escribe en
+# lotes con `apply_match_updates` (un bulk_write por lote, que también actualiza los
+# sketches de cuantiles, ver db/sketches.py). Si la escritura falla,
+# se reintenta con espera exponencial; tras MAX_ATTEMPTS intentos el cambio pasa a
+# la lista de fallidos, desde donde se puede reintentar manualmente.
+#
+# La cola (pendientes y fallidos) se guarda en un archivo JSON local (WRITE_QUEUE_PATH),
+# así las ediciones no se pierden si la aplicación se cierra antes de escribirlas.
+
+import json
+import os
+import threading
+import time
+
+from db.sketches import apply_match_updates
+from utils.date_tools import json_decode_date, json_encode_date
+
+WRITE_QUEUE_PATH = os.getenv("WRITE_QUEUE_PATH", "write_queue.json")
+
+# Espera máxima (segundos) antes de escribir un lote, para agrupar ediciones seguidas
+FLUSH_INTERVAL = 0.5
+BATCH_SIZE = 500
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+class WriteBehindQueue:
+    """
+    Cola de ediciones pendientes por `_id`. `on_change(status)` se llama (desde el hilo
+    que provoca el cambio) cada vez que cambian los contadores de `status()`.
+    """
+    def __init__(self, path=WRITE_QUEUE_PATH, collection_name="partidos", on_change=None):
+        self.path = path
+        self.collection_name = collection_name
+        self.listeners = [on_change] if on_change else []
+        self._pending = {}   # _id -> cambios combinados
+        self._failed = {}    # _id -> {"updates": ..., "error": ...}
+        self._versions = {}  # _id -> versión de los cambios (para no perder ediciones durante un envío)
+        self._attempts = 0
+        self._retry_at = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._stopping = False
+        self._load()
+
+    # --- Persistencia local ---
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f, object_hook=json_decode_date)
+            self._pending = data.get("pending", {})
+            self._failed = data.get("failed", {})
+            if self._pending or self._failed:
+                print(f"Cola de escrituras: {len(self._pending)} pendientes y {len(self._failed)} fallidas recuperadas.")
+        except (OSError, ValueError) as e:
+            print(f"Error al leer la cola de escrituras '{self.path}': {e}")
+
+    def _save(self):
+        """Guarda la cola de forma atómica (archivo temporal + reemplazo). Requiere el lock."""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            if not self._pending and not self._failed:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"pending": self._pending, "failed": self._failed}, f, default=json_encode_date, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error al guardar la cola de escrituras '{self.path}': {e}")
+
+    # --- API pública ---
+
+    def status(self):
+        with self._lock:
+            return {"pending": len(self._pending), "failed": len(self._failed),
+                    "attempts": self._attempts, "last_error": self.last_error}
+
+    def unwritten(self):
+        """Cambios aún no escritos (pendientes o fallidos) por `_id`."""
+        with self._lock:
+            updates = {document_id: dict(entry["updates"]) for document_id, entry in self._failed.items()}
+            for document_id, pending in self._pending.items():
+                updates.setdefault(document_id, {}).update(pending)
+            return updates
+
+    def enqueue(self, document_id, updates):
+        """Acepta una edición; se combina con los cambios pendientes del mismo `_id`."""
+        if not updates:
+            return
+        document_id = str(document_id)
+        with self._lock:
+            failed = self._failed.pop(document_id, None)
+            merged = dict(failed["updates"]) if failed else {}
+            merged.update(self._pending.get(document_id, {}))
+            merged.update(updates)
+            self._pending[document_id] = merged
+            self._versions[document_id] = self._versions.get(document_id, 0) + 1
+            self._save()
+            self._wakeup.notify()
+        self._notify()
+
+    def retry_failed(self):
+        """Vuelve a encolar todas las ediciones fallidas."""
+        with self._lock:
+            for document_id, entry in self._failed.items():
+                merged = dict(entry["updates"])
+                merged.update(self._pending.get(document_id, {}))
+                self._pending[document_id] = merged
+                self._versions[document_id] = self._versions.get(document_id, 0) + 1
+            self._failed = {}
+            self._attempts, self._retry_at = 0, 0.0
+            self._save()
+            self._wakeup.notify()
+        self._notify()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, flush=True, timeout=10.0):
+        """
+        Detiene el hilo. Con `flush`, intenta escribir antes lo pendiente (una vez), solo
+        si el hilo terminó: si sigue enviando un lote, un segundo envío lo duplicaría. Lo
+        que quede pendiente sigue guardado localmente para la próxima ejecución.
+        """
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                print(f"Cola de escrituras: el hilo sigue escribiendo tras {timeout:.0f} s; "
+                      f"las ediciones pendientes quedan guardadas localmente.")
+                return
+            self._thread = None
+        if flush:
+            self._flush_once()
+
+    # --- Hilo de escritura ---
+
+    def _notify(self):
+        status = self.status()
+        # Copia: las sesiones (modo web) se suscriben y se dan de baja desde otros hilos
+        for listener in list(self.listeners):
+            try:
+                listener(status)
+            except Exception as e:
+                print(f"Error en el listener de la cola de escrituras: {e}")
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._stopping:
+                    wait = self._retry_at - time.monotonic()
+                    if self._pending and wait <= 0:
+                        break
+                    self._wakeup.wait(wait if self._pending else None)
+                if self._stopping:
+                    return
+            # Breve espera para agrupar ediciones seguidas en el mismo lote
+            time.sleep(FLUSH_INTERVAL)
+            self._flush_once()
+
+    def _flush_once(self):
+        """Escribe un lote de pendientes. Retorna True si se escribió (o no había nada)."""
+        with self._lock:
+            if not self._pending:
+                return True
+            batch_ids = list(self._pending)[:BATCH_SIZE]
+            batch = {document_id: dict(self._pending[document_id]) for document_id in batch_ids}
+            versions = {document_id: self._versions.get(document_id, 0) for document_id in batch_ids}
+
+        matched = apply_match_updates(batch, self.collection_name)
+
+        with self._lock:
+            if matched is not None:
+                for document_id in batch_ids:
+                    # Si llegó otra edición durante el envío, se conserva para el próximo lote
+                    if self._versions.get(document_id, 0) == versions[document_id]:
+                        self._pending.pop(document_id, None)
+                        self._versions.pop(document_id, None)
+                self._attempts, self._retry_at, self.last_error = 0, 0.0, None
+            else:
+                self._attempts += 1
+                self.last_error = f"Error de escritura (intento {self._attempts} de {MAX_ATTEMPTS})"
+                if self._attempts >= MAX_ATTEMPTS:
+                    for document_id in batch_ids:
+                        updates = self._pending.pop(document_id, None)
+                        if updates is None:
+                            continue
+                        self._versions.pop(document_id, None)
+                        self._failed[document_id] = {"updates": updates, "error": self.last_error}
+                    self._attempts, self._retry_at = 0, 0.0
+                else:
+                    delay = min(BACKOFF_BASE * 2 ** (self._attempts - 1), BACKOFF_MAX)
+                    self._retry_at = time.monotonic() + delay
+                    print(f"Cola de escrituras: reintento en {delay:.0f} s.")
+            self._save()
+        self._notify()
+        return matched is not None
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_write_queue():
+    """Retorna la cola compartida, iniciando su hilo en el primer uso."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue().start()
+    return _queue
+
+def close_write_queue():
+    """Detiene la cola compartida (si se creó) tras intentar escribir lo pendiente."""
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.stop(flush=True)
@@ -1,12 +1,22 @@
 # main.py
 
+import os
+
 import flet as ft
-from db.mongo_config import connect_to_mongodb, close_mongodb_connection
+from db.mongo_config import is_configured
+from db.sessions import get_session_registry, shutdown_shared_resources
+from db.storage import STORAGE_BACKEND
 from ui.dashboard import Dashboard
+from ui.update_scheduler import close_scheduler
+
+# "desktop" (ventana, una sola sesión) o "web" (servidor: cada pestaña del navegador es
+# una sesión con su propio Dashboard y los recursos compartidos de db/sessions.py)
+APP_MODE = os.getenv("APP_MODE", "desktop")
+APP_PORT = int(os.getenv("APP_PORT", "8550"))
 
 def main(page: ft.Page):
     """
-    Función principal de la aplicación Flet.
+    Función principal de la aplicación Flet (una llamada por sesión).
     Configura la página y añade el Dashboard.
     """
     page.title = "Futbol Stats App"
@@ -18,16 +28,18 @@ def main(page: ft.Page):
     page.window_min_height = 600
     page.theme_mode = ft.ThemeMode.LIGHT # Puedes cambiar a DARK si prefieres
 
-    # Conectar a MongoDB al iniciar la aplicación
-    print("Intentando conectar a MongoDB...")
-    db_instance = connect_to_mongodb()
-    if not db_instance:
-        page.add(ft.Text("Error: No se pudo conectar a la base de datos. Verifique su MONGO_URI.", color=ft.colors.RED_500))
+    # La conexión a MongoDB se abre de forma diferida en la primera consulta,
+    # así la ventana se pinta sin esperar ningún round trip.
+    if STORAGE_BACKEND == "mongo" and not is_configured():
+        page.add(ft.Text("Error: MONGO_URI no está configurada. Verifique su archivo .env.", color=ft.colors.RED_500))
         page.update()
         return
 
-    # Crear una instancia del Dashboard
-    dashboard = Dashboard()
+    # Crear una instancia del Dashboard. La vista guardada al cerrar solo se usa en
+    # escritorio: en modo web la compartirían sesiones de usuarios distintos
+    dashboard = Dashboard(use_snapshot=APP_MODE != "web")
+    registry = get_session_registry()
+    registry.open(page.session_id, mode=APP_MODE)
 
     # Añadir el Dashboard a la página
     page.add(
@@ -39,16 +51,36 @@ def main(page: ft.Page):
         )
     )
 
-    # Función para manejar el cierre de la aplicación
-    def on_page_close(e):
-        print("Cerrando aplicación Flet y conexión a MongoDB...")
-        close_mongodb_connection()
-        page.window_destroy() # Cierra la ventana de la aplicación
+    def close_session():
+        """Libera solo el estado de esta sesión; los recursos compartidos siguen abiertos."""
+        dashboard.dispose()
+        close_scheduler(page)
+        return registry.close(page.session_id)
+
+    if APP_MODE == "web":
+        def on_session_close(e):
+            remaining = close_session()
+            print(f"Sesión {page.session_id} cerrada ({remaining} abiertas).")
+
+        page.on_close = on_session_close
+    else:
+        # Función para manejar el cierre de la aplicación
+        def on_window_event(e):
+            if e.data != "close":
+                return
+            print("Cerrando aplicación Flet y conexión a MongoDB...")
+            dashboard.save_view_snapshot() # La próxima vez se arranca mostrando esta vista
+            close_session()
+            shutdown_shared_resources() # Escribe las ediciones pendientes y cierra la conexión
+            page.window_destroy() # Cierra la ventana de la aplicación
 
-    page.on_window_event = on_page_close
+        page.window_prevent_close = True # El evento "close" llega aquí antes de cerrar
+        page.on_window_event = on_window_event
     page.update()
 
 if __name__ == "__main__":
-    ft.app(target=main)
-    # Para ejecutar como una aplicación web en el navegador, usa:
-    # ft.app(target=main, view=ft.WEB_BROWSER)
\ No newline at end of file
+    if APP_MODE == "web":
+        # Los recursos compartidos se cierran al terminar el proceso (ver db/sessions.py)
+        ft.app(target=main, view=ft.WEB_BROWSER, port=APP_PORT)
+    else:
+        ft.app(target=main)
@@ -0,0 +1,73 @@
+# models/evento_schema.py
+
+# Este módulo define la estructura de los eventos de un partido (goles, tarjetas,
+# cambios...) en la colección `eventos`.
+# En lugar de un subdocumento por evento, cada partido tiene un solo documento con
+# arrays paralelos (columnas): el evento i está formado por minuto[i], extra[i],
+# tipo[i], equipo[i] y jugador_id[i]. Cada array se guarda empaquetado como binario
+# little-endian de tipo fijo (p. ej. 1 byte por tipo de evento), así un partido con
+# 20 eventos ocupa unos 200 bytes y se decodifica sin recorrer los eventos en Python
+# (ver `events_to_dataframe` en utils/dataframe_tools.py).
+
+import sys
+from array import array
+
+EVENTS_COLLECTION = "eventos"
+
+# Columnas: (typecode de `array`, dtype de NumPy equivalente en little-endian)
+EVENT_COLUMNS = {
+    "minuto": ("H", "<u2"),      # Minuto del evento (time.elapsed)
+    "extra": ("B", "u1"),        # Minutos de descuento (time.extra), 0 si no hay
+    "tipo": ("B", "u1"),         # Código de EVENT_TYPES
+    "equipo": ("B", "u1"),       # 1 = local, 0 = visitante
+    "jugador_id": ("i", "<i4"),  # ID del jugador en API-Football, 0 si se desconoce
+}
+
+evento_schema = {
+    "fixture_id": int,
+    "n": int,  # Número de eventos (longitud de cada array)
+    **{column: bytes for column in EVENT_COLUMNS},
+}
+
+# Códigos de tipo de evento (el código es la posición en la lista)
+EVENT_TYPES = [
+    "otro", "gol", "gol_penal", "gol_propia", "penal_fallado",
+    "amarilla", "roja", "segunda_amarilla", "cambio", "var",
+]
+
+# (type, detail) de API-Football -> código; si el detalle no está, se usa (type, None)
+_API_EVENT_TYPES = {
+    ("goal", "normal goal"): "gol",
+    ("goal", "penalty"): "gol_penal",
+    ("goal", "own goal"): "gol_propia",
+    ("goal", "missed penalty"): "penal_fallado",
+    ("goal", None): "gol",
+    ("card", "yellow card"): "amarilla",
+    ("card", "red card"): "roja",
+    ("card", "second yellow card"): "segunda_amarilla",
+    ("card", None): "amarilla",
+    ("subst", None): "cambio",
+    ("var", None): "var",
+}
+
+def event_type_code(event_type, detail=None):
+    """Código de EVENT_TYPES para un evento de API-Football ("Goal", "Own Goal" -> 3)."""
+    event_type = (event_type or "").strip().lower()
+    detail = (detail or "").strip().lower()
+    name = _API_EVENT_TYPES.get((event_type, detail)) or _API_EVENT_TYPES.get((event_type, None), "otro")
+    return EVENT_TYPES.index(name)
+
+def pack_events(fixture_id, rows):
+    """
+    Construye el documento de `eventos` de un partido a partir de `rows`, una lista de
+    tuplas (minuto, extra, tipo, equipo, jugador_id) en el orden de EVENT_COLUMNS.
+    """
+    columns = {name: array(typecode) for name, (typecode, _) in EVENT_COLUMNS.items()}
+    for row in rows:
+        for (name, column), value in zip(columns.items(), row):
+            column.append(value)
+    if sys.byteorder == "big":
+        for column in columns.values():
+            column.byteswap()
+    return {"fixture_id": fixture_id, "n": len(rows),
+            **{name: column.tobytes() for name, column in columns.items()}}
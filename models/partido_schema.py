@@ -4,11 +4,19 @@
 # Se usa un diccionario simple para representar el esquema.
 # Podrías usar Pydantic para una validación de datos más robusta si lo necesitas.
 
+import hashlib
+import json
+from datetime import datetime
+
+from utils.date_tools import to_utc_datetime
+
 partido_schema = {
     "fixture_id": int,
-    "fecha": str,  # Se almacenará como ISO string, luego se puede convertir a datetime
+    "fecha": datetime,  # Se almacena como BSON Date (datetime UTC), ver utils/date_tools.py
     "equipo_local": str,
     "equipo_visitante": str,
+    "equipo_local_id": str,  # ID canónico en la colección `equipos` (ver db/team_registry.py)
+    "equipo_visitante_id": str,
     "es_local": bool,
     "goles_local": int,
     "goles_visitante": int,
@@ -19,15 +27,29 @@ partido_schema = {
     "remates_local": int,
     "remates_visitante": int,
     "liga": str,
-    "temporada": int
+    "temporada": int,
+    # Campos derivados (ver `normalize_partido`)
+    "goles_total": int,
+    "resultado": str,  # "L" (gana local), "E" (empate) o "V" (gana visitante)
+    "content_hash": str  # Hash de los campos canónicos (ver `content_hash`)
 }
 
+# Campos que se calculan a partir de los goles (ver `derived_fields`): no se editan a mano
+GOAL_FIELDS = ("goles_local", "goles_visitante")
+DERIVED_FIELDS = ("goles_total", "resultado")
+
+# Campos que definen el contenido de un partido: todos los del esquema salvo el propio hash.
+# `_id` y `updated_at` quedan fuera, así que el hash solo cambia si cambian los datos.
+CANONICAL_FIELDS = tuple(field for field in partido_schema if field != "content_hash")
+
 # Ejemplo de un documento de partido para referencia
 ejemplo_partido = {
     "fixture_id": 1034502,
-    "fecha": "2025-07-11T20:00:00Z",
+    "fecha": datetime(2025, 7, 11, 20, 0),
     "equipo_local": "Chelsea",
     "equipo_visitante": "Arsenal",
+    "equipo_local_id": "chelsea",
+    "equipo_visitante_id": "arsenal",
     "es_local": True,
     "goles_local": 2,
     "goles_visitante": 1,
@@ -38,5 +60,56 @@ ejemplo_partido = {
     "remates_local": 7,
     "remates_visitante": 11,
     "liga": "Premier League",
-    "temporada": 2025
-}
\ No newline at end of file
+    "temporada": 2025,
+    "goles_total": 3,
+    "resultado": "L"
+}
+
+def parse_percentage(value):
+    """Convierte valores como "54%", "54" o 54.0 a int. Retorna None si no es posible."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value))
+    try:
+        return int(round(float(str(value).strip().rstrip("%"))))
+    except ValueError:
+        return None
+
+def derived_fields(partido):
+    """Calcula los campos derivados de un partido a partir de sus goles."""
+    goles_local, goles_visitante = partido.get("goles_local"), partido.get("goles_visitante")
+    if not isinstance(goles_local, int) or not isinstance(goles_visitante, int):
+        return {}
+    if goles_local > goles_visitante:
+        resultado = "L"
+    elif goles_local < goles_visitante:
+        resultado = "V"
+    else:
+        resultado = "E"
+    return {"goles_total": goles_local + goles_visitante, "resultado": resultado}
+
+def normalize_partido(partido):
+    """
+    Normaliza un documento de partido según el esquema: posesión como int
+    (la API la entrega como "54%") y campos derivados. Modifica y retorna el mismo dict.
+    """
+    for field in ("posesion_local", "posesion_visitante"):
+        if field in partido:
+            partido[field] = parse_percentage(partido[field])
+    partido.update(derived_fields(partido))
+    return partido
+
+def _canonical_value(value):
+    if isinstance(value, datetime):
+        return to_utc_datetime(value).isoformat()
+    return value
+
+def content_hash(partido):
+    """
+    Hash estable (SHA-1 hex) de los campos canónicos del partido: no depende del orden
+    de las claves ni de la zona horaria de las fechas. Los campos ausentes cuentan como None.
+    """
+    canonical = {field: _canonical_value(partido.get(field)) for field in CANONICAL_FIELDS}
+    payload = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,31 @@
+# tests/conftest.py
+
+# Backends de SQLite temporales para las pruebas que escriben en la base de datos.
+
+import pytest
+
+from db.queries import invalidate_read_caches
+from db.sketches import invalidate_distributions
+from db.storage import SQLiteBackend, set_backend
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    """SQLiteBackend en un archivo temporal, activo como backend durante la prueba."""
+    backend = SQLiteBackend(str(tmp_path / "partidos.db"))
+    previous = set_backend(backend)
+    invalidate_read_caches(None)
+    invalidate_distributions()
+    yield backend
+    set_backend(previous)
+    invalidate_read_caches(None)
+    invalidate_distributions()
+    backend.close()
+
+@pytest.fixture
+def partitioned_backend(sqlite_backend):
+    """El backend SQLite temporal repartido por temporada (PARTITION_BY_SEASON)."""
+    from db.partitions import PartitionedBackend
+
+    backend = PartitionedBackend(sqlite_backend)
+    set_backend(backend)
+    return backend
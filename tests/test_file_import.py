@@ -0,0 +1,47 @@
+# tests/test_file_import.py
+
+# Validación por bloques de los volcados de partidos (api/file_import.py).
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from api.file_import import map_columns, validate_chunk
+
+def make_chunk(rows):
+    columns = ["fixture_id", "fecha", "equipo_local", "equipo_visitante", "liga", "goles_local", "posesion_local"]
+    return pd.DataFrame([dict(zip(columns, row)) for row in rows], dtype=object)
+
+def test_reject_reasons():
+    df = make_chunk([
+        ("1", "2024-09-01 15:00", "Local", "Visitante", "Liga A", "2", "55%"),
+        ("x", "2024-09-01 15:00", "Local", "Visitante", "Liga A", "2", "55%"),
+        ("3", "no es fecha", "Local", "Visitante", "Liga A", "2", "55%"),
+        ("4", "2024-09-01 15:00", " ", "Visitante", "Liga A", "2", "55%"),
+        ("5", "2024-09-01 15:00", "Local", "Visitante", "Liga A", "dos", "55%"),
+        ("6", "2024-09-01 15:00", "Local", "Visitante", "Liga A", "2", "120"),
+        ("7", "2024-09-01 15:00", "Local", "Visitante", "Liga A", "", ""),
+    ])
+    valid, reasons = validate_chunk(df)
+    assert reasons == {
+        1: "fixture_id inválido",
+        2: "fecha inválida",
+        3: "falta 'equipo_local'",
+        4: "'goles_local' no es numérico",
+        5: "'posesion_local' fuera de rango",
+    }
+    assert list(valid["fixture_id"]) == [1, 7]
+    assert valid.loc[0, "posesion_local"] == 55
+    # Las celdas vacías no son un error: quedan sin valor
+    assert pd.isna(valid.loc[6, "goles_local"])
+
+def test_missing_required_column_rejects_the_chunk():
+    df = make_chunk([("1", "2024-09-01", "Local", "Visitante", "Liga A", "2", "55")]).drop(columns="liga")
+    valid, reasons = validate_chunk(df)
+    assert valid.empty
+    assert reasons == {0: "falta la columna 'liga'"}
+
+def test_map_columns_uses_aliases_and_drops_computed_fields():
+    df = pd.DataFrame({"Home": ["Local"], "AWAY_TEAM": ["Visitante"], "FTHG": [1], "resultado": ["L"], "otra": [0]})
+    assert list(map_columns(df, {"FTHG": "goles_visitante"}).columns) == ["equipo_local", "equipo_visitante",
+                                                                          "goles_visitante"]
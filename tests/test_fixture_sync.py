@@ -0,0 +1,42 @@
+# tests/test_fixture_sync.py
+
+# Sincronización de partidos importados por `content_hash`.
+
+import db.fixture_sync
+from db.fixture_sync import sync_matches
+from db.queries import find_documents
+from db.sketches import get_distribution
+
+def make_matches(count, remates=1):
+    return [{"fixture_id": i, "liga": "Liga A", "temporada": 2024, "equipo_local": f"Local {i}",
+             "equipo_visitante": f"Visitante {i}", "remates_local": remates, "remates_visitante": remates}
+            for i in range(count)]
+
+def test_counts_new_changed_and_unchanged(sqlite_backend):
+    assert sync_matches(make_matches(3), batch_size=2) == {"new": 3, "changed": 0, "unchanged": 0}
+    matches = make_matches(4)
+    matches[0]["remates_local"] = 7
+    assert sync_matches(matches, batch_size=2) == {"new": 1, "changed": 1, "unchanged": 2}
+    assert len(find_documents({}, "partidos")) == 4
+    assert sync_matches(matches) == {"new": 0, "changed": 0, "unchanged": 4}
+
+def test_sketches_follow_changes(sqlite_backend):
+    sync_matches(make_matches(2))
+    matches = make_matches(2)
+    matches[0]["remates_local"] = 5
+    sync_matches(matches)
+    distribution = get_distribution("remates", "Liga A", 2024)
+    assert distribution.n == 4
+    assert distribution.quantile(1.0) == 5
+
+def test_failed_insert_is_not_counted(sqlite_backend, monkeypatch):
+    monkeypatch.setattr(db.fixture_sync, "insert_documents", lambda documents, collection_name: [])
+    without_id = dict(make_matches(1)[0], fixture_id=None)
+    assert sync_matches(make_matches(2) + [without_id]) is None
+    assert get_distribution("remates", "Liga A", 2024).n == 0
+
+def test_failed_update_is_not_counted(sqlite_backend, monkeypatch):
+    sync_matches(make_matches(2))
+    monkeypatch.setattr(db.fixture_sync, "bulk_update_documents", lambda updates, collection_name: None)
+    assert sync_matches(make_matches(2, remates=9)) is None
+    assert get_distribution("remates", "Liga A", 2024).quantile(1.0) == 1
@@ -0,0 +1,64 @@
+# tests/test_partitions.py
+
+# Particionado de partidos por temporada sobre SQLite: reparto, lecturas y movimientos.
+
+from db.partitions import migrate_to_partitions
+
+def make_match(temporada, fecha, fixture_id):
+    return {"fixture_id": fixture_id, "temporada": temporada, "fecha": fecha, "liga": "Liga A"}
+
+def stored_ids(backend, collection_name):
+    return sorted(str(d["fixture_id"]) for d in backend.inner.find_documents(None, collection_name))
+
+def test_inserts_are_routed_and_read_back(partitioned_backend):
+    backend = partitioned_backend
+    backend.insert_documents([make_match(2023, "2023-09-01T15:00:00", 1), make_match(2024, "2024-09-01T15:00:00", 2),
+                              make_match(None, None, 3)])
+    assert sorted(backend.catalog("partidos")) == ["partidos_2023", "partidos_2024", "partidos_sin_temporada"]
+    assert stored_ids(backend, "partidos_2024") == ["2"]
+    assert stored_ids(backend, "partidos") == []
+    assert sorted(d["fixture_id"] for d in backend.find_documents({})) == [1, 2, 3]
+    assert [d["fixture_id"] for d in backend.find_documents({"temporada": 2023})] == [1]
+    assert backend.partitions("partidos", {"temporada": 2024}) == ["partidos", "partidos_2024"]
+
+def test_migration_moves_the_base_collection(partitioned_backend):
+    backend = partitioned_backend
+    backend.inner.insert_documents([make_match(2023, "2023-09-01T15:00:00", i) for i in range(5)]
+                                   + [make_match(2024, "2024-09-01T15:00:00", 5)], "partidos")
+    assert migrate_to_partitions(backend, batch_size=2) == {"partidos_2023": 5, "partidos_2024": 1}
+    assert stored_ids(backend, "partidos") == []
+    assert len(backend.find_documents({})) == 6
+    # Relanzarla no duplica nada
+    assert migrate_to_partitions(backend) == {}
+    assert len(backend.find_documents({})) == 6
+
+def test_season_change_moves_the_match(partitioned_backend):
+    backend = partitioned_backend
+    document_id = backend.insert_document(make_match(2023, "2023-09-01T15:00:00", 1))
+    assert backend.update_document(document_id, {"temporada": 2024, "fecha": "2024-09-01T15:00:00"})
+    assert stored_ids(backend, "partidos_2023") == []
+    assert stored_ids(backend, "partidos_2024") == ["1"]
+    assert backend.update_document(document_id, {"liga": "Liga B"})
+    assert [d["liga"] for d in backend.find_documents({"temporada": 2024})] == ["Liga B"]
+
+def test_interrupted_move_can_be_retried(partitioned_backend, monkeypatch):
+    backend = partitioned_backend
+    document_id = backend.insert_document(make_match(2023, "2023-09-01T15:00:00", 1))
+    delete = backend.inner.bulk_delete_documents
+
+    def fail_on_source(document_ids, collection_name="partidos"):
+        if collection_name == "partidos_2023":
+            return None
+        return delete(document_ids, collection_name)
+
+    # El borrado del origen falla: el partido queda en las dos particiones
+    monkeypatch.setattr(backend.inner, "bulk_delete_documents", fail_on_source)
+    changes = {"temporada": 2024, "fecha": "2024-09-01T15:00:00"}
+    assert backend.update_document(document_id, changes) is False
+    assert stored_ids(backend, "partidos_2023") == ["1"] == stored_ids(backend, "partidos_2024")
+
+    monkeypatch.setattr(backend.inner, "bulk_delete_documents", delete)
+    assert backend.update_document(document_id, changes)
+    assert stored_ids(backend, "partidos_2023") == []
+    assert stored_ids(backend, "partidos_2024") == ["1"]
+    assert len(backend.find_documents({})) == 1
@@ -0,0 +1,53 @@
+# tests/test_quantile_sketch.py
+
+# Sketch de cuantiles KLL: rangos, cuantiles, combinación y serialización.
+
+import random
+
+from utils.quantile_sketch import KLLSketch
+
+# Error de rango admitido (el teórico con k=200 es ≈ 0.85 %)
+TOLERANCE = 0.02
+
+def test_small_sketch_is_exact():
+    sketch = KLLSketch().extend([5, 1, 3, 3, 2])
+    assert sketch.n == 5
+    assert sketch.rank(3) == 4
+    assert sketch.rank(3, inclusive=False) == 2
+    assert sketch.quantile(0.5) == 3
+    assert sketch.cdf(0) == 0
+
+def test_empty_sketch():
+    sketch = KLLSketch()
+    assert sketch.quantile(0.5) is None
+    assert sketch.cdf(1) is None
+    assert sketch.rank(1) == 0
+
+def test_quantiles_within_rank_error():
+    values = list(range(50000))
+    random.Random(1).shuffle(values)
+    sketch = KLLSketch(seed=1).extend(values)
+    assert sketch.n == len(values)
+    assert sketch._size() < 1000
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert abs(sketch.quantile(q) / len(values) - q) < TOLERANCE
+        assert abs(sketch.cdf(q * len(values)) - q) < TOLERANCE
+
+def test_merge_matches_single_sketch():
+    rng = random.Random(2)
+    parts = [[rng.gauss(10 * i, 5) for _ in range(20000)] for i in range(3)]
+    merged = KLLSketch(seed=3)
+    for part in parts:
+        merged.merge(KLLSketch(seed=4).extend(part))
+    values = sorted(v for part in parts for v in part)
+    assert merged.n == len(values)
+    for q in (0.1, 0.5, 0.9):
+        exact = values[int(q * len(values))]
+        assert abs(merged.rank(exact) / len(values) - q) < TOLERANCE
+
+def test_round_trip_keeps_ranks():
+    sketch = KLLSketch(seed=5).extend(range(10000))
+    restored = KLLSketch.from_dict(sketch.to_dict())
+    assert restored.n == sketch.n
+    for value in (0, 2500, 5000, 9999):
+        assert restored.rank(value) == sketch.rank(value)
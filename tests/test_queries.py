@@ -0,0 +1,38 @@
+# tests/test_queries.py
+
+# Evaluación en memoria de las consultas que genera `build_match_query`.
+
+from datetime import datetime
+
+import pytest
+
+from db.queries import document_matches_query
+
+MATCH = {"liga": "Liga A", "temporada": 2024, "equipo_local": "Local", "equipo_visitante": "Visitante",
+         "fecha": datetime(2024, 9, 1, 15), "goles_local": 2, "posesion_local": None}
+
+@pytest.mark.parametrize("query, expected", [
+    ({}, True),
+    ({"liga": "Liga A"}, True),
+    ({"liga": "Liga B"}, False),
+    ({"temporada": {"$in": [2023, 2024]}}, True),
+    ({"temporada": {"$in": [2023]}}, False),
+    ({"fecha": {"$gte": datetime(2024, 9, 1), "$lt": datetime(2024, 9, 2)}}, True),
+    ({"fecha": {"$gt": datetime(2024, 9, 1, 15)}}, False),
+    ({"goles_local": {"$lte": 2}}, True),
+    ({"goles_local": {"$ne": 2}}, False),
+    ({"$or": [{"equipo_local": "Visitante"}, {"equipo_visitante": "Visitante"}]}, True),
+    ({"$or": [{"equipo_local": "Otro"}, {"equipo_visitante": "Otro"}]}, False),
+    ({"$and": [{"liga": "Liga A"}, {"temporada": 2023}]}, False),
+])
+def test_operators(query, expected):
+    assert document_matches_query(MATCH, query) is expected
+
+def test_missing_or_incomparable_values_do_not_match():
+    assert not document_matches_query(MATCH, {"posesion_local": {"$gte": 50}})
+    assert not document_matches_query(MATCH, {"remates_local": {"$lt": 10}})
+    assert not document_matches_query(MATCH, {"fecha": {"$gte": "2024-01-01"}})
+
+def test_unsupported_operator_raises():
+    with pytest.raises(ValueError):
+        document_matches_query(MATCH, {"liga": {"$regex": "Liga"}})
@@ -0,0 +1,34 @@
+# tests/test_sketches.py
+
+# Distribuciones por liga y temporada a partir de los sketches guardados.
+
+from db.sketches import get_distribution, get_distributions, get_percentile, update_sketches
+
+def match(liga, temporada, remates_local, remates_visitante):
+    return {"liga": liga, "temporada": temporada,
+            "remates_local": remates_local, "remates_visitante": remates_visitante}
+
+def test_distributions_by_season_and_league(sqlite_backend):
+    update_sketches(added=[match("Liga A", 2023, 1, 2), match("Liga A", 2024, 3, 4), match("Liga B", 2024, 9, 9)])
+    assert get_distribution("remates", "Liga A", 2023).n == 2
+    assert get_distribution("remates", "Liga A").n == 4
+    assert get_distribution("remates", "Liga B").n == 2
+    assert get_percentile("remates", 4, "Liga A") == 87.5
+    assert get_percentile("remates", 1, "Liga C") is None
+
+def test_cached_distributions_are_not_merged_again(sqlite_backend):
+    update_sketches(added=[match("Liga A", 2023, 1, 2), match("Liga A", 2024, 3, 4)])
+    season = get_distribution("remates", "Liga A", 2023)
+    # La temporada ya está en caché; leer la liga no debe sumarle las otras temporadas
+    distributions = get_distributions([("Liga A", 2023, "remates"), ("Liga A", None, "remates")])
+    assert distributions[("Liga A", None, "remates")].n == 4
+    assert distributions[("Liga A", 2023, "remates")].n == 2
+    assert season.n == 2
+    assert get_distribution("remates", "Liga A", 2023).n == 2
+
+def test_removed_values_are_discounted(sqlite_backend):
+    update_sketches(added=[match("Liga A", 2024, 1, 2), match("Liga A", 2024, 3, 4)])
+    update_sketches(removed=[match("Liga A", 2024, 3, 4)])
+    distribution = get_distribution("remates", "Liga A", 2024)
+    assert distribution.n == 2
+    assert distribution.quantile(1.0) == 2
@@ -0,0 +1,41 @@
+# tests/test_team_registry.py
+
+# Resolución de nombres de equipo con el índice en memoria (sin base de datos).
+
+import pytest
+
+from db.team_registry import TeamRegistry, _is_abbreviation
+from utils.team_index import fold_text
+
+def make_registry(names):
+    """Registro cargado solo en memoria con `names` como equipos canónicos."""
+    registry = TeamRegistry()
+    for name in names:
+        registry._index_alias(fold_text(name), fold_text(name).replace(" ", "-"))
+    registry.loaded = True
+    return registry
+
+def resolves_to(registry, name):
+    team_id, score = registry._best_match(fold_text(name))
+    return team_id if score >= registry.threshold else None
+
+@pytest.mark.parametrize("short, long", [
+    ("Porto", "Portsmouth"),
+    ("Inter", "Internacional"),
+    ("Lens", "Leganes"),
+])
+def test_single_word_names_do_not_merge(short, long):
+    assert not _is_abbreviation(fold_text(short), fold_text(long))
+    assert resolves_to(make_registry([long]), short) is None
+
+def test_multi_word_abbreviation_resolves():
+    registry = make_registry(["Manchester United", "Real Betis"])
+    assert resolves_to(registry, "Man Utd") == "manchester-united"
+
+def test_reserve_team_does_not_merge_with_first_team():
+    assert resolves_to(make_registry(["Real Betis"]), "Real B") is None
+
+def test_ambiguous_abbreviation_is_left_alone():
+    registry = make_registry(["Real Betis", "Real Bilbao"])
+    assert resolves_to(registry, "Real Bi") is None
+    assert resolves_to(registry, "Real Bts") == "real-betis"
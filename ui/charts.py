@@ -0,0 +1,197 @@
+# ui/charts.py
+
+import threading
+from datetime import timedelta
+
+import flet as ft
+from db.timeseries import SERIES, DEFAULT_POINT_BUDGET, EPOCH, date_extent, fetch_series
+from utils.tracing import tracer
+from ui.update_scheduler import request_update
+
+# Espera (en segundos) tras el último cambio de zoom/desplazamiento antes de consultar
+CHART_REFRESH_DEBOUNCE = 0.2
+# Número de etiquetas en el eje de fechas
+DATE_AXIS_LABELS = 6
+# Ventana mínima al acercar
+MIN_WINDOW = timedelta(days=7)
+
+class ChartsPanel(ft.Column):
+    """
+    Panel de gráficos de series temporales (goles por partido, posesión y forma de un
+    equipo) sobre los partidos del filtro activo. Cada gráfico tiene como máximo
+    `point_budget` puntos; al acercar, alejar o desplazar la ventana de fechas se
+    vuelve a consultar solo esa ventana (ver db/timeseries.py).
+    """
+    def __init__(self, point_budget=DEFAULT_POINT_BUDGET):
+        super().__init__()
+        self.point_budget = point_budget
+        self.visible = False
+
+        # Consulta base (filtros del dashboard), equipo seleccionado y ventana visible
+        self.query = {}
+        self.team = None
+        self.extent = (None, None)
+        self.window = (None, None)
+        self._refresh_timer = None
+        self._generation = 0 # Descarta respuestas de consultas ya superadas
+        self._lock = threading.Lock()
+
+        self.kind_dropdown = ft.Dropdown(
+            label="Serie",
+            width=300,
+            value="goles",
+            options=[ft.dropdown.Option(key, label) for key, label in SERIES.items()],
+            on_change=lambda e: self._schedule_refresh(),
+        )
+        self.info_text = ft.Text("", size=12, color=ft.colors.BLUE_GREY_400)
+        self.chart = ft.LineChart(
+            data_series=[],
+            border=ft.border.all(1, ft.colors.BLUE_GREY_100),
+            left_axis=ft.ChartAxis(labels_size=40),
+            bottom_axis=ft.ChartAxis(labels_size=30),
+            horizontal_grid_lines=ft.ChartGridLines(interval=1, color=ft.colors.BLUE_GREY_50, width=1),
+            tooltip_bgcolor=ft.colors.with_opacity(0.8, ft.colors.BLUE_GREY_50),
+            height=260,
+            expand=True,
+        )
+
+        self.controls = [
+            ft.Row([
+                self.kind_dropdown,
+                ft.IconButton(icon=ft.icons.ZOOM_IN, tooltip="Acercar", on_click=lambda e: self.zoom(0.5)),
+                ft.IconButton(icon=ft.icons.ZOOM_OUT, tooltip="Alejar", on_click=lambda e: self.zoom(2.0)),
+                ft.IconButton(icon=ft.icons.CHEVRON_LEFT, tooltip="Anterior", on_click=lambda e: self.pan(-0.5)),
+                ft.IconButton(icon=ft.icons.CHEVRON_RIGHT, tooltip="Siguiente", on_click=lambda e: self.pan(0.5)),
+                ft.TextButton("Todo el rango", icon=ft.icons.FIT_SCREEN, on_click=lambda e: self.reset_window()),
+            ], alignment=ft.MainAxisAlignment.CENTER),
+            self.chart,
+            self.info_text,
+        ]
+
+    def set_query(self, query, team=None):
+        """Actualiza la consulta base (filtros del dashboard) y recalcula el rango completo."""
+        self.query = query or {}
+        self.team = team
+        if self.visible:
+            threading.Thread(target=self._load_extent, daemon=True).start()
+
+    def show(self, visible=True):
+        """Muestra u oculta el panel; los datos se cargan solo mientras está visible."""
+        self.visible = visible
+        if visible:
+            threading.Thread(target=self._load_extent, daemon=True).start()
+        request_update(self.page)
+
+    def _load_extent(self):
+        with tracer.span("charts.extent"):
+            self.extent = date_extent(self.query)
+        self.window = self.extent
+        self._refresh()
+
+    def reset_window(self):
+        self.window = self.extent
+        self._schedule_refresh()
+
+    def zoom(self, factor):
+        """Acerca (factor < 1) o aleja (factor > 1) la ventana alrededor de su centro."""
+        start, end = self.window
+        if start is None:
+            return
+        center = start + (end - start) / 2
+        half = max((end - start) * factor, MIN_WINDOW) / 2
+        self._set_window(center - half, center + half)
+
+    def pan(self, fraction):
+        """Desplaza la ventana una fracción de su ancho (negativa = hacia atrás)."""
+        start, end = self.window
+        if start is None:
+            return
+        shift = (end - start) * fraction
+        self._set_window(start + shift, end + shift)
+
+    def _set_window(self, start, end):
+        """Ajusta la ventana al rango de datos disponible y programa la consulta."""
+        min_date, max_date = self.extent
+        width = end - start
+        if width >= max_date - min_date:
+            start, end = min_date, max_date
+        elif start < min_date:
+            start, end = min_date, min_date + width
+        elif end > max_date:
+            start, end = max_date - width, max_date
+        self.window = (start, end)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        """Agrupa cambios rápidos de zoom/desplazamiento en una sola consulta (debounce)."""
+        if self._refresh_timer:
+            self._refresh_timer.cancel()
+        self._refresh_timer = threading.Timer(CHART_REFRESH_DEBOUNCE, self._refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _refresh(self):
+        """Consulta la serie de la ventana actual y redibuja el gráfico."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        kind = self.kind_dropdown.value
+        start, end = self.window
+        if start is None:
+            self._show_info("No hay datos para graficar.", generation)
+            return
+        if kind == "forma" and not self.team:
+            self._show_info("Seleccione un equipo en los filtros para ver su forma.", generation)
+            return
+
+        self._show_info("Cargando gráfico...", generation)
+        try:
+            with tracer.span("charts.fetch_series", kind=kind):
+                series = fetch_series(kind, self.query, start, end, team=self.team, budget=self.point_budget)
+        except Exception as e:
+            self._show_info(f"Error al cargar el gráfico: {e}", generation)
+            print(f"Error al cargar el gráfico: {e}")
+            return
+        if generation != self._generation:
+            return
+
+        with tracer.span("charts.render", points=len(series["points"])):
+            self._render(series["points"], start, end)
+        detail = (f"agregado por {series['unit']}" + (f" ×{series['bin_size']}" if series["bin_size"] > 1 else "")
+                  if series["mode"] == "bucket" else "partidos individuales (LTTB)")
+        self._show_info(f"{SERIES[kind]}{' - ' + self.team if self.team else ''}: {series['matches']} partidos, "
+                        f"{len(series['points'])} puntos, {detail}. "
+                        f"Ventana: {start:%Y-%m-%d} a {end:%Y-%m-%d}", generation)
+
+    @staticmethod
+    def _to_x(value):
+        """Fecha -> días desde EPOCH (eje x del gráfico)."""
+        return (value - EPOCH).total_seconds() / 86400
+
+    def _render(self, points, start, end):
+        self.chart.data_series = [
+            ft.LineChartData(
+                data_points=[ft.LineChartDataPoint(self._to_x(x), round(y, 2)) for x, y in points],
+                stroke_width=2,
+                color=ft.colors.BLUE,
+                curved=False,
+            )
+        ]
+        self.chart.min_x, self.chart.max_x = self._to_x(start), self._to_x(end)
+        date_format = "%Y-%m" if end - start > timedelta(days=730) else "%Y-%m-%d"
+        step = (end - start) / (DATE_AXIS_LABELS - 1)
+        self.chart.bottom_axis.labels = [
+            ft.ChartAxisLabel(
+                value=self._to_x(start + step * i),
+                label=ft.Text((start + step * i).strftime(date_format), size=10),
+            )
+            for i in range(DATE_AXIS_LABELS)
+        ]
+
+    def _show_info(self, message, generation=None):
+        """Muestra `message`, salvo que venga de una consulta ya reemplazada por otra más nueva."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self.info_text.value = message
+        request_update(self.page)
@@ -1,21 +1,71 @@
 # ui/dashboard.py
-from datetime import timedelta
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 import flet as ft
-import pandas as pd
 from ui.filters import Filters
 from ui.edit_popup import EditMatchPopup
-from db.queries import find_documents, update_document, delete_document, get_unique_teams, get_unique_leagues
-from utils.dataframe_tools import mongo_to_dataframe, clean_and_format_dataframe
-from api.fetch_matches import simulate_fetch_and_store_dummy_data, fetch_and_store_matches_from_api # Importa las funciones de la API
+from ui.charts import ChartsPanel
+from ui.kpi_cards import KpiCards
+from bson.objectid import ObjectId
+from db.queries import (
+    find_documents, find_documents_cached, get_unique_teams, get_unique_leagues,
+    build_match_query, document_matches_query, get_match_summary
+)
+from db.change_feed import get_change_feed_hub
+from db.sketches import (
+    SKETCH_METRICS, apply_match_deletes, apply_match_updates, apply_matching_delete, get_distributions
+)
+from db.storage import STORAGE_BACKEND
+from db.write_queue import get_write_queue
+from models.partido_schema import GOAL_FIELDS, derived_fields
+from utils.date_tools import to_utc_datetime
+from utils.frame_store import FrameStore
+from utils.view_snapshot import SNAPSHOT_MAX_ROWS, load_snapshot, save_snapshot
+from utils.tracing import tracer
+from ui.update_scheduler import get_scheduler, request_update, ui_action
+
+# pandas (vía utils.dataframe_tools), requests y el módulo de la API se importan
+# de forma diferida dentro de los métodos que los usan, para no retrasar el arranque.
+
+# Columnas internas que no se muestran en la tabla
+HIDDEN_COLUMNS = ("_id", "updated_at")
+# Filas fuera de la vista actual cuyos controles se conservan para reutilizarlos
+ROW_POOL_SPARE = 2000
+# Columna -> métrica de los sketches de cuantiles (db/sketches.py) para las insignias de percentil
+PERCENTILE_COLUMNS = {field: metric for metric, fields in SKETCH_METRICS.items() for field in fields}
+
+def _is_number(value):
+    """True si `value` es un número (también de numpy) y no es NaN."""
+    try:
+        return value is not None and not isinstance(value, (bool, str)) and float(value) == float(value)
+    except (TypeError, ValueError):
+        return False
+
+def _percentile_color(percentile):
+    if percentile >= 90:
+        return ft.colors.GREEN_700
+    if percentile <= 10:
+        return ft.colors.RED_700
+    return ft.colors.BLUE_GREY_400
 
 class Dashboard(ft.Column):
     """
     Vista principal del dashboard que muestra los datos de partidos,
     controles de filtro y botones para acciones.
+
+    Cada sesión (ventana o pestaña del navegador) tiene su propio Dashboard con su
+    estado de UI; las conexiones, cachés de lectura, ChangeFeed y cola de escrituras
+    son compartidos (ver db/sessions.py). Con `use_snapshot` se arranca desde la vista
+    guardada al cerrar (solo tiene sentido con una única sesión, en escritorio).
     """
-    def __init__(self):
+    def __init__(self, use_snapshot=True):
         super().__init__()
+        self.use_snapshot = use_snapshot
+        self._created_at = time.perf_counter()
         self.horizontal_alignment = ft.CrossAxisAlignment.CENTER
         self.expand = True # Para que ocupe todo el espacio disponible
 
@@ -30,14 +80,84 @@ class Dashboard(ft.Column):
             sort_ascending=True,
             heading_row_color=ft.colors.BLUE_GREY_50,
             data_row_color={"hovered": ft.colors.BLUE_GREY_50},
-            show_checkbox_column=False,
+            show_checkbox_column=True, # Selección múltiple para acciones masivas
             divider_thickness=1,
             column_spacing=20,
         )
 
+        # Estado de la vista actual: almacén del DataFrame en pantalla (filas por _id),
+        # consulta activa y controles de fila por _id
+        self.store = FrameStore()
+        self.current_query = {}
+        self.current_filters = None
+        self.current_summary = None
+        self.warm_start_ms = None # Tiempo hasta pintar la vista guardada (ver utils/view_snapshot.py)
+        self._display_columns = []
+        self._rows_by_id = {}
+        # Controles de fila por _id (visibles y recientes), reutilizados entre
+        # ordenamientos, filtros y recargas
+        self._row_pool = OrderedDict()
+        self.last_table_build = {}
+        self.selected_ids = set()
+        self._lock = threading.RLock()
+        self._change_feed_token = None # Suscripción al ChangeFeed compartido
+
         self.progress_ring = ft.ProgressRing(width=50, height=50, stroke_width=5, visible=False)
         self.status_text = ft.Text("Cargando datos...", visible=False)
 
+        # Visor de trazas (oculto por defecto)
+        self.trace_lines = ft.Column([], spacing=2, scroll=ft.ScrollMode.ADAPTIVE, height=160)
+        self.trace_switch = ft.Switch(label="Registrar trazas", value=tracer.enabled, on_change=self._on_trace_toggle)
+        self.trace_panel = ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    self.trace_switch,
+                    ft.TextButton("Perfilar próxima acción", icon=ft.icons.SPEED, on_click=self._profile_next_action),
+                    ft.TextButton("Exportar traza (Chrome)", icon=ft.icons.SAVE_ALT, on_click=self._export_trace),
+                ]),
+                self.trace_lines,
+            ]),
+            visible=False,
+            padding=10,
+            border=ft.border.all(1, ft.colors.BLUE_GREY_100),
+            border_radius=ft.border_radius.all(10),
+        )
+
+        # Panel de gráficos de series temporales (oculto por defecto)
+        self.charts_panel = ChartsPanel()
+
+        # KPIs del filtro activo; se calculan en paralelo con la consulta de la tabla
+        self.kpi_cards = KpiCards()
+        # Insignias de percentil (liga y temporada) junto a remates, posesión y tarjetas
+        self.percentile_switch = ft.Switch(label="Percentiles", value=False, on_change=self._on_percentiles_toggle)
+        self._summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kpi")
+
+        # Barra de acciones masivas sobre las filas seleccionadas
+        self.selection_text = ft.Text("0 seleccionados")
+        self.bulk_buttons = [
+            ft.TextButton("Eliminar seleccionados", icon=ft.icons.DELETE_SWEEP, on_click=self._confirm_bulk_delete, disabled=True),
+            ft.TextButton("Editar campo", icon=ft.icons.EDIT_NOTE, on_click=self._open_bulk_edit_dialog, disabled=True),
+            ft.TextButton("Re-enriquecer desde API", icon=ft.icons.SYNC, on_click=self._bulk_reenrich, disabled=True),
+        ]
+        # Estado de la cola de escrituras diferidas (ediciones pendientes o fallidas)
+        self.write_queue = get_write_queue()
+        self.write_status_text = ft.Text("", size=12)
+        self.write_status_bar = ft.Row([
+            ft.Icon(ft.icons.CLOUD_UPLOAD, size=16, color=ft.colors.BLUE_GREY_400),
+            self.write_status_text,
+            ft.TextButton("Reintentar", icon=ft.icons.REPLAY, on_click=lambda e: self.write_queue.retry_failed()),
+        ], alignment=ft.MainAxisAlignment.CENTER, visible=False)
+
+        # Aviso mientras se muestra la vista guardada y se revalida contra la base de datos
+        self.snapshot_text = ft.Text("", size=12, italic=True, color=ft.colors.BLUE_GREY_400, visible=False)
+
+        self.bulk_actions_bar = ft.Row([
+            self.selection_text,
+            *self.bulk_buttons,
+            ft.TextButton("Eliminar todos (filtro actual)", icon=ft.icons.DELETE_FOREVER,
+                          on_click=self._confirm_delete_matching),
+        ], alignment=ft.MainAxisAlignment.CENTER)
+
         self.filters_component = Filters(
             on_apply_filters=self.apply_filters,
             on_clear_filters=self.load_data, # Recargar todos los datos al limpiar
@@ -64,9 +184,26 @@ class Dashboard(ft.Column):
                     icon=ft.icons.FILE_DOWNLOAD,
                     on_click=self.export_to_csv
                 ),
+                ft.IconButton(
+                    icon=ft.icons.SHOW_CHART,
+                    tooltip="Mostrar/ocultar gráficos",
+                    on_click=self._toggle_charts_panel
+                ),
+                ft.IconButton(
+                    icon=ft.icons.TIMELINE,
+                    tooltip="Mostrar/ocultar visor de trazas",
+                    on_click=self._toggle_trace_panel
+                ),
+                self.percentile_switch,
             ], alignment=ft.MainAxisAlignment.CENTER),
+            self.trace_panel,
             ft.Divider(),
+            self.charts_panel,
             self.filters_component, # Componente de filtros
+            self.kpi_cards,
+            self.bulk_actions_bar,
+            self.write_status_bar,
+            self.snapshot_text,
             ft.Stack([
                 ft.Column([
                     self.progress_ring,
@@ -92,69 +229,265 @@ class Dashboard(ft.Column):
 
     def did_mount(self):
         """Se llama cuando el componente se monta en la página."""
-        self.load_data() # Carga los datos iniciales al iniciar el dashboard
+        # Se pinta la última vista guardada (si existe) y los datos se cargan en segundo
+        # plano, así la ventana no espera al primer round trip a la base de datos
+        snapshot = load_snapshot(storage=STORAGE_BACKEND) if self.use_snapshot else None
+        if snapshot is not None:
+            self._show_snapshot(snapshot)
+        threading.Thread(
+            target=self.load_data, args=(snapshot and snapshot.get("filters"), snapshot is not None), daemon=True
+        ).start()
+        # Escucha cambios de otros usuarios/procesos
+        self._change_feed_token = get_change_feed_hub().subscribe(self._on_remote_change, self._tracked_object_ids)
+        self.write_queue.listeners.append(self._on_write_queue_change)
+        self._on_write_queue_change(self.write_queue.status())
         self.page.add(self.filters_component.start_date_picker, self.filters_component.end_date_picker)
         self.filters_component.did_mount() # Asegura que los date pickers se añadan al overlay
 
     def will_unmount(self):
         """Se llama cuando el componente se desmonta de la página."""
+        self._detach_shared()
         self.filters_component.will_unmount() # Limpia los date pickers del overlay
 
+    def _detach_shared(self):
+        """Da de baja la sesión del ChangeFeed y de la cola de escrituras compartidos."""
+        if self._change_feed_token is not None:
+            get_change_feed_hub().unsubscribe(self._change_feed_token)
+            self._change_feed_token = None
+        if self._on_write_queue_change in self.write_queue.listeners:
+            self.write_queue.listeners.remove(self._on_write_queue_change)
+
+    def dispose(self):
+        """
+        Libera el estado de la sesión al cerrarla (modo web: la pestaña se cerró y puede
+        que `will_unmount` no llegue a llamarse). No cierra ningún recurso compartido.
+        """
+        self._detach_shared()
+        self._summary_executor.shutdown(wait=False)
+        with self._lock:
+            self._row_pool.clear()
+            self._rows_by_id = {}
+
+    def _update_page(self, urgent=False):
+        """Pide el envío de los cambios de la UI (agrupado por ui/update_scheduler.py)."""
+        request_update(self.page, urgent)
+
     def _set_loading_state(self, loading=True, message=""):
         """Muestra/oculta el indicador de carga y el mensaje de estado."""
         self.progress_ring.visible = loading
         self.status_text.visible = loading
         self.status_text.value = message
         self.data_table.visible = not loading
-        self.page.update()
+        self._update_page(urgent=loading) # El indicador de carga se muestra antes de la consulta
+
+    def _show_snapshot(self, snapshot):
+        """
+        Pinta la vista guardada al cerrar la aplicación. Las filas quedan deshabilitadas
+        (sin datos en el almacén no se pueden editar ni ordenar) hasta que `load_data`
+        revalida y reutiliza sus controles por _id.
+        """
+        with tracer.span("warm_start.render", rows=len(snapshot["rows"])):
+            with self._lock:
+                self.current_filters = snapshot.get("filters")
+                self._set_columns(snapshot["columns"])
+                rows = []
+                for row_id, *values in snapshot["rows"]:
+                    data_row = self._build_row(row_id, values)
+                    self._row_pool[row_id] = data_row
+                    self._rows_by_id[row_id] = data_row
+                    rows.append(data_row)
+                self.data_table.rows = rows
+                self.data_table.visible = bool(rows)
+                self.data_table.disabled = True
+            self.current_summary = snapshot.get("summary")
+            self.kpi_cards.set_summary(self.current_summary)
+            self.filters_component.set_filters(self.current_filters or {})
+            self.snapshot_text.value = (f"Vista guardada: {len(rows)} de {snapshot.get('total_rows', len(rows))} "
+                                        f"partidos. Actualizando...")
+            self.snapshot_text.visible = True
+            self._update_page(urgent=True)
+        self.warm_start_ms = (time.perf_counter() - self._created_at) * 1000
+        print(f"Vista guardada mostrada en {self.warm_start_ms:.0f} ms.")
+        self.filters_component.update_dropdown_options(snapshot.get("teams", []), snapshot.get("leagues", []))
+
+    def save_view_snapshot(self):
+        """Guarda la vista actual para el próximo arranque. Retorna True si se guardó."""
+        with self._lock:
+            if self.store.df is None:
+                return False
+            rows = [[row_id, *map(str, values)] for row_id, *values
+                    in islice(self.store.iter_values(self._display_columns), SNAPSHOT_MAX_ROWS)]
+            snapshot = {
+                "storage": STORAGE_BACKEND,
+                "filters": self.current_filters,
+                "columns": list(self._display_columns),
+                "rows": rows,
+                "total_rows": len(self.store),
+                "teams": list(self.filters_component.unique_teams),
+                "leagues": list(self.filters_component.unique_leagues),
+                "summary": self.current_summary,
+            }
+        return save_snapshot(snapshot)
+
+    def load_data(self, filters=None, revalidate=False):
+        """
+        Carga los datos de partidos desde MongoDB y actualiza la tabla.
+        Con `revalidate` (arranque desde la vista guardada) no se oculta la tabla
+        mientras se consulta: las filas que no cambiaron se conservan tal cual.
+        """
+        with ui_action(self.page, "load_data", revalidate=revalidate):
+            self._load_data(filters, revalidate)
+        self._refresh_trace_view()
+
+    def _load_data(self, filters=None, revalidate=False):
+        from utils.dataframe_tools import mongo_to_dataframe, clean_and_format_dataframe
 
-    def load_data(self, filters=None):
-        """Carga los datos de partidos desde MongoDB y actualiza la tabla."""
-        self._set_loading_state(True, "Cargando datos de partidos...")
+        if not revalidate:
+            self._set_loading_state(True, "Cargando datos de partidos...")
         try:
-            query = {}
-            if filters:
-                if "start_date" in filters and "end_date" in filters:
-                    query["fecha"] = {
-                        "$gte": filters["start_date"],
-                        "$lte": filters["end_date"]
-                    }
-                elif "start_date" in filters:
-                    query["fecha"] = {"$gte": filters["start_date"]}
-                elif "end_date" in filters:
-                    query["fecha"] = {"$lte": filters["end_date"]}
-
-                if "team" in filters:
-                    query["$or"] = [
-                        {"equipo_local": filters["team"]},
-                        {"equipo_visitante": filters["team"]}
-                    ]
-                if "league" in filters:
-                    query["liga"] = filters["league"]
-
-            mongo_docs = find_documents(query)
-            df = mongo_to_dataframe(mongo_docs)
-            df = clean_and_format_dataframe(df) # Limpiar y formatear los datos
-
-            self._update_data_table(df)
-
-            # Actualizar opciones de filtros después de cargar datos
-            unique_teams = get_unique_teams()
-            unique_leagues = get_unique_leagues()
-            self.filters_component.update_dropdown_options(unique_teams, unique_leagues)
+            query = build_match_query(filters)
+            summary_future = self._summary_executor.submit(get_match_summary, query)
 
+            with tracer.span("load_data.query"):
+                mongo_docs = find_documents_cached(query) # Compartida con las demás sesiones
+            with tracer.span("load_data.mongo_to_dataframe", docs=len(mongo_docs)):
+                df = mongo_to_dataframe(mongo_docs)
+            with tracer.span("load_data.clean_and_format_dataframe"):
+                df = clean_and_format_dataframe(df) # Limpiar y formatear los datos
+
+            with self._lock:
+                self.current_query = query
+                self.current_filters = filters
+                self._update_data_table(df)
+                self.data_table.disabled = False
+                # Las ediciones aún no escritas se muestran sobre los datos leídos
+                for match_id, updates in self.write_queue.unwritten().items():
+                    self._patch_row(match_id, updates)
+            self._refresh_percentiles()
+            self.charts_panel.set_query(query, team=(filters or {}).get("team"))
+            with tracer.span("load_data.summary_wait"):
+                self.current_summary = summary_future.result()
+                self.kpi_cards.set_summary(self.current_summary)
+
+            # Actualizar opciones de filtros después de cargar datos (solo si cambiaron)
+            with tracer.span("load_data.dropdowns"):
+                unique_teams = get_unique_teams()
+                unique_leagues = get_unique_leagues()
+                if (unique_teams, unique_leagues) != (self.filters_component.unique_teams,
+                                                      self.filters_component.unique_leagues):
+                    self.filters_component.update_dropdown_options(unique_teams, unique_leagues)
+
+            self.snapshot_text.visible = False
             self._set_loading_state(False)
-            self.page.update()
+            self._update_page()
         except Exception as e:
             self._set_loading_state(False)
+            if revalidate:
+                self.snapshot_text.value = f"Vista guardada: no se pudo actualizar ({e})."
             self.status_text.value = f"Error al cargar datos: {e}"
             self.status_text.visible = True
-            self.page.update()
+            self._update_page()
             print(f"Error al cargar datos: {e}")
 
-    def _update_data_table(self, df):
-        """Actualiza las columnas y filas del ft.DataTable con el DataFrame."""
-        if df.empty:
+    def _refresh_kpis(self):
+        """Recalcula los KPIs de la consulta activa en segundo plano (tras una escritura)."""
+        def done(future):
+            try:
+                summary = future.result()
+                error = None if summary is not None else "la consulta falló"
+            except Exception as e:
+                summary, error = None, e
+            # Si falla, las tarjetas muestran "-" en lugar de los valores anteriores
+            self.current_summary = summary
+            self.kpi_cards.set_summary(summary)
+            if error is not None:
+                self.status_text.value = f"Error al recalcular los KPIs: {error}"
+                self.status_text.visible = True
+                print(f"Error al recalcular los KPIs: {error}")
+            self._update_page()
+
+        with self._lock:
+            query = dict(self.current_query)
+        self._summary_executor.submit(get_match_summary, query).add_done_callback(done)
+        self._refresh_percentiles() # Los sketches también cambian con cada escritura
+
+    def _on_percentiles_toggle(self, e):
+        if self.percentile_switch.value:
+            self._refresh_percentiles()
+        else:
+            with self._lock:
+                indexes = [i for i, col in enumerate(self._display_columns) if col in PERCENTILE_COLUMNS]
+                for data_row in self._rows_by_id.values():
+                    for index in indexes:
+                        data_row.cells[index].content.spans = None
+            self._update_page()
+
+    def _refresh_percentiles(self):
+        """
+        Calcula en segundo plano el percentil de cada celda de remates, posesión y
+        tarjetas dentro de su liga y temporada (sketches de db/sketches.py, una sola
+        lectura para todas las combinaciones) y lo muestra junto al valor (" p90").
+        """
+        with self._lock:
+            if not self.percentile_switch.value or self.store.empty or "liga" not in self.store.columns:
+                return
+            columns = [col for col in self._display_columns if col in PERCENTILE_COLUMNS]
+            season_column = "temporada" if "temporada" in self.store.columns else "liga"
+            rows = list(self.store.iter_values(["liga", season_column, *columns]))
+        if not columns:
+            return
+
+        def season(value):
+            return int(value) if season_column == "temporada" and _is_number(value) else None
+
+        def compute():
+            keys = {(liga, season(temporada), PERCENTILE_COLUMNS[col])
+                    for _, liga, temporada, *_ in rows for col in columns}
+            distributions = get_distributions(keys)
+            badges = {}
+            for row_id, liga, temporada, *values in rows:
+                badges[row_id] = [
+                    distributions[(liga, season(temporada), PERCENTILE_COLUMNS[col])].percentile(float(value))
+                    if _is_number(value) else None
+                    for col, value in zip(columns, values)
+                ]
+            return badges
+
+        def done(future):
+            try:
+                badges = future.result()
+            except Exception as e:
+                print(f"Error al calcular los percentiles: {e}")
+                return
+            with self._lock:
+                indexes = [self._display_columns.index(col) for col in columns if col in self._display_columns]
+                if len(indexes) != len(columns):
+                    return # Cambiaron las columnas mientras se calculaba
+                for row_id, percentiles in badges.items():
+                    data_row = self._rows_by_id.get(row_id)
+                    if data_row is None:
+                        continue
+                    for index, percentile in zip(indexes, percentiles):
+                        data_row.cells[index].content.spans = None if percentile is None else [
+                            ft.TextSpan(f" p{percentile:.0f}", ft.TextStyle(size=10, color=_percentile_color(percentile)))
+                        ]
+            self._update_page()
+
+        self._summary_executor.submit(compute).add_done_callback(done)
+
+    def _update_data_table(self, df=None):
+        """
+        Sincroniza las columnas y filas del ft.DataTable con el almacén.
+        Si se pasa `df`, primero pasa a ser el contenido del almacén.
+        Las filas ya creadas se reutilizan por _id (solo se cambian las celdas cuyo
+        valor difiere y se reordenan), así Flet envía al cliente solo las diferencias.
+        """
+        if df is not None:
+            self.store.load(df)
+        self._rows_by_id = {}
+        self.selected_ids &= set(self.store.ids())
+        self._refresh_selection_bar()
+        if self.store.empty:
             self.data_table.columns = []
             self.data_table.rows = []
             self.status_text.value = "No hay datos para mostrar."
@@ -162,116 +495,244 @@ class Dashboard(ft.Column):
             self.data_table.visible = False
             return
 
-        # Crear columnas
+        with tracer.span("table.build_rows", rows=len(self.store)):
+            self._set_columns([col for col in self.store.columns if col not in HIDDEN_COLUMNS])
+
+            # Filas: se reutilizan las del pool; cada fila solo guarda su _id y los
+            # datos se leen del almacén al editar
+            rows = []
+            created = changed_cells = 0
+            for row_id, *values in self.store.iter_values(self._display_columns):
+                data_row = self._row_pool.get(row_id)
+                if data_row is None:
+                    data_row = self._build_row(row_id, values)
+                    self._row_pool[row_id] = data_row
+                    created += 1
+                else:
+                    changed_cells += self._sync_row_cells(data_row, values)
+                    data_row.selected = row_id in self.selected_ids
+                    self._row_pool.move_to_end(row_id)
+                self._rows_by_id[row_id] = data_row
+                rows.append(data_row)
+            self.data_table.rows = rows
+            self._trim_row_pool()
+            self.last_table_build = {"rows": len(rows), "created": created,
+                                     "reused": len(rows) - created, "changed_cells": changed_cells}
+        self.data_table.visible = True
+        self.status_text.visible = False # Ocultar mensaje de "No hay datos" si hay datos
+        self._update_page()
+
+    def _set_columns(self, display_columns):
+        """
+        Crea las columnas de la tabla (sin las columnas internas como '_id').
+        Si no cambiaron se conservan, junto con las filas del pool.
+        """
+        if display_columns == self._display_columns and self.data_table.columns:
+            return
+        self._display_columns = display_columns
+        self._row_pool.clear() # Las filas existentes tienen otras celdas
         columns = []
-        for col in df.columns:
-            # Excluir la columna '_id' de la visualización si no es necesaria
-            if col == "_id":
-                continue
+        for col in self._display_columns:
             columns.append(
                 ft.DataColumn(
                     ft.Text(col.replace('_', ' ').title(), weight=ft.FontWeight.BOLD),
-                    on_sort=lambda e, col_name=col: self._sort_data_table(e, col_name, df)
+                    on_sort=lambda e, col_name=col: self._sort_data_table(e, col_name)
                 )
             )
         # Añadir columna de acciones
         columns.append(ft.DataColumn(ft.Text("Acciones", weight=ft.FontWeight.BOLD)))
         self.data_table.columns = columns
 
-        # Crear filas
-        rows = []
-        for index, row in df.iterrows():
-            cells = []
-            row_id = row["_id"] # Guardar el _id para acciones de edición/eliminación
-
-            for col in df.columns:
-                if col == "_id":
-                    continue
-                cells.append(ft.DataCell(ft.Text(str(row[col]))))
-
-            # Añadir botones de acción a la última celda de cada fila
-            cells.append(
-                ft.DataCell(
-                    ft.Row([
-                        ft.IconButton(
-                            icon=ft.icons.EDIT,
-                            tooltip="Editar",
-                            on_click=lambda e, r=row.to_dict(): self.open_edit_popup(r)
-                        ),
-                        ft.IconButton(
-                            icon=ft.icons.DELETE,
-                            tooltip="Eliminar",
-                            on_click=lambda e, id=row_id: self.confirm_delete(id)
-                        ),
-                    ])
-                )
+    @staticmethod
+    def _sync_row_cells(data_row, values):
+        """Actualiza solo las celdas cuyo texto cambió. Retorna el número de celdas modificadas."""
+        changed = 0
+        for cell, value in zip(data_row.cells, values):
+            text = str(value)
+            if cell.content.value != text:
+                cell.content.value = text
+                changed += 1
+        return changed
+
+    def _trim_row_pool(self):
+        """Descarta los controles menos recientes que no están en la vista actual."""
+        excess = len(self._row_pool) - len(self._rows_by_id) - ROW_POOL_SPARE
+        while excess > 0:
+            self._row_pool.popitem(last=False)
+            excess -= 1
+
+    def _build_row(self, row_id, values):
+        """Crea el ft.DataRow de un partido a partir de los valores de las columnas visibles."""
+        cells = [ft.DataCell(ft.Text(str(value))) for value in values]
+
+        # Añadir botones de acción a la última celda de cada fila
+        cells.append(
+            ft.DataCell(
+                ft.Row([
+                    ft.IconButton(
+                        icon=ft.icons.EDIT,
+                        tooltip="Editar",
+                        on_click=lambda e, id=row_id: self.open_edit_popup_by_id(id)
+                    ),
+                    ft.IconButton(
+                        icon=ft.icons.DELETE,
+                        tooltip="Eliminar",
+                        on_click=lambda e, id=row_id: self.confirm_delete(id)
+                    ),
+                ])
             )
-            rows.append(ft.DataRow(cells))
-        self.data_table.rows = rows
-        self.data_table.visible = True
-        self.status_text.visible = False # Ocultar mensaje de "No hay datos" si hay datos
-        self.page.update()
+        )
+        return ft.DataRow(
+            cells,
+            selected=row_id in self.selected_ids,
+            on_select_changed=lambda e, id=row_id: self._on_row_select_changed(e, id)
+        )
 
-    def _sort_data_table(self, e, column_name, df):
+    def _sort_data_table(self, e, column_name):
         """Maneja el ordenamiento de la tabla."""
         self.data_table.sort_column_index = e.control.col_index
         self.data_table.sort_ascending = e.control.sort_ascending
 
-        if e.control.sort_ascending:
-            df_sorted = df.sort_values(by=column_name, ascending=True)
-        else:
-            df_sorted = df.sort_values(by=column_name, ascending=False)
+        with self._lock:
+            self.store.sort(column_name, ascending=e.control.sort_ascending)
+            self._update_data_table() # Actualiza la tabla con los datos ordenados
+
+    def _tracked_object_ids(self):
+        """_id (como ObjectId) de los partidos que están en pantalla."""
+        with self._lock:
+            ids = list(self._rows_by_id)
+        return [ObjectId(row_id) for row_id in ids if ObjectId.is_valid(row_id)]
+
+    def _on_remote_change(self, change):
+        """Callback del ChangeFeed: aplica el cambio sobre la tabla actual."""
+        document = change.get("doc")
+        if document:
+            # Los equipos nuevos quedan disponibles en la búsqueda sin recargar
+            self.filters_component.team_index.add([document.get("equipo_local"), document.get("equipo_visitante")])
+        with ui_action(self.page, "change_feed.apply", op=change["op"]):
+            if self._apply_change(change):
+                self._update_page()
+
+    def _apply_change(self, change):
+        """
+        Aplica una inserción, actualización o eliminación sobre el DataFrame y la tabla
+        en memoria, sin recargar desde MongoDB.
+        Retorna True si la vista cambió.
+        """
+        from utils.dataframe_tools import mongo_to_dataframe, clean_and_format_dataframe
 
-        self._update_data_table(df_sorted) # Actualiza la tabla con los datos ordenados
+        row_id = str(change["_id"])
+        document = change.get("doc")
+
+        with self._lock:
+            if self.store.df is None:
+                return False
+            visible = row_id in self._rows_by_id
+            matches = document is not None and document_matches_query(document, self.current_query)
+
+            if not matches:
+                if not visible:
+                    return False
+                # Eliminado o ya no cumple el filtro activo: quitar la fila
+                self._remove_rows([row_id])
+                return True
+
+            new_df = clean_and_format_dataframe(mongo_to_dataframe([document]))
+            if self.store.empty:
+                self._update_data_table(new_df)
+                return True
+
+            new_df = new_df.reindex(columns=self.store.columns)
+            if visible:
+                self._patch_row(row_id, new_df.iloc[0].to_dict())
+            else:
+                self.store.append(new_df)
+                data_row = self._build_row(row_id, [new_df.iloc[0][col] for col in self._display_columns])
+                self._rows_by_id[row_id] = data_row
+                self._row_pool[row_id] = data_row
+                self.data_table.rows.append(data_row)
+            return True
+
+    def _patch_row(self, row_id, updates):
+        """
+        Sobrescribe en memoria los campos `updates` de la fila `row_id`, tanto en el
+        DataFrame como en las celdas de su ft.DataRow. Retorna True si la fila existe.
+        """
+        with self._lock:
+            data_row = self._rows_by_id.get(row_id)
+            if data_row is None:
+                return False
+            for col, value in self.store.update(row_id, updates).items():
+                if col in self._display_columns:
+                    data_row.cells[self._display_columns.index(col)].content.value = str(value)
+            return True
 
     def load_dummy_data(self, e):
         """Carga datos de prueba simulados en MongoDB."""
-        self._set_loading_state(True, "Generando y cargando datos de prueba...")
-        simulate_fetch_and_store_dummy_data(num_matches=20)
-        self.load_data() # Recarga la tabla después de insertar datos
-        self._set_loading_state(False, "Datos de prueba cargados.")
-        self.page.update()
+        from api.fetch_matches import simulate_fetch_and_store_dummy_data
+
+        with ui_action(self.page, "load_dummy_data"):
+            self._set_loading_state(True, "Generando y cargando datos de prueba...")
+            simulate_fetch_and_store_dummy_data(num_matches=20)
+            self.load_data() # Recarga la tabla después de insertar datos
+            self._set_loading_state(False, "Datos de prueba cargados.")
 
     def load_api_data(self, e):
         """Carga datos reales desde la API-Football en MongoDB."""
-        self._set_loading_state(True, "Obteniendo datos de API-Football...")
-        # Aquí puedes añadir un input para que el usuario especifique fecha, liga, etc.
-        # Por ahora, se llama sin parámetros, lo que podría no ser lo ideal para la API.
-        # Considera añadir un diálogo o campos de entrada para estos parámetros.
-        fetch_and_store_matches_from_api() # Llama a la función real de la API
-        self.load_data() # Recarga la tabla después de insertar datos
-        self._set_loading_state(False, "Datos de API-Football cargados.")
-        self.page.update()
+        from api.fetch_matches import fetch_and_store_matches_from_api
+
+        with ui_action(self.page, "load_api_data"):
+            self._set_loading_state(True, "Obteniendo datos de API-Football...")
+            # Aquí puedes añadir un input para que el usuario especifique fecha, liga, etc.
+            # Por ahora, se llama sin parámetros, lo que podría no ser lo ideal para la API.
+            # Considera añadir un diálogo o campos de entrada para estos parámetros.
+            counts = fetch_and_store_matches_from_api() # Llama a la función real de la API
+            self.load_data() # Recarga la tabla después de insertar datos
+            if counts is None:
+                self._set_loading_state(False, "Error al cargar datos de API-Football.")
+            else:
+                self._set_loading_state(False, f"Datos de API-Football cargados: {counts['new']} nuevos, "
+                                               f"{counts['changed']} modificados, {counts['unchanged']} sin cambios.")
 
     def export_to_csv(self, e):
         """Exporta los datos actuales de la tabla a un archivo CSV."""
+        with ui_action(self.page, "export_to_csv"):
+            self._export_to_csv()
+        self._refresh_trace_view()
+
+    def _export_to_csv(self):
+        from utils.dataframe_tools import mongo_to_dataframe, clean_and_format_dataframe
+
         self._set_loading_state(True, "Exportando a CSV...")
         try:
             # Obtener el DataFrame actual de la tabla (si ya está cargado)
             # Una forma más robusta sería obtener los datos directamente de la DB con los filtros actuales
-            current_mongo_docs = find_documents(self._get_current_filters_as_query())
-            df_to_export = mongo_to_dataframe(current_mongo_docs)
-            df_to_export = clean_and_format_dataframe(df_to_export)
+            with tracer.span("export_to_csv.query"):
+                current_mongo_docs = find_documents(build_match_query(self._get_current_filters_as_query()))
+            with tracer.span("export_to_csv.mongo_to_dataframe", docs=len(current_mongo_docs)):
+                df_to_export = mongo_to_dataframe(current_mongo_docs)
+            with tracer.span("export_to_csv.clean_and_format_dataframe"):
+                df_to_export = clean_and_format_dataframe(df_to_export)
 
-            # Eliminar la columna '_id' antes de exportar si no es necesaria en el CSV
-            if '_id' in df_to_export.columns:
-                df_to_export = df_to_export.drop(columns=['_id'])
+            # Eliminar las columnas internas ('_id', 'updated_at') antes de exportar
+            df_to_export = df_to_export.drop(columns=[c for c in HIDDEN_COLUMNS if c in df_to_export.columns])
 
             file_path = "partidos_futbol.csv"
-            df_to_export.to_csv(file_path, index=False, encoding='utf-8')
+            with tracer.span("export_to_csv.write_csv", rows=len(df_to_export)):
+                df_to_export.to_csv(file_path, index=False, encoding='utf-8')
             self._set_loading_state(False, f"Datos exportados a '{file_path}'")
             self.page.snack_bar = ft.SnackBar(
                 ft.Text(f"Datos exportados a '{file_path}' exitosamente."),
                 open=True
             )
-            self.page.update()
+            self._update_page()
         except Exception as ex:
             self._set_loading_state(False, f"Error al exportar CSV: {ex}")
             self.page.snack_bar = ft.SnackBar(
                 ft.Text(f"Error al exportar CSV: {ex}"),
                 open=True
             )
-            self.page.update()
+            self._update_page()
             print(f"Error al exportar CSV: {ex}")
 
     def apply_filters(self, filters):
@@ -281,45 +742,70 @@ class Dashboard(ft.Column):
 
     def _get_current_filters_as_query(self):
         """
-        Construye el objeto de consulta de MongoDB basado en los filtros actuales
-        del componente Filters.
+        Retorna los filtros actualmente seleccionados en el componente Filters
+        (para construir la consulta usar `build_match_query`).
         """
-        filters = {}
-        if self.filters_component.selected_start_date:
-            filters["start_date"] = self.filters_component.selected_start_date.isoformat() + "Z"
-        if self.filters_component.selected_end_date:
-            end_of_day = self.filters_component.selected_end_date + timedelta(days=1) - timedelta(microseconds=1)
-            filters["end_date"] = end_of_day.isoformat() + "Z"
-        if self.filters_component.selected_team:
-            filters["team"] = self.filters_component.selected_team
-        if self.filters_component.selected_league:
-            filters["league"] = self.filters_component.selected_league
-        return filters
+        return self.filters_component.get_filters()
+
+    def open_edit_popup_by_id(self, match_id):
+        """Abre el popup de edición con los datos actuales de la fila `match_id`."""
+        with self._lock:
+            match_data = self.store.row(match_id)
+        if match_data is None:
+            return
+        self.open_edit_popup(match_data)
 
     def open_edit_popup(self, match_data):
         """Abre el popup para editar un partido."""
         edit_dialog = EditMatchPopup(match_data, self.save_edited_match)
         self.page.dialog = edit_dialog
         edit_dialog.open = True
-        self.page.update()
+        self._update_page()
 
     def save_edited_match(self, match_id, updated_data):
-        """Guarda los cambios de un partido editado en MongoDB."""
-        self._set_loading_state(True, "Guardando cambios...")
-        success = update_document(match_id, updated_data)
-        if success:
-            self.load_data(self._get_current_filters_as_query()) # Recarga los datos para reflejar el cambio
-            self.page.snack_bar = ft.SnackBar(
-                ft.Text("Partido actualizado exitosamente."),
-                open=True
-            )
-        else:
-            self.page.snack_bar = ft.SnackBar(
-                ft.Text("Error al actualizar el partido."),
-                open=True
-            )
-        self._set_loading_state(False)
-        self.page.update()
+        """
+        Guarda los cambios de un partido editado de forma optimista: la fila se actualiza
+        en pantalla al instante y la edición pasa a la cola de escrituras diferidas
+        (db/write_queue.py), que la escribe en lote y la reintenta si falla.
+        """
+        if not updated_data:
+            self.page.snack_bar = ft.SnackBar(ft.Text("No hay cambios que guardar."), open=True)
+            self._update_page()
+            return
+
+        updated_data = self._with_derived_fields(match_id, updated_data)
+        with ui_action(self.page, "save_edited_match"):
+            with tracer.span("save_edited_match.patch_row"):
+                self._patch_row(match_id, updated_data)
+            with tracer.span("save_edited_match.enqueue", fields=len(updated_data)):
+                self.write_queue.enqueue(match_id, updated_data)
+            self._update_page()
+        self._refresh_trace_view()
+
+    def _with_derived_fields(self, match_id, updates):
+        """Añade a `updates` los campos derivados (goles_total, resultado) si cambian los goles."""
+        if not any(field in updates for field in GOAL_FIELDS):
+            return updates
+        with self._lock:
+            current = self.store.row(match_id) or {}
+        return {**updates, **derived_fields({**current, **updates})}
+
+    def _on_write_queue_change(self, status):
+        """Muestra las ediciones pendientes/fallidas de la cola de escrituras."""
+        parts = []
+        if status["pending"]:
+            parts.append(f"{status['pending']} ediciones pendientes de guardar")
+        if status["failed"]:
+            parts.append(f"{status['failed']} fallidas")
+        if status["last_error"]:
+            parts.append(status["last_error"])
+        was_visible = self.write_status_bar.visible
+        self.write_status_text.value = " · ".join(parts)
+        self.write_status_bar.visible = bool(status["pending"] or status["failed"])
+        self.write_status_bar.controls[-1].visible = bool(status["failed"])
+        if was_visible and not self.write_status_bar.visible:
+            self._refresh_kpis() # Todo escrito: los KPIs ya reflejan las ediciones
+        self._update_page()
 
     def confirm_delete(self, match_id):
         """Muestra un diálogo de confirmación antes de eliminar un partido."""
@@ -327,7 +813,7 @@ class Dashboard(ft.Column):
             if e.control.text == "Sí":
                 self.delete_match(match_id)
             self.page.dialog.open = False
-            self.page.update()
+            self._update_page()
 
         self.page.dialog = ft.AlertDialog(
             modal=True,
@@ -340,22 +826,284 @@ class Dashboard(ft.Column):
             actions_alignment=ft.MainAxisAlignment.END,
         )
         self.page.dialog.open = True
-        self.page.update()
+        self._update_page()
 
     def delete_match(self, match_id):
         """Elimina un partido de MongoDB."""
-        self._set_loading_state(True, "Eliminando partido...")
-        success = delete_document(match_id)
-        if success:
-            self.load_data(self._get_current_filters_as_query()) # Recarga los datos
-            self.page.snack_bar = ft.SnackBar(
-                ft.Text("Partido eliminado exitosamente."),
-                open=True
-            )
+        with ui_action(self.page, "delete_match"):
+            self._set_loading_state(True, "Eliminando partido...")
+            with tracer.span("delete_match.delete_document"):
+                success = bool(apply_match_deletes([match_id]))
+            if success:
+                with tracer.span("delete_match.remove_row"):
+                    self._apply_change({"op": "delete", "_id": match_id, "doc": None})
+                self._refresh_kpis()
+                self.page.snack_bar = ft.SnackBar(
+                    ft.Text("Partido eliminado exitosamente."),
+                    open=True
+                )
+            else:
+                self.page.snack_bar = ft.SnackBar(
+                    ft.Text("Error al eliminar el partido."),
+                    open=True
+                )
+            self._set_loading_state(False)
+            self._update_page()
+        self._refresh_trace_view()
+
+    def _on_row_select_changed(self, e, row_id):
+        """Marca o desmarca una fila para las acciones masivas."""
+        selected = e.data == "true"
+        e.control.selected = selected
+        if selected:
+            self.selected_ids.add(row_id)
         else:
-            self.page.snack_bar = ft.SnackBar(
-                ft.Text("Error al eliminar el partido."),
-                open=True
-            )
-        self._set_loading_state(False)
-        self.page.update()
\ No newline at end of file
+            self.selected_ids.discard(row_id)
+        self._refresh_selection_bar()
+        self._update_page()
+
+    def _refresh_selection_bar(self):
+        """Actualiza el contador de selección y habilita/deshabilita las acciones masivas."""
+        self.selection_text.value = f"{len(self.selected_ids)} seleccionados"
+        for button in self.bulk_buttons:
+            button.disabled = not self.selected_ids
+
+    def _confirm_action(self, title, message, on_confirm):
+        """Muestra un diálogo de confirmación Sí/No y ejecuta `on_confirm` si se acepta."""
+        def closed(e):
+            self.page.dialog.open = False
+            self._update_page()
+            if e.control.text == "Sí":
+                on_confirm()
+
+        self.page.dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(title),
+            content=ft.Text(message),
+            actions=[
+                ft.TextButton("No", on_click=closed),
+                ft.TextButton("Sí", on_click=closed),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        self.page.dialog.open = True
+        self._update_page()
+
+    def _remove_rows(self, row_ids):
+        """Quita varias filas de la tabla y del almacén en una sola pasada (sin enviar la UI)."""
+        removed = set(self.store.remove(row_ids))
+        if not removed:
+            return
+        removed_rows = {id(self._rows_by_id.pop(row_id)) for row_id in removed if row_id in self._rows_by_id}
+        for row_id in removed:
+            self._row_pool.pop(row_id, None)
+        self.data_table.rows = [row for row in self.data_table.rows if id(row) not in removed_rows]
+        self.selected_ids -= removed
+        self._refresh_selection_bar()
+        if self.store.empty:
+            self._update_data_table()
+
+    def _show_message(self, message):
+        self.page.snack_bar = ft.SnackBar(ft.Text(message), open=True)
+        self._update_page()
+
+    def _confirm_bulk_delete(self, e):
+        ids = list(self.selected_ids)
+        self._confirm_action(
+            "Confirmar Eliminación",
+            f"¿Estás seguro de que quieres eliminar {len(ids)} partidos?",
+            lambda: self.bulk_delete(ids)
+        )
+
+    def bulk_delete(self, match_ids):
+        """Elimina los partidos seleccionados con un único bulk_write."""
+        with ui_action(self.page, "bulk_delete", rows=len(match_ids)):
+            with tracer.span("bulk_delete.bulk_write"):
+                deleted = apply_match_deletes(match_ids)
+            if deleted is None:
+                self._show_message("Error al eliminar los partidos seleccionados.")
+            else:
+                with self._lock:
+                    self._remove_rows(match_ids)
+                self._refresh_kpis()
+                self._show_message(f"{deleted} partidos eliminados.")
+        self._refresh_trace_view()
+
+    def _confirm_delete_matching(self, e):
+        with self._lock:
+            count = len(self.store)
+            query = dict(self.current_query)
+        scope = "que cumplen el filtro actual" if query else "de la colección (no hay filtros activos)"
+        self._confirm_action(
+            "Confirmar Eliminación",
+            f"¿Eliminar TODOS los partidos {scope}? Se ven {count} en la tabla.",
+            lambda: self.delete_matching(query)
+        )
+
+    def delete_matching(self, query):
+        """Elimina con `delete_many` todos los partidos que cumplen la consulta activa."""
+        with ui_action(self.page, "delete_matching"):
+            deleted = apply_matching_delete(query)
+            if deleted is None:
+                self._show_message("Error al eliminar los partidos del filtro actual.")
+            else:
+                with self._lock:
+                    self.store.clear()
+                    self._update_data_table()
+                self._refresh_kpis()
+                self._show_message(f"{deleted} partidos eliminados.")
+        self._refresh_trace_view()
+
+    def _open_bulk_edit_dialog(self, e):
+        """Diálogo para asignar el mismo valor a un campo en todas las filas seleccionadas."""
+        field_dropdown = ft.Dropdown(
+            label="Campo",
+            options=[ft.dropdown.Option(col) for col in self._display_columns if col != "fixture_id"],
+            width=250,
+        )
+        value_field = ft.TextField(label="Nuevo valor", width=250)
+
+        def closed(ev):
+            self.page.dialog.open = False
+            self._update_page()
+            if ev.control.text == "Aplicar" and field_dropdown.value:
+                self.bulk_set_field(list(self.selected_ids), field_dropdown.value, value_field.value)
+
+        self.page.dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(f"Editar {len(self.selected_ids)} partidos"),
+            content=ft.Column([field_dropdown, value_field], tight=True),
+            actions=[
+                ft.TextButton("Cancelar", on_click=closed),
+                ft.ElevatedButton("Aplicar", on_click=closed),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        self.page.dialog.open = True
+        self._update_page()
+
+    def _coerce_to_column_type(self, column, raw_value):
+        """Convierte el texto ingresado al tipo de la columna del DataFrame."""
+        import pandas as pd
+
+        dtype = self.store.dtype(column)
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            parsed = to_utc_datetime(raw_value)
+            if parsed is None:
+                raise ValueError(raw_value)
+            return parsed
+        if pd.api.types.is_bool_dtype(dtype):
+            return str(raw_value).strip().lower() in ("true", "1", "si", "sí")
+        if pd.api.types.is_integer_dtype(dtype):
+            return int(raw_value)
+        if pd.api.types.is_float_dtype(dtype):
+            return float(raw_value)
+        return raw_value
+
+    def bulk_set_field(self, match_ids, column, raw_value):
+        """Asigna `column = raw_value` a los partidos seleccionados con un único bulk_write."""
+        try:
+            value = self._coerce_to_column_type(column, raw_value)
+        except ValueError:
+            self._show_message(f"Valor inválido para '{column}': {raw_value}")
+            return
+        self._bulk_update({match_id: {column: value} for match_id in match_ids}, "bulk_set_field")
+
+    def _bulk_reenrich(self, e):
+        """Vuelve a descargar de API-Football los partidos seleccionados y los actualiza en lote."""
+        from api.fetch_matches import fetch_fixtures_by_ids
+
+        with self._lock:
+            fixture_by_id = {
+                match_id: int(fixture_id)
+                for match_id, fixture_id in self.store.column(self.selected_ids, "fixture_id").items()
+            }
+        with ui_action(self.page, "bulk_reenrich", rows=len(fixture_by_id)):
+            self._set_loading_state(True, "Obteniendo datos de API-Football...")
+            try:
+                with tracer.span("bulk_reenrich.fetch", fixtures=len(fixture_by_id)):
+                    fixtures = fetch_fixtures_by_ids(list(fixture_by_id.values()))
+            except Exception as err:
+                self._set_loading_state(False)
+                self.status_text.value = f"Error al obtener datos de API-Football: {err}"
+                self.status_text.visible = True
+                self._update_page()
+                print(f"Error al obtener datos de API-Football: {err}")
+                return
+            self._set_loading_state(False)
+            updates = {
+                match_id: fixtures[fixture_id]
+                for match_id, fixture_id in fixture_by_id.items() if fixture_id in fixtures
+            }
+            if not updates:
+                self._show_message("La API no devolvió datos para los partidos seleccionados.")
+                return
+            self._bulk_update(updates, "bulk_reenrich")
+
+    def _bulk_update(self, updates_by_id, span_name):
+        """Escribe las actualizaciones en un bulk_write y parchea las filas con un único refresco."""
+        updates_by_id = {match_id: self._with_derived_fields(match_id, updates)
+                         for match_id, updates in updates_by_id.items()}
+        with ui_action(self.page, span_name, rows=len(updates_by_id)):
+            with tracer.span(f"{span_name}.bulk_write"):
+                matched = apply_match_updates(updates_by_id)
+            if matched is None:
+                self._show_message("Error al actualizar los partidos seleccionados.")
+            else:
+                with self._lock:
+                    for match_id, updates in updates_by_id.items():
+                        self._patch_row(match_id, updates)
+                self._refresh_kpis()
+                self._show_message(f"{matched} partidos actualizados.")
+        self._refresh_trace_view()
+
+    def _toggle_charts_panel(self, e):
+        """Muestra u oculta el panel de gráficos (se carga al mostrarse)."""
+        self.charts_panel.show(not self.charts_panel.visible)
+
+    def _toggle_trace_panel(self, e):
+        """Muestra u oculta el visor de trazas."""
+        self.trace_panel.visible = not self.trace_panel.visible
+        self._refresh_trace_view()
+
+    def _on_trace_toggle(self, e):
+        """Habilita o deshabilita el registro de spans."""
+        tracer.enabled = bool(e.control.value)
+        if not tracer.enabled:
+            tracer.clear()
+        self._refresh_trace_view()
+
+    def _profile_next_action(self, e):
+        """Captura un perfil por muestreo (flame profile) de la próxima acción."""
+        tracer.enabled = True
+        tracer.profile_next_action = True
+        self.trace_switch.value = True
+        self.page.snack_bar = ft.SnackBar(
+            ft.Text("La próxima acción se perfilará en la carpeta 'trace_profiles'."),
+            open=True
+        )
+        self._update_page()
+
+    def _export_trace(self, e):
+        """Exporta los spans registrados en formato Chrome trace-event JSON."""
+        file_path = tracer.export_chrome_trace()
+        self.page.snack_bar = ft.SnackBar(
+            ft.Text(f"Traza exportada a '{file_path}' (abrir en chrome://tracing o Perfetto)."),
+            open=True
+        )
+        self._update_page()
+
+    def _refresh_trace_view(self):
+        """Muestra en el visor los spans de la última acción registrada."""
+        if not self.trace_panel.visible:
+            return
+        lines = tracer.format_last_action() if tracer.enabled else []
+        if tracer.last_profile_path:
+            lines.append(f"Último perfil: {tracer.last_profile_path}")
+        ui_stats = get_scheduler(self.page).format_last_action()
+        if ui_stats:
+            lines.append(ui_stats)
+        if not lines:
+            lines = ["Sin trazas registradas. Active 'Registrar trazas' y ejecute una acción."]
+        self.trace_lines.controls = [ft.Text(line, size=12, font_family="monospace") for line in lines]
+        self._update_page()
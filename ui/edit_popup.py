@@ -2,6 +2,8 @@
 from datetime import datetime
 
 import flet as ft
+from models.partido_schema import DERIVED_FIELDS
+from ui.update_scheduler import request_update
 
 class EditMatchPopup(ft.AlertDialog):
     """
@@ -14,22 +16,23 @@ class EditMatchPopup(ft.AlertDialog):
         self.match_data = match_data
         self.on_save = on_save
         self.title = ft.Text("Editar Partido")
+        # Diccionario para almacenar las referencias a los campos de entrada
+        # (debe existir antes de construir el contenido, que lo rellena)
+        self.input_fields = {}
         self.content = self._build_content()
         self.actions = [
             ft.TextButton("Cancelar", on_click=self._cancel),
             ft.ElevatedButton("Guardar", on_click=self._save),
         ]
 
-        # Diccionario para almacenar las referencias a los campos de entrada
-        self.input_fields = {}
-
     def _build_content(self):
         """
         Construye el contenido del diálogo con campos de entrada para cada propiedad del partido.
         """
         items = []
-        # Excluir _id y fixture_id de la edición directa si no es necesario
-        excluded_fields = ["_id", "fixture_id"]
+        # Excluir _id y fixture_id de la edición directa si no es necesario. Los campos
+        # derivados y el hash se recalculan al guardar (ver Dashboard.save_edited_match)
+        excluded_fields = ["_id", "fixture_id", "updated_at", "content_hash", *DERIVED_FIELDS]
 
         for key, value in self.match_data.items():
             if key in excluded_fields:
@@ -46,10 +49,10 @@ class EditMatchPopup(ft.AlertDialog):
                     input_filter=ft.InputFilter(allow=True, regex_string=r"[0-9.]", replacement_string=""),
                     on_change=lambda e, k=key: self._validate_numeric_input(e, k)
                 )
-            elif isinstance(value, str) and "T" in value and "Z" in value: # Posible fecha ISO
+            elif isinstance(value, datetime): # Fecha (BSON Date)
                 control = ft.TextField(
                     label=key.replace('_', ' ').title(),
-                    value=value.split('T')[0], # Mostrar solo la parte de la fecha
+                    value=value.strftime("%Y-%m-%d"), # Mostrar solo la parte de la fecha
                     hint_text="YYYY-MM-DD",
                     on_change=lambda e, k=key: self._validate_date_input(e, k)
                 )
@@ -70,7 +73,7 @@ class EditMatchPopup(ft.AlertDialog):
                 float(e.control.value)
         except ValueError:
             e.control.value = "" # Borra el valor si no es un número válido
-        self.page.update()
+        request_update(self.page)
 
     def _validate_date_input(self, e, key):
         """Valida que la entrada sea una fecha en formato YYYY-MM-DD."""
@@ -79,7 +82,7 @@ class EditMatchPopup(ft.AlertDialog):
             e.control.error_text = None
         except ValueError:
             e.control.error_text = "Formato de fecha inválido (YYYY-MM-DD)"
-        self.page.update()
+        request_update(self.page)
 
     def _save(self, e):
         """
@@ -96,9 +99,10 @@ class EditMatchPopup(ft.AlertDialog):
                         updated_data[key] = int(control.value)
                     elif isinstance(self.match_data[key], float):
                         updated_data[key] = float(control.value)
-                    elif isinstance(self.match_data[key], str) and "T" in self.match_data[key] and "Z" in self.match_data[key]:
-                        # Si es una fecha, reconstruir el formato ISO
-                        updated_data[key] = f"{control.value}T00:00:00Z" # Asume medianoche UTC
+                    elif isinstance(self.match_data[key], datetime):
+                        # Si es una fecha, se cambia el día conservando la hora original del partido
+                        new_day = datetime.strptime(control.value, "%Y-%m-%d").date()
+                        updated_data[key] = datetime.combine(new_day, self.match_data[key].time())
                     else:
                         updated_data[key] = control.value
                 except ValueError:
@@ -107,12 +111,25 @@ class EditMatchPopup(ft.AlertDialog):
             else:
                 updated_data[key] = control.value # Para otros tipos de control si los hubiera
 
-        # Pasa el ID del documento y los datos actualizados a la función on_save
-        self.on_save(self.match_data["_id"], updated_data)
+        # Solo se envían los campos que realmente cambiaron
+        changes = {
+            key: value for key, value in updated_data.items()
+            if not self._is_unchanged(key, value)
+        }
+
+        # Pasa el ID del documento y los campos modificados a la función on_save
+        self.on_save(self.match_data["_id"], changes)
         self.open = False
-        self.page.update()
+        request_update(self.page)
+
+    def _is_unchanged(self, key, value):
+        """Compara el valor editado con el original (los campos de texto se comparan como texto)."""
+        original = self.match_data.get(key)
+        if value == original:
+            return True
+        return isinstance(value, str) and not isinstance(original, str) and value == str(original)
 
     def _cancel(self, e):
         """Cierra el diálogo sin guardar."""
         self.open = False
-        self.page.update()
\ No newline at end of file
+        request_update(self.page)
\ No newline at end of file
@@ -1,7 +1,17 @@
 # ui/filters.py
 
+import threading
+
 import flet as ft
-from datetime import datetime, date, timedelta
+from ui.update_scheduler import request_update
+from datetime import datetime
+from utils.date_tools import start_of_day, end_of_day
+from utils.team_index import TeamSearchIndex
+
+# Espera (en segundos) tras la última tecla antes de buscar equipos
+TEAM_SEARCH_DEBOUNCE = 0.15
+# Número máximo de sugerencias de equipos que se muestran
+TEAM_SEARCH_MAX_RESULTS = 8
 
 class Filters(ft.Column):
     """
@@ -40,13 +50,18 @@ class Filters(ft.Column):
         self.start_date_text = ft.Text("Seleccionar fecha de inicio")
         self.end_date_text = ft.Text("Seleccionar fecha de fin")
 
-        self.team_dropdown = ft.Dropdown(
+        # Búsqueda de equipos por texto (con índice en memoria) en lugar de un dropdown
+        # con una opción por equipo, que no escala a miles de equipos
+        self.team_index = TeamSearchIndex(self.unique_teams)
+        self._team_search_timer = None
+        self.team_search_field = ft.TextField(
             label="Filtrar por Equipo",
-            options=[ft.dropdown.Option(team) for team in sorted(self.unique_teams)],
-            hint_text="Selecciona un equipo",
+            hint_text="Escribe para buscar un equipo",
             width=200,
-            on_change=self._on_team_selected
+            on_change=self._on_team_search_change,
+            on_submit=self._on_team_search_submit,
         )
+        self.team_suggestions = ft.Column([], spacing=0, visible=False, width=200)
 
         self.league_dropdown = ft.Dropdown(
             label="Filtrar por Liga",
@@ -73,9 +88,12 @@ class Filters(ft.Column):
                 ]),
             ]),
             ft.Row([
-                self.team_dropdown,
+                ft.Column([
+                    self.team_search_field,
+                    self.team_suggestions,
+                ], spacing=0),
                 self.league_dropdown,
-            ]),
+            ], vertical_alignment=ft.CrossAxisAlignment.START),
             ft.Row([
                 ft.ElevatedButton("Aplicar Filtros", on_click=self._apply_filters),
                 ft.OutlinedButton("Limpiar Filtros", on_click=self._clear_filters),
@@ -87,42 +105,99 @@ class Filters(ft.Column):
         if self.start_date_picker.value:
             self.selected_start_date = self.start_date_picker.value
             self.start_date_text.value = self.selected_start_date.strftime("%Y-%m-%d")
-        self.page.update()
+        request_update(self.page)
 
     def _on_end_date_change(self, e):
         """Maneja el cambio de la fecha de fin seleccionada."""
         if self.end_date_picker.value:
             self.selected_end_date = self.end_date_picker.value
             self.end_date_text.value = self.selected_end_date.strftime("%Y-%m-%d")
-        self.page.update()
-
-    def _on_team_selected(self, e):
-        """Maneja la selección de un equipo en el dropdown."""
-        self.selected_team = e.control.value
-        self.page.update()
+        request_update(self.page)
+
+    def _on_team_search_change(self, e):
+        """Programa la búsqueda de equipos cuando el usuario deja de escribir (debounce)."""
+        if self._team_search_timer:
+            self._team_search_timer.cancel()
+        text = e.control.value or ""
+        if text != self.selected_team:
+            # El filtro de equipo solo se mantiene mientras el texto es el equipo elegido
+            self.selected_team = None
+        if not text.strip():
+            self.team_suggestions.controls = []
+            self.team_suggestions.visible = False
+            request_update(self.page)
+            return
+        self._team_search_timer = threading.Timer(TEAM_SEARCH_DEBOUNCE, self._show_team_suggestions, args=(text,))
+        self._team_search_timer.daemon = True
+        self._team_search_timer.start()
+
+    def _show_team_suggestions(self, text):
+        """Muestra los equipos que mejor coinciden con el texto escrito."""
+        matches = self.team_index.search(text, k=TEAM_SEARCH_MAX_RESULTS)
+        self.team_suggestions.controls = [
+            ft.TextButton(team, on_click=lambda e, t=team: self._on_team_selected(t))
+            for team in matches
+        ]
+        self.team_suggestions.visible = bool(matches)
+        request_update(self.page)
+
+    def _on_team_search_submit(self, e):
+        """Al pulsar Enter se selecciona la primera sugerencia."""
+        matches = self.team_index.search(e.control.value or "", k=1)
+        if matches:
+            self._on_team_selected(matches[0])
+
+    def _on_team_selected(self, team):
+        """Maneja la selección de un equipo en las sugerencias."""
+        if self._team_search_timer:
+            self._team_search_timer.cancel()
+        self.selected_team = team
+        self.team_search_field.value = team
+        self.team_suggestions.controls = []
+        self.team_suggestions.visible = False
+        request_update(self.page)
 
     def _on_league_selected(self, e):
         """Maneja la selección de una liga en el dropdown."""
         self.selected_league = e.control.value
-        self.page.update()
+        request_update(self.page)
 
     def _apply_filters(self, e):
         """
         Recopila los filtros seleccionados y los pasa a la función de callback.
         """
+        self.on_apply_filters(self.get_filters())
+
+    def get_filters(self):
+        """
+        Retorna el diccionario de filtros seleccionados. Las fechas son datetime UTC,
+        igual que el campo `fecha` almacenado en MongoDB.
+        """
         filters = {}
         if self.selected_start_date:
-            filters["start_date"] = self.selected_start_date.isoformat() + "Z"
+            filters["start_date"] = start_of_day(self.selected_start_date)
         if self.selected_end_date:
-            # Para incluir todo el día de la fecha final, sumar 1 día y usar <
-            end_of_day = self.selected_end_date + timedelta(days=1) - timedelta(microseconds=1)
-            filters["end_date"] = end_of_day.isoformat() + "Z"
+            # Para incluir todo el día de la fecha final se usa su último instante
+            filters["end_date"] = end_of_day(self.selected_end_date)
         if self.selected_team:
             filters["team"] = self.selected_team
         if self.selected_league:
             filters["league"] = self.selected_league
-
-        self.on_apply_filters(filters)
+        return filters
+
+    def set_filters(self, filters):
+        """Muestra `filters` (mismo formato que `get_filters`) sin aplicarlos."""
+        self.selected_start_date = filters.get("start_date")
+        self.selected_end_date = filters.get("end_date")
+        self.selected_team = filters.get("team")
+        self.selected_league = filters.get("league")
+        self.start_date_text.value = (self.selected_start_date.strftime("%Y-%m-%d")
+                                      if self.selected_start_date else "Seleccionar fecha de inicio")
+        self.end_date_text.value = (self.selected_end_date.strftime("%Y-%m-%d")
+                                    if self.selected_end_date else "Seleccionar fecha de fin")
+        self.team_search_field.value = self.selected_team or ""
+        self.league_dropdown.value = self.selected_league
+        request_update(self.page)
 
     def _clear_filters(self, e):
         """
@@ -135,29 +210,32 @@ class Filters(ft.Column):
 
         self.start_date_text.value = "Seleccionar fecha de inicio"
         self.end_date_text.value = "Seleccionar fecha de fin"
-        self.team_dropdown.value = None
+        self.team_search_field.value = ""
+        self.team_suggestions.controls = []
+        self.team_suggestions.visible = False
         self.league_dropdown.value = None
 
         self.on_clear_filters()
-        self.page.update()
+        request_update(self.page)
 
     def did_mount(self):
         """Se llama cuando el componente se monta en la página."""
         self.page.overlay.append(self.start_date_picker)
         self.page.overlay.append(self.end_date_picker)
-        self.page.update()
+        request_update(self.page)
 
     def will_unmount(self):
         """Se llama cuando el componente se desmonta de la página."""
         self.page.overlay.remove(self.start_date_picker)
         self.page.overlay.remove(self.end_date_picker)
-        self.page.update()
+        request_update(self.page)
 
     def update_dropdown_options(self, unique_teams, unique_leagues):
-        """Actualiza las opciones de los dropdowns de equipos y ligas."""
+        """Actualiza el índice de búsqueda de equipos y las opciones del dropdown de ligas."""
         self.unique_teams = unique_teams
         self.unique_leagues = unique_leagues
 
-        self.team_dropdown.options = [ft.dropdown.Option(team) for team in sorted(self.unique_teams)]
+        # El índice solo indexa los equipos que todavía no conocía
+        self.team_index.add(self.unique_teams)
         self.league_dropdown.options = [ft.dropdown.Option(league) for league in sorted(self.unique_leagues)]
-        self.page.update()
\ No newline at end of file
+        request_update(self.page)
\ No newline at end of file
@@ -0,0 +1,44 @@
+# ui/kpi_cards.py
+
+import flet as ft
+
+# (clave del resumen, título, formato del valor)
+KPIS = [
+    ("partidos", "Partidos", "{:,.0f}"),
+    ("goles", "Goles", "{:,.0f}"),
+    ("goles_por_partido", "Goles / partido", "{:.2f}"),
+    ("victorias_local_pct", "Victorias local", "{:.1f} %"),
+    ("posesion_local_media", "Posesión local media", "{:.1f} %"),
+    ("tarjetas_por_partido", "Tarjetas / partido", "{:.2f}"),
+]
+
+class KpiCards(ft.Row):
+    """Fila de tarjetas con los KPIs del filtro activo (ver `get_match_summary`)."""
+
+    def __init__(self):
+        super().__init__()
+        self.alignment = ft.MainAxisAlignment.CENTER
+        self.wrap = True
+        self._values = {}
+        self.controls = [self._build_card(key, title) for key, title, _ in KPIS]
+
+    def _build_card(self, key, title):
+        value_text = ft.Text("-", size=20, weight=ft.FontWeight.BOLD)
+        self._values[key] = value_text
+        return ft.Container(
+            content=ft.Column([
+                ft.Text(title, size=12, color=ft.colors.BLUE_GREY_400),
+                value_text,
+            ], spacing=2, horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+            width=150,
+            padding=10,
+            border=ft.border.all(1, ft.colors.BLUE_GREY_100),
+            border_radius=ft.border_radius.all(10),
+            bgcolor=ft.colors.WHITE,
+        )
+
+    def set_summary(self, summary):
+        """Muestra los valores del resumen (o "-" si no hay datos)."""
+        for key, _, value_format in KPIS:
+            value = (summary or {}).get(key)
+            self._values[key].value = value_format.format(value) if value is not None else "-"
@@ -0,0 +1,185 @@
+# ui/update_scheduler.py
+
+# Agrupa las llamadas a `page.update()` de la interfaz.
+#
+# Cada `page.update()` serializa el diff del árbol de controles y lo envía al cliente.
+# En lugar de llamarlo directamente, los componentes piden una actualización con
+# `request_update(page)`:
+#   - Fuera de una acción, las peticiones de un mismo frame (FRAME_INTERVAL) se
+#     agrupan en un solo envío.
+#   - Dentro de una acción (`ui_action(page, nombre)`), el envío se hace una sola vez
+#     al terminar la acción más externa. Las peticiones urgentes (p. ej. mostrar el
+#     indicador de carga antes de una consulta lenta) se envían en el próximo frame.
+# Por cada acción se registra cuántos envíos se hicieron, cuántas peticiones se
+# agruparon y, si la conexión de Flet lo permite, cuántos bytes se enviaron.
+
+import json
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+from utils.tracing import tracer
+
+# Duración de un frame (60 fps)
+FRAME_INTERVAL = 1 / 60
+# Número de acciones recientes cuyas estadísticas se conservan
+STATS_HISTORY = 50
+
+# Planificador de cada sesión, para repartir los bytes enviados por la conexión de
+# Flet (compartida por todas las sesiones en modo web). Las entradas desaparecen
+# cuando se libera la página de la sesión.
+_schedulers_by_session = weakref.WeakValueDictionary()
+
+def _command_size(commands):
+    """Tamaño aproximado en bytes (JSON) de los comandos que Flet envía al cliente."""
+    try:
+        return len(json.dumps(commands, default=lambda o: getattr(o, "__dict__", str(o))).encode("utf-8"))
+    except (TypeError, ValueError):
+        return 0
+
+class UpdateScheduler:
+    """Planificador de actualizaciones de una página de Flet."""
+
+    def __init__(self, page, frame_interval=FRAME_INTERVAL):
+        self.page = page
+        self.frame_interval = frame_interval
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._timer = None
+        self._depth = 0
+        self._current = None
+        self.bytes_sent = 0
+        self.updates_sent = 0
+        self.history = deque(maxlen=STATS_HISTORY)
+        self.measures_bytes = self._install_byte_counter()
+
+    def _install_byte_counter(self):
+        """
+        Envuelve el envío de comandos de la conexión de Flet para contar bytes. La
+        envoltura se instala una sola vez por conexión y atribuye cada envío al
+        planificador de su sesión.
+        """
+        connection = getattr(self.page, "_Page__conn", None)
+        send_commands = getattr(connection, "send_commands", None)
+        session_id = getattr(self.page, "session_id", None)
+        if send_commands is None or session_id is None:
+            return False
+
+        if not getattr(send_commands, "counts_bytes", False):
+            def counting_send_commands(session_id, commands):
+                scheduler = _schedulers_by_session.get(session_id)
+                if scheduler is not None:
+                    size = _command_size(commands)
+                    with scheduler._lock:
+                        scheduler.bytes_sent += size
+                return send_commands(session_id, commands)
+
+            counting_send_commands.counts_bytes = True
+            connection.send_commands = counting_send_commands
+        _schedulers_by_session[session_id] = self
+        return True
+
+    def request_update(self, urgent=False):
+        """Marca la página como modificada; el envío se agrupa con otras peticiones."""
+        with self._lock:
+            self._dirty = True
+            if self._current is not None:
+                self._current["requests"] += 1
+            if self._depth and not urgent:
+                return
+            if self._timer is None:
+                self._timer = threading.Timer(self.frame_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Envía ahora los cambios pendientes (si los hay)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            bytes_before = self.bytes_sent
+
+        with tracer.span("page.update"):
+            self.page.update()
+
+        with self._lock:
+            self.updates_sent += 1
+            if self._current is not None:
+                self._current["updates"] += 1
+                self._current["bytes"] += self.bytes_sent - bytes_before
+
+    @contextmanager
+    def action(self, name):
+        """Agrupa en un solo envío todas las actualizaciones pedidas dentro del bloque."""
+        with self._lock:
+            self._depth += 1
+            if self._depth == 1:
+                self._current = {"action": name, "updates": 0, "requests": 0, "bytes": 0,
+                                 "started": time.monotonic()}
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._depth -= 1
+                outermost = self._depth == 0
+            if outermost:
+                self.flush()
+                with self._lock:
+                    stats, self._current = self._current, None
+                    stats["ms"] = round((time.monotonic() - stats.pop("started")) * 1000, 1)
+                    self.history.append(stats)
+
+    def last_action(self):
+        """Estadísticas de la última acción terminada, o None."""
+        with self._lock:
+            return dict(self.history[-1]) if self.history else None
+
+    def format_last_action(self):
+        stats = self.last_action()
+        if stats is None:
+            return None
+        size = f"{stats['bytes'] / 1024:.1f} KB" if self.measures_bytes else "bytes no disponibles"
+        return (f"UI '{stats['action']}': {stats['updates']} envíos "
+                f"({stats['requests']} peticiones agrupadas), {size}")
+
+def get_scheduler(page):
+    """Retorna el planificador de `page`, creándolo en el primer uso."""
+    scheduler = getattr(page, "_update_scheduler", None)
+    if scheduler is None:
+        scheduler = UpdateScheduler(page)
+        page._update_scheduler = scheduler
+    return scheduler
+
+def close_scheduler(page):
+    """Descarta el planificador de `page` al cerrar su sesión (cancela el envío pendiente)."""
+    scheduler = getattr(page, "_update_scheduler", None)
+    if scheduler is None:
+        return
+    with scheduler._lock:
+        if scheduler._timer is not None:
+            scheduler._timer.cancel()
+            scheduler._timer = None
+    if _schedulers_by_session.get(getattr(page, "session_id", None)) is scheduler:
+        del _schedulers_by_session[page.session_id]
+    page._update_scheduler = None
+
+def request_update(page, urgent=False):
+    """Pide una actualización de `page` (ver `UpdateScheduler.request_update`)."""
+    if page is not None:
+        get_scheduler(page).request_update(urgent)
+
+@contextmanager
+def ui_action(page, name, **args):
+    """Acción de usuario: un span de traza y un único envío de UI al terminar."""
+    with tracer.span(name, **args):
+        if page is None:
+            yield
+            return
+        with get_scheduler(page).action(name):
+            yield
@@ -1,7 +1,6 @@
 # utils/dataframe_tools.py
 
 import pandas as pd
-from datetime import datetime
 
 def mongo_to_dataframe(mongo_documents):
     """
@@ -17,10 +16,11 @@ def mongo_to_dataframe(mongo_documents):
     if '_id' in df.columns:
         df['_id'] = df['_id'].astype(str)
 
-    # Convertir la columna 'fecha' a tipo datetime si existe
-    if 'fecha' in df.columns:
-        # Intenta convertir, si falla, deja como está o maneja el error
-        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+    # 'fecha' se almacena como BSON Date, así que pandas ya la construye como datetime64
+    # sin parsear nada. Solo los documentos antiguos (fecha como string ISO, aún sin
+    # migrar con la migración 0001 de db/migrations.py) necesitan conversión.
+    if 'fecha' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['fecha']):
+        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce', utc=True).dt.tz_localize(None)
 
     return df
 
@@ -36,12 +36,62 @@ def dataframe_to_mongo(dataframe):
     # lo harías aquí. Por simplicidad, la dejaremos como string.
     # Si vas a insertar nuevos documentos, asegúrate de no incluir un '_id' existente.
 
-    # Convertir la columna 'fecha' de datetime a ISO string si existe
+    # Convertir la columna 'fecha' a objetos datetime de Python (BSON Date); NaT -> None
     if 'fecha' in dataframe.columns and pd.api.types.is_datetime64_any_dtype(dataframe['fecha']):
-        dataframe['fecha'] = dataframe['fecha'].dt.isoformat() + 'Z'
+        fechas = dataframe['fecha'].dt.tz_localize(None) if dataframe['fecha'].dt.tz is not None else dataframe['fecha']
+        dataframe = dataframe.assign(fecha=pd.Series(fechas.dt.to_pydatetime(), index=dataframe.index, dtype=object))
+        dataframe['fecha'] = dataframe['fecha'].where(dataframe['fecha'].notna(), None)
 
     return dataframe.to_dict(orient='records')
 
+def events_to_dataframe(event_documents):
+    """
+    Expande documentos de la colección `eventos` (arrays empaquetados por partido, ver
+    models/evento_schema.py) a un DataFrame largo con una fila por evento:
+    fixture_id, minuto, extra, tipo (categórica), equipo ("local"/"visitante") y
+    jugador_id (Int64, <NA> si se desconoce).
+    Los arrays de todos los partidos se concatenan y decodifican con NumPy, sin
+    recorrer los eventos en Python.
+    """
+    import numpy as np
+    from models.evento_schema import EVENT_COLUMNS, EVENT_TYPES
+
+    documents = [doc for doc in event_documents if doc.get("n")]
+    if not documents:
+        return pd.DataFrame(columns=["fixture_id", *EVENT_COLUMNS])
+
+    counts = np.fromiter((doc["n"] for doc in documents), dtype=np.int64, count=len(documents))
+    columns = {
+        name: np.frombuffer(b"".join(bytes(doc[name]) for doc in documents), dtype=dtype)
+        for name, (_, dtype) in EVENT_COLUMNS.items()
+    }
+    fixture_ids = np.fromiter((doc["fixture_id"] for doc in documents), dtype=np.int64, count=len(documents))
+
+    jugador_id = pd.array(columns["jugador_id"].astype(np.int64), dtype="Int64")
+    jugador_id[columns["jugador_id"] == 0] = pd.NA
+    return pd.DataFrame({
+        "fixture_id": np.repeat(fixture_ids, counts),
+        "minuto": columns["minuto"].astype(np.int16),
+        "extra": columns["extra"].astype(np.int16),
+        "tipo": pd.Categorical.from_codes(columns["tipo"].astype(np.int8), categories=EVENT_TYPES),
+        "equipo": pd.Categorical.from_codes(columns["equipo"].astype(np.int8), categories=["visitante", "local"]),
+        "jugador_id": jugador_id,
+    })
+
+def row_to_python_dict(row):
+    """
+    Convierte una fila (pd.Series) en un diccionario con tipos nativos de Python
+    (int, float, bool, str), para usarla en formularios o en escrituras a MongoDB.
+    """
+    result = {}
+    for key, value in row.items():
+        if isinstance(value, pd.Timestamp):
+            value = value.to_pydatetime()
+        elif hasattr(value, "item"):
+            value = value.item() # Tipos escalares de NumPy
+        result[key] = value
+    return result
+
 def clean_and_format_dataframe(df):
     """
     Realiza una limpieza básica y formateo en el DataFrame.
@@ -75,12 +125,14 @@ def clean_and_format_dataframe(df):
 
 # Ejemplo de uso (opcional, para pruebas)
 if __name__ == "__main__":
+    from datetime import datetime
+
     # Crear algunos documentos de MongoDB de ejemplo
     mongo_docs = [
         {
             "_id": "60c72b2f9b1e8b001c8e4d1a",
             "fixture_id": 100,
-            "fecha": "2025-07-10T18:30:00Z",
+            "fecha": datetime(2025, 7, 10, 18, 30),
             "equipo_local": "Real Madrid",
             "equipo_visitante": "Barcelona",
             "es_local": True,
@@ -98,7 +150,7 @@ if __name__ == "__main__":
         {
             "_id": "60c72b2f9b1e8b001c8e4d1b",
             "fixture_id": 101,
-            "fecha": "2025-07-09T15:00:00Z",
+            "fecha": datetime(2025, 7, 9, 15, 0),
             "equipo_local": "Man Utd",
             "equipo_visitante": "Liverpool",
             "es_local": False,
@@ -116,7 +168,7 @@ if __name__ == "__main__":
         {
             "_id": "60c72b2f9b1e8b001c8e4d1c",
             "fixture_id": 102,
-            "fecha": "2025-07-08T21:00:00Z",
+            "fecha": datetime(2025, 7, 8, 21, 0),
             "equipo_local": "Bayern Munich",
             "equipo_visitante": "Dortmund",
             "es_local": True,
@@ -135,7 +187,7 @@ if __name__ == "__main__":
         {
             "_id": "60c72b2f9b1e8b001c8e4d1d",
             "fixture_id": 103,
-            "fecha": "2025-07-07T19:00:00Z",
+            "fecha": datetime(2025, 7, 7, 19, 0),
             "equipo_local": "PSG",
             "equipo_visitante": "Marseille",
             "es_local": True,
@@ -0,0 +1,62 @@
+# utils/date_tools.py
+
+# Conversión de fechas a datetime UTC "naive", que es como pymongo devuelve los
+# campos BSON Date. Usar siempre esta forma permite comparar directamente los valores
+# leídos de MongoDB con los de los filtros y el formulario de edición.
+
+from datetime import date, datetime, time, timedelta, timezone
+
+def to_utc_datetime(value):
+    """
+    Convierte `value` a datetime UTC sin zona horaria.
+    Acepta datetime (con o sin zona; sin zona se asume UTC), date, o strings ISO 8601
+    como "2025-07-11T20:00:00Z", "2025-07-11T20:00:00+00:00" o "2025-07-11".
+    Retorna None si el valor está vacío o no se puede interpretar.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.min)
+    if hasattr(value, "to_pydatetime"): # pd.Timestamp
+        return to_utc_datetime(value.to_pydatetime())
+    if isinstance(value, str):
+        text = value.strip()
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        try:
+            return to_utc_datetime(datetime.fromisoformat(text))
+        except ValueError:
+            return None
+    return None
+
+def start_of_day(value):
+    """Primer instante (00:00:00) del día de `value`, en UTC."""
+    value = to_utc_datetime(value)
+    return datetime.combine(value.date(), time.min) if value else None
+
+def end_of_day(value):
+    """Último instante del día de `value` (se usa como límite inclusivo `$lte`)."""
+    start = start_of_day(value)
+    return start + timedelta(days=1) - timedelta(milliseconds=1) if start else None
+
+def json_encode_date(value):
+    """`default` de json.dump: guarda los datetime como {"$date": ISO 8601}."""
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def json_decode_date(obj):
+    """`object_hook` de json.load: convierte {"$date": ISO 8601} de nuevo a datetime."""
+    if set(obj) == {"$date"}:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    for raw in ["2025-07-11T20:00:00Z", "2025-07-11T22:00:00+02:00", "2025-07-11", "no es fecha"]:
+        print(f"{raw!r} -> {to_utc_datetime(raw)!r}")
+    print(start_of_day("2025-07-11T20:00:00Z"), end_of_day("2025-07-11T20:00:00Z"))
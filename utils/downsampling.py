@@ -0,0 +1,56 @@
+# utils/downsampling.py
+
+# Reducción de series temporales para gráficos.
+# Largest-Triangle-Three-Buckets (LTTB, Steinarsson 2013) elige, en cada tramo de la
+# serie, el punto que forma el triángulo de mayor área con el punto elegido en el tramo
+# anterior y el promedio del tramo siguiente. Conserva picos y forma general de la serie
+# con un número fijo de puntos, a diferencia de tomar uno de cada N.
+
+def lttb(points, threshold):
+    """
+    Reduce `points` (lista de (x, y) ordenada por x, con x e y numéricos) a como máximo
+    `threshold` puntos. El primer y el último punto siempre se conservan.
+    Retorna una lista nueva (o una copia de `points` si ya cabe en el presupuesto).
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points[:threshold]) if threshold < 3 else list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0  # índice del punto elegido en el tramo anterior
+
+    for i in range(threshold - 2):
+        # Promedio del tramo siguiente (el último tramo usa el punto final)
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_count = next_end - next_start
+        avg_x = sum(p[0] for p in points[next_start:next_end]) / next_count
+        avg_y = sum(p[1] for p in points[next_start:next_end]) / next_count
+
+        # Punto del tramo actual que forma el triángulo de mayor área
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a]
+        best_area, best_index = -1.0, start
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area, best_index = area, j
+        sampled.append(points[best_index])
+        a = best_index
+
+    sampled.append(points[-1])
+    return sampled
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    import math
+    import time
+
+    series = [(i, math.sin(i / 50) + (3 if i == 7321 else 0)) for i in range(100_000)]
+    t0 = time.perf_counter()
+    reduced = lttb(series, 300)
+    print(f"{len(series)} -> {len(reduced)} puntos en {(time.perf_counter() - t0) * 1000:.1f} ms; "
+          f"pico conservado: {any(x == 7321 for x, _ in reduced)}")
@@ -0,0 +1,122 @@
+# utils/frame_store.py
+
+# Almacén único del DataFrame que muestra el dashboard.
+# Las filas se identifican por `_id` (índice `_id` -> posición), de modo que los
+# controles de la tabla solo guardan el `_id` y no copias de la fila; los datos de
+# una fila se materializan como diccionario solo cuando se necesitan (p. ej. al
+# abrir el popup de edición).
+#
+# pandas se importa de forma diferida para no retrasar el arranque.
+
+class FrameStore:
+    """DataFrame compartido con acceso por `_id`. Siempre usa un RangeIndex (etiqueta = posición)."""
+
+    def __init__(self, df=None):
+        self.df = None
+        self._positions = {}
+        if df is not None:
+            self.load(df)
+
+    def load(self, df):
+        """Reemplaza el contenido del almacén por `df`."""
+        self.df = df.reset_index(drop=True)
+        self._reindex()
+        return self
+
+    def _reindex(self):
+        if self.df is not None and "_id" in self.df.columns:
+            self._positions = {row_id: position for position, row_id in enumerate(self.df["_id"].to_numpy())}
+        else:
+            self._positions = {}
+
+    def __len__(self):
+        return 0 if self.df is None else len(self.df)
+
+    def __contains__(self, row_id):
+        return row_id in self._positions
+
+    @property
+    def empty(self):
+        return self.df is None or self.df.empty
+
+    @property
+    def columns(self):
+        return [] if self.df is None else list(self.df.columns)
+
+    def ids(self):
+        """_id de las filas, en el orden actual."""
+        return list(self._positions)
+
+    def iter_values(self, columns):
+        """
+        Recorre las filas como tuplas (_id, valor_col1, valor_col2, ...) usando
+        `itertuples`, sin crear una Series por fila como `iterrows`.
+        """
+        if self.empty:
+            return iter(())
+        return self.df[["_id", *columns]].itertuples(index=False, name=None)
+
+    def row(self, row_id):
+        """Diccionario con tipos nativos de Python de la fila `row_id`, o None si no existe."""
+        from utils.dataframe_tools import row_to_python_dict
+
+        position = self._positions.get(row_id)
+        if position is None:
+            return None
+        return row_to_python_dict(self.df.iloc[position])
+
+    def values(self, row_id, columns):
+        """Valores actuales de `columns` en la fila `row_id` ({columna: valor}), o None."""
+        position = self._positions.get(row_id)
+        if position is None:
+            return None
+        return {col: self.df.at[position, col] for col in columns if col in self.df.columns}
+
+    def column(self, row_ids, column):
+        """Diccionario {_id: valor de `column`} para las filas indicadas que existen."""
+        return {row_id: self.df.at[self._positions[row_id], column] for row_id in row_ids if row_id in self._positions}
+
+    def dtype(self, column):
+        return self.df[column].dtype
+
+    def update(self, row_id, updates):
+        """
+        Sobrescribe los campos de `updates` que existen como columnas en la fila `row_id`.
+        Retorna el diccionario de cambios aplicados ({} si la fila no existe).
+        """
+        position = self._positions.get(row_id)
+        if position is None:
+            return {}
+        applied = {}
+        for col, value in updates.items():
+            if col in self.df.columns:
+                self.df.at[position, col] = value
+                applied[col] = value
+        return applied
+
+    def remove(self, row_ids):
+        """Quita en una sola operación las filas indicadas. Retorna los _id que existían."""
+        removed = [row_id for row_id in row_ids if row_id in self._positions]
+        if removed:
+            self.df = self.df[~self.df["_id"].isin(removed)].reset_index(drop=True)
+            self._reindex()
+        return removed
+
+    def append(self, df):
+        """Añade al final las filas de `df` (con las mismas columnas que el almacén)."""
+        import pandas as pd
+
+        start = len(self.df)
+        self.df = pd.concat([self.df, df.reindex(columns=self.df.columns)], ignore_index=True)
+        for offset, row_id in enumerate(self.df["_id"].to_numpy()[start:]):
+            self._positions[row_id] = start + offset
+
+    def sort(self, column, ascending=True):
+        """Ordena las filas por `column` (orden estable)."""
+        self.df = self.df.sort_values(by=column, ascending=ascending, kind="stable").reset_index(drop=True)
+        self._reindex()
+
+    def clear(self):
+        """Vacía las filas conservando las columnas."""
+        if self.df is not None:
+            self.load(self.df.iloc[0:0])
@@ -0,0 +1,127 @@
+# utils/quantile_sketch.py
+
+# Sketch de cuantiles KLL (Karnin, Lang y Liberty, 2016) en Python puro.
+#
+# Resume un flujo de valores en O(k · log(n/k)) elementos y responde rangos y
+# cuantiles con un error de rango de aproximadamente 1.7/k (≈ 0.85 % con k=200),
+# sin guardar ni ordenar todos los valores. Los sketches se pueden combinar
+# (`merge`), así que se construyen por partes (p. ej. por lote importado) y se
+# agregan después (p. ej. todas las temporadas de una liga).
+#
+# Estructura: una lista de compactadores; los elementos del nivel h pesan 2^h. Cuando
+# un nivel supera su capacidad se ordena y se conserva uno de cada dos elementos
+# (los pares o los impares, al azar), que pasan al nivel siguiente con el doble de peso.
+
+import random
+from bisect import bisect_left, bisect_right
+
+DEFAULT_K = 200
+# Factor de reducción de la capacidad de los niveles inferiores
+_C = 2 / 3
+
+class KLLSketch:
+    """Sketch de cuantiles mergeable. Los valores deben ser comparables entre sí (números)."""
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [[]]
+        self._random = random.Random(seed)
+        self._sorted = None # Caché de (valores ordenados, pesos acumulados)
+        # Tamaño del nivel 0 a partir del cual hay que compactar (evita recorrer los
+        # niveles en cada `update`)
+        self._level0_limit = self._max_size()
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(self.k * _C ** depth) + 1)
+
+    def _size(self):
+        return sum(len(items) for items in self.levels)
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def update(self, value):
+        """Añade un valor."""
+        self.levels[0].append(value)
+        self.n += 1
+        self._sorted = None
+        if len(self.levels[0]) >= self._level0_limit:
+            self._compress()
+
+    def extend(self, values):
+        for value in values:
+            self.update(value)
+        return self
+
+    def _compress(self):
+        while self._size() >= self._max_size():
+            for level, items in enumerate(self.levels):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.levels):
+                        self.levels.append([])
+                    items.sort()
+                    # Si el número de elementos es impar, el último queda en este nivel
+                    kept = items[-1:] if len(items) % 2 else []
+                    compacted = items[:-1] if kept else items
+                    offset = self._random.getrandbits(1)
+                    self.levels[level + 1].extend(compacted[offset::2])
+                    self.levels[level] = kept
+                    break
+        self._level0_limit = self._max_size() - self._size() + len(self.levels[0])
+
+    def merge(self, other):
+        """Incorpora los valores de `other` (otro KLLSketch). Retorna self."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self._sorted = None
+        self._compress()
+        return self
+
+    def _weighted(self):
+        """Valores ordenados y peso acumulado hasta cada uno (inclusive)."""
+        if self._sorted is None:
+            pairs = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+            values, cumulative, total = [], [], 0
+            for value, weight in pairs:
+                total += weight
+                values.append(value)
+                cumulative.append(total)
+            self._sorted = (values, cumulative)
+        return self._sorted
+
+    def rank(self, value, inclusive=True):
+        """Número estimado de valores <= `value` (< `value` si no es `inclusive`)."""
+        values, cumulative = self._weighted()
+        position = (bisect_right if inclusive else bisect_left)(values, value)
+        return cumulative[position - 1] if position else 0
+
+    def cdf(self, value):
+        """Fracción estimada de valores <= `value` (0 a 1), o None si el sketch está vacío."""
+        if self.n == 0:
+            return None
+        return min(self.rank(value) / self.n, 1.0)
+
+    def quantile(self, q):
+        """Valor estimado del cuantil `q` (0 a 1), o None si el sketch está vacío."""
+        values, cumulative = self._weighted()
+        if not values:
+            return None
+        target = q * cumulative[-1]
+        position = bisect_left(cumulative, target)
+        return values[min(position, len(values) - 1)]
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "levels": [list(items) for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data.get("k", DEFAULT_K))
+        sketch.n = data.get("n", 0)
+        sketch.levels = [list(items) for items in data.get("levels", [])] or [[]]
+        sketch._compress()
+        return sketch
@@ -0,0 +1,153 @@
+# utils/team_index.py
+
+# Índice en memoria para buscar equipos por nombre mientras el usuario escribe.
+# Los nombres se normalizan sin acentos ni mayúsculas ("Atlético" -> "atletico") y se
+# indexan por prefijo (lista ordenada + bisect) y por trigramas para tolerar errores
+# de tipeo. Se puede ampliar de forma incremental con `add` al ingerir equipos nuevos.
+
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from itertools import islice
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+# Candidatos que aporta como máximo cada trigrama a la búsqueda aproximada (los nombres
+# más cortos de su lista): acota el coste de los trigramas muy frecuentes (" un", "ad ")
+MAX_CANDIDATES_PER_TRIGRAM = 256
+
+def fold_text(text):
+    """Normaliza un texto: sin acentos, en minúsculas y con un solo espacio entre palabras."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    without_accents = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", without_accents.casefold()).strip()
+
+def trigrams(folded_text):
+    """Conjunto de trigramas de un texto ya normalizado (con relleno en los bordes)."""
+    padded = f"  {folded_text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def trigram_similarity(a, b):
+    """Similitud de Jaccard entre los trigramas de dos textos ya normalizados."""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+class TeamSearchIndex:
+    """
+    Índice de búsqueda de equipos.
+    `search(texto, k)` retorna hasta `k` nombres: primero los que empiezan por el texto,
+    después los que tienen alguna palabra que empieza por el texto y, si faltan,
+    los más parecidos por trigramas.
+    """
+    def __init__(self, names=(), min_similarity=0.4):
+        self.min_similarity = min_similarity
+        self._display = {}               # nombre normalizado -> nombre original
+        self._keys = []                  # lista ordenada de (clave, nombre normalizado, es_inicio)
+        self._postings = defaultdict(set)  # trigrama -> nombres normalizados
+        self._grams = {}                   # nombre normalizado -> sus trigramas
+        self._ranked = {}                  # trigrama -> nombres ordenados por longitud (caché)
+        self.add(names)
+
+    def __len__(self):
+        return len(self._display)
+
+    def __contains__(self, name):
+        return fold_text(name) in self._display
+
+    def add(self, names):
+        """Agrega nombres nuevos al índice (los ya indexados se ignoran). Retorna cuántos se agregaron."""
+        new_keys = []
+        for name in names:
+            if not name:
+                continue
+            folded = fold_text(name)
+            if not folded or folded in self._display:
+                continue
+            self._display[folded] = name
+            words = folded.split(" ")
+            new_keys.append((folded, folded, True))
+            for i in range(1, len(words)):
+                new_keys.append((" ".join(words[i:]), folded, False))
+            grams = self._grams[folded] = frozenset(trigrams(folded))
+            for gram in grams:
+                self._postings[gram].add(folded)
+                self._ranked.pop(gram, None)
+
+        if len(new_keys) > 32:
+            self._keys.extend(new_keys)
+            self._keys.sort()
+        else:
+            for key in new_keys:
+                bisect.insort(self._keys, key)
+        return len({k[1] for k in new_keys})
+
+    def _prefix_matches(self, folded_query, limit):
+        start = bisect.bisect_left(self._keys, (folded_query,))
+        full, partial = [], []
+        for key, folded, is_start in self._keys[start:]:
+            if not key.startswith(folded_query):
+                break
+            (full if is_start else partial).append(folded)
+            if len(full) >= limit:
+                break
+        return full, partial
+
+    def _ranked_postings(self, gram):
+        """Nombres con el trigrama `gram`, del más corto al más largo (se calcula una vez)."""
+        ranked = self._ranked.get(gram)
+        if ranked is None:
+            ranked = self._ranked[gram] = tuple(sorted(self._postings.get(gram, ()), key=lambda f: (len(f), f)))
+        return ranked
+
+    def search(self, query, k=10):
+        """Retorna hasta `k` nombres de equipos que coinciden con `query`."""
+        folded_query = fold_text(query)
+        if not folded_query:
+            return [self._display[key[1]] for key in islice((key for key in self._keys if key[2]), k)]
+
+        full, partial = self._prefix_matches(folded_query, k)
+        results = list(dict.fromkeys(full + partial))[:k]
+
+        if len(results) < k:
+            # Completa con coincidencias aproximadas por trigramas. Un nombre con al menos
+            # `needed` trigramas de la consulta aparece en alguna de las
+            # len(query_grams) - needed + 1 listas más cortas: solo se recorren esas, y de
+            # cada una los MAX_CANDIDATES_PER_TRIGRAM nombres más cortos (a igual número
+            # de trigramas compartidos gana el más corto)
+            query_grams = trigrams(folded_query)
+            needed = max(1, math.ceil(self.min_similarity * len(query_grams)))
+            rarest = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+            candidates = set()
+            for gram in rarest[:len(query_grams) - needed + 1]:
+                candidates.update(self._ranked_postings(gram)[:MAX_CANDIDATES_PER_TRIGRAM])
+            candidates.difference_update(results)
+            scored = []
+            for folded in candidates:
+                shared = len(query_grams & self._grams[folded])
+                # Proporción de trigramas de la consulta presentes en el nombre: favorece
+                # nombres largos que contienen la consulta mal escrita ("bayren" -> "bayern munich")
+                if shared >= needed:
+                    scored.append((-shared, len(folded), folded))
+            results.extend(folded for _, _, folded in heapq.nsmallest(k - len(results), scored))
+
+        return [self._display[folded] for folded in results]
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    import time
+
+    index = TeamSearchIndex(["Atlético de Madrid", "Real Madrid", "Manchester United", "Manchester City",
+                             "Man Utd", "Bayern Munich", "Borussia Dortmund", "Deportivo Alavés"])
+    for q in ["atl", "madrid", "man", "dortmund", "Bayren", "alaves"]:
+        print(f"{q!r}: {index.search(q, k=5)}")
+
+    index.add(f"Equipo {i}" for i in range(20000))
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.search("equipo 19", k=10)
+    # 1000 búsquedas: el total en segundos equivale a la media en milisegundos
+    print(f"Búsqueda media con {len(index)} equipos: {(time.perf_counter() - start):.3f} ms")
@@ -0,0 +1,208 @@
+# utils/tracing.py
+
+# Trazas ligeras (spans) para medir en qué se va el tiempo de cada acción del dashboard.
+# Los spans se pueden exportar en el formato "trace event" de Chrome
+# (abrir en chrome://tracing o https://ui.perfetto.dev) y un perfilador por muestreo
+# permite capturar un flame profile (formato "folded") de una sola acción.
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo: cada `interval` segundos toma la pila del hilo objetivo
+    y acumula las pilas en formato "folded" (func_a;func_b;func_c N), compatible con
+    flamegraph.pl y speedscope.
+    """
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Inicia el muestreo en un hilo de fondo."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el muestreo y espera a que el hilo termine."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def to_folded(self):
+        """Retorna las muestras en formato folded, una pila por línea."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def write_folded(self, file_path):
+        """Escribe el perfil en formato folded y retorna la ruta."""
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(self.to_folded())
+        return file_path
+
+
+class Tracer:
+    """
+    Registro de spans anidados. Un span de nivel superior (sin padre en el hilo actual)
+    define una "acción"; los spans internos son sus etapas.
+    Si está deshabilitado, `span` no hace nada más que ceder el control.
+    """
+    def __init__(self, enabled=False, max_spans=10000, profile_dir="trace_profiles"):
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.profile_dir = profile_dir
+        self.profile_next_action = False
+        self.last_profile_path = None
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._epoch = time.perf_counter()
+        self._action_seq = 0
+        self._last_action_id = None
+
+    @contextmanager
+    def span(self, name, **args):
+        """Context manager que mide la duración del bloque y la registra como span."""
+        if not self.enabled:
+            yield
+            return
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        profiler = None
+        if not stack:
+            with self._lock:
+                self._action_seq += 1
+                self._local.action_id = self._action_seq
+            if self.profile_next_action:
+                self.profile_next_action = False
+                profiler = SamplingProfiler().start()
+
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            record = {
+                "name": name,
+                "ts": (start - self._epoch) * 1e6,
+                "dur": (end - start) * 1e6,
+                "tid": threading.get_ident(),
+                "depth": len(stack),
+                "action_id": self._local.action_id,
+                "args": args,
+            }
+            with self._lock:
+                self.spans.append(record)
+                if len(self.spans) > self.max_spans:
+                    del self.spans[:len(self.spans) - self.max_spans]
+                if not stack:
+                    self._last_action_id = record["action_id"]
+            if profiler:
+                profiler.stop()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                file_name = f"{name.replace('.', '_')}_{int(time.time())}.folded"
+                self.last_profile_path = profiler.write_folded(os.path.join(self.profile_dir, file_name))
+                print(f"Perfil de '{name}' guardado en {self.last_profile_path}")
+
+    def traced(self, name=None):
+        """Decorador que envuelve la función completa en un span."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def clear(self):
+        """Elimina todos los spans registrados."""
+        with self._lock:
+            self.spans = []
+            self._last_action_id = None
+
+    def last_action_spans(self):
+        """Retorna los spans de la última acción completada, ordenados por inicio."""
+        with self._lock:
+            action_id = self._last_action_id
+            spans = [s for s in self.spans if s["action_id"] == action_id]
+        return sorted(spans, key=lambda s: s["ts"])
+
+    def format_last_action(self):
+        """Retorna un resumen legible (una línea por span, indentado por nivel)."""
+        return [
+            f"{'    ' * s['depth']}{s['name']}: {s['dur'] / 1000:.1f} ms"
+            for s in self.last_action_spans()
+        ]
+
+    def to_chrome_trace(self):
+        """Convierte los spans al formato JSON "trace event" de Chrome."""
+        with self._lock:
+            spans = list(self.spans)
+        events = [
+            {
+                "name": s["name"],
+                "cat": "futbol_stats",
+                "ph": "X",
+                "ts": round(s["ts"], 3),
+                "dur": round(s["dur"], 3),
+                "pid": os.getpid(),
+                "tid": s["tid"],
+                "args": {**s["args"], "action_id": s["action_id"]},
+            }
+            for s in spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file_path="trace_futbol_stats.json"):
+        """Escribe la traza en formato Chrome y retorna la ruta del archivo."""
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return file_path
+
+
+# Tracer global de la aplicación. Se habilita con TRACE_ENABLED=1 o desde el visor en la UI.
+tracer = Tracer(enabled=os.getenv("TRACE_ENABLED") == "1")
+
+# Ejemplo de uso (opcional, para pruebas)
+if __name__ == "__main__":
+    tracer.enabled = True
+    tracer.profile_next_action = True
+    with tracer.span("load_data"):
+        with tracer.span("load_data.query"):
+            time.sleep(0.02)
+        with tracer.span("load_data.build_rows", rows=100):
+            sum(i * i for i in range(200000))
+    print("\n".join(tracer.format_last_action()))
+    print(f"Traza exportada a {tracer.export_chrome_trace()}")
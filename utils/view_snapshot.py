@@ -0,0 +1,53 @@
+# utils/view_snapshot.py
+
+# Instantánea local de la última vista del dashboard (stale-while-revalidate).
+#
+# Al cerrar la aplicación se guarda en un archivo JSON compacto (VIEW_SNAPSHOT_PATH)
+# lo que se estaba mostrando: filtros, columnas, la primera página de filas ya como
+# texto de celda, opciones de los desplegables y KPIs. Al arrancar, el dashboard
+# pinta esa vista sin esperar a la base de datos ni importar pandas, y revalida en
+# segundo plano; como las filas se reutilizan por `_id`, al llegar los datos frescos
+# solo se envían al cliente las celdas que cambiaron.
+
+import json
+import os
+
+from utils.date_tools import json_decode_date, json_encode_date
+
+VIEW_SNAPSHOT_PATH = os.getenv("VIEW_SNAPSHOT_PATH", "view_snapshot.json")
+# Se descartan instantáneas con otro formato
+SNAPSHOT_VERSION = 1
+# Filas que se guardan (la primera "página" de la tabla)
+SNAPSHOT_MAX_ROWS = 200
+
+def save_snapshot(snapshot, path=VIEW_SNAPSHOT_PATH):
+    """Guarda `snapshot` de forma atómica (archivo temporal + reemplazo). Retorna True si se guardó."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(snapshot, version=SNAPSHOT_VERSION), f, default=json_encode_date,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Error al guardar la instantánea de la vista '{path}': {e}")
+        return False
+
+def load_snapshot(path=VIEW_SNAPSHOT_PATH, storage=None):
+    """
+    Lee la instantánea guardada. Retorna None si no existe, no se puede leer, tiene
+    otro formato o se guardó con otro backend de almacenamiento (`storage`).
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f, object_hook=json_decode_date)
+    except (OSError, ValueError) as e:
+        print(f"Error al leer la instantánea de la vista '{path}': {e}")
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if storage is not None and snapshot.get("storage") != storage:
+        return None
+    return snapshot